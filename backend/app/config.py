@@ -5,6 +5,10 @@ from pathlib import Path
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# Years covered by the map
+MIN_YEAR = 1920
+MAX_YEAR = 1991
+
 
 class Settings(BaseSettings):
     """Application settings."""
@@ -23,22 +27,90 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str = "sqlite+aiosqlite:///./historymap.db"
+    # Read-only GET paths, e.g. a replica (default: database_url, read-only)
+    database_read_url: str | None = None
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0  # seconds to wait for a pooled connection
+    # SQLite connection pragmas
+    sqlite_journal_mode: str = "wal"
+    sqlite_synchronous: str = "normal"
+    sqlite_busy_timeout: int = 5000  # milliseconds a writer waits for the lock
+    sqlite_cache_size: int = 64 * 1024  # KiB per connection
+    sqlite_mmap_size: int = 256 * 1024 * 1024
 
     # ML Settings
     ml_model_name: str = "seara/rubert-tiny-sentiment"
     ml_device: str = "cpu"
     ml_batch_size: int = 10
+    # "rules" (keywords) or "transformer" (ml_model_name, falls back to rules)
+    ml_engine: str = "rules"
+    ml_runtime: str = "quantized"  # transformer on CPU: "quantized", "onnx" or "torch"
+    ml_batch_max_wait: float = 0.02  # seconds a text waits for its micro-batch to fill
+    # Per-text results memoized by content hash: in memory and in the database
+    ml_cache_size: int = 50_000
+    ml_cache_persist: bool = True
+    # Sentiment batches run off the event loop in a "thread" or "process" pool
+    ml_executor: str = "thread"
+    ml_workers: int = 2
+    ml_max_pending: int = 16  # batches queued or running before callers wait
 
     # Scraper Settings
     scraper_base_url: str = "https://prozhito.org"
     scraper_timeout: int = 10
-    scraper_delay: float = 0.5
+    scraper_delay: float = 0.5  # average seconds between requests to one host
+    scraper_burst: int = 2  # requests to one host allowed back to back
+    scraper_per_host_concurrency: int = 4
+    scraper_max_connections: int = 20
+    scraper_max_keepalive: int = 10
+    scraper_keepalive_expiry: float = 30.0
+    scraper_http2: bool = True  # used if the h2 package is installed
+    scraper_max_retries: int = 3  # on 429, 5xx and transport errors
+    scraper_backoff: float = 0.5  # first retry delay, doubled per attempt
+    # Diary ingestion walks all pages of a region/year
+    scraper_page_size: int = 50
+    scraper_max_pages: int = 100
+    scraper_page_concurrency: int = 4  # pages fetched in parallel per region/year
+    # Parsed responses kept for conditional requests (0 disables)
+    scraper_cache_dir: Path = Path("./data/http_cache")
+    scraper_cache_max_bytes: int = 64 * 1024 * 1024
 
     # Cache Settings (in seconds)
     cache_ttl: int = 86400  # 24 hours
+    # Past cache_ttl, serve the stale row and refresh in the background
+    # until cache_hard_ttl, after which the client waits for a refresh.
+    cache_stale_while_revalidate: bool = True
+    cache_hard_ttl: int = 7 * 86400  # 7 days
+    # Browser/proxy max-age for serialized map responses (revalidated by ETag)
+    map_cache_max_age: int = 60
+
+    # Refresh Settings
+    refresh_concurrency: int = 8  # regions refreshed in parallel per request
+    # Seconds per region; pages still missing then are dropped, keeping the
+    # entries analyzed so far
+    refresh_timeout: float = 15.0
+    # Same for refreshes nobody waits for (background, scheduler, prewarm)
+    refresh_background_timeout: float = 120.0
+    map_range_concurrency: int = 4  # years refreshed in parallel by /api/map?from=&to=
+    diary_sample_size: int = 100  # diary entries stored per region, paged by details
+
+    # Background renewal of cached rows before they go stale
+    scheduler_enabled: bool = True
+    scheduler_interval: float = 60.0  # seconds between scans
+    scheduler_refresh_ahead: int = 3600  # renew rows this long before cache_ttl
+    scheduler_batch_size: int = 50  # regions refreshed per scan at most
+    scheduler_rate: float = 0.5  # scheduled region refreshes per second
+    scheduler_burst: int = 4
 
     # Paths
     geojson_path: Path = Path(__file__).parent.parent.parent / "urss.geojson"
+    # Census anchors of region populations, interpolated over all years
+    population_path: Path = Path(__file__).parent / "services" / "population_census.csv"
+    tile_cache_dir: Path = Path("./data/tiles")
+
+    # Vector tiles rendered into the disk cache at startup (-1 disables)
+    tile_precompute_min_zoom: int = 2
+    tile_precompute_max_zoom: int = 4
 
     # CORS
     cors_origins: list[str] = ["http://localhost:5173", "http://localhost:4173"]
@@ -1,14 +1,80 @@
 """Database configuration and session management."""
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
 from app.config import settings
 
-engine = create_async_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if settings.database_url.startswith("sqlite") else {},
-)
+
+def _is_sqlite_memory(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+def _sqlite_pragmas(read_only: bool) -> list[str]:
+    pragmas = [
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        # Negative cache sizes are in KiB rather than pages
+        f"PRAGMA cache_size=-{settings.sqlite_cache_size}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    else:
+        # The journal mode is persistent, so the writer sets it for everyone
+        pragmas.insert(0, f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    return pragmas
+
+
+def create_engine(url: str, read_only: bool = False) -> AsyncEngine:
+    """
+    Create an async engine with a sized connection pool.
+
+    SQLite connections are set up with WAL journaling and tuned pragmas
+    (see the ``sqlite_*`` settings), so readers are not blocked by a
+    writer and writers wait for each other instead of failing with
+    "database is locked". With ``read_only`` every statement that writes
+    is rejected.
+    """
+    pool = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+    }
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_async_engine(url, pool_pre_ping=True, **pool)
+
+    # An in-memory database lives on a single connection; there is no pool to size
+    engine = create_async_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        **({} if _is_sqlite_memory(url) else pool),
+    )
+    pragmas = _sqlite_pragmas(read_only)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return engine
+
+
+engine = create_engine(settings.database_url)
+
+# GET paths read through their own pool (or a replica), so they never queue
+# behind refresh writes; an in-memory database can only be shared
+if settings.database_read_url:
+    read_engine = create_engine(settings.database_read_url, read_only=True)
+elif _is_sqlite_memory(settings.database_url):
+    read_engine = engine
+else:
+    read_engine = create_engine(settings.database_url, read_only=True)
 
 async_session_maker = async_sessionmaker(
     engine,
@@ -16,6 +82,12 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False,
 )
 
+async_read_session_maker = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
 
 class Base(DeclarativeBase):
     """Base class for all models."""
@@ -30,3 +102,12 @@ async def get_db() -> AsyncSession:
             yield session
         finally:
             await session.close()
+
+
+async def get_read_db() -> AsyncSession:
+    """Get a read-only database session for GET endpoints."""
+    async with async_read_session_maker() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
@@ -1,23 +1,63 @@
 """FastAPI application for HistoryMap backend."""
 
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.database import engine, Base
-from app.routers import health_router, map_router
+from app.database import Base, async_session_maker, engine, read_engine
+from app.migrations import migrate
+from app.repository import get_region_summaries
+from app.routers import geo_router, health_router, map_router
+from app.services import (
+    ml_service,
+    population_service,
+    refresh_scheduler,
+    region_refresh_service,
+    scraper_service,
+)
+from app.utils import emotion_cube, geo_asset_store, load_region_registry
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events."""
-    # Startup: Create tables
+    # Startup: Create tables and upgrade the ones of older versions
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(migrate)
+    # Startup: Load cached emotions into memory for map reads
+    async with async_session_maker() as db:
+        emotion_cube.update(await get_region_summaries(db))
+    # Startup: Parse GeoJSON once into the region registry
+    load_region_registry()
+    # Startup: Interpolate population census anchors over all years
+    population_service.load()
+    # Startup: Precompute simplified, compressed geometry levels
+    await asyncio.to_thread(geo_asset_store.warm)
+    # Startup: Fill the vector tile disk cache without delaying startup
+    tiles_task = None
+    if settings.tile_precompute_max_zoom >= 0:
+        tiles_task = asyncio.create_task(asyncio.to_thread(
+            geo_asset_store.warm_tiles,
+            settings.tile_precompute_min_zoom,
+            settings.tile_precompute_max_zoom,
+        ))
+    # Startup: Renew cached regions before they expire
+    if settings.scheduler_enabled:
+        refresh_scheduler.start()
     yield
-    # Shutdown: Close connections
+    if tiles_task is not None:
+        tiles_task.cancel()
+    # Shutdown: Stop background refreshes and close connections
+    await refresh_scheduler.stop()
+    await region_refresh_service.shutdown()
+    await asyncio.to_thread(ml_service.shutdown)
+    await scraper_service.close()
+    if read_engine is not engine:
+        await read_engine.dispose()
     await engine.dispose()
 
 
@@ -40,6 +80,7 @@ app.add_middleware(
 # Include routers
 app.include_router(health_router)
 app.include_router(map_router)
+app.include_router(geo_router)
 
 
 @app.get("/")
@@ -0,0 +1,81 @@
+"""Schema upgrades of existing databases that ``create_all`` does not apply.
+
+``Base.metadata.create_all`` only creates missing tables: indexes and
+columns added to a table that already exists are never applied. The
+functions here run on a synchronous connection at startup (through
+``AsyncConnection.run_sync``) and are safe to run on every start.
+"""
+
+import json
+
+from sqlalchemy import insert, inspect, text
+from sqlalchemy.engine import Connection
+
+from app.config import settings
+from app.models import RegionData, RegionDiaryEntry
+
+
+def migrate(conn: Connection) -> None:
+    """Bring tables created by older versions up to the current schema."""
+    add_region_unique_index(conn)
+    move_diary_entries(conn)
+
+
+def add_region_unique_index(conn: Connection) -> None:
+    """Create the unique (year, region_name) index of ``region_data``.
+
+    Older versions did not prevent duplicate rows of a region and year;
+    only the most recently updated one is kept before the index is created.
+    """
+    index = next(
+        index for index in RegionData.__table__.indexes
+        if index.name == "ix_region_data_year_region_name"
+    )
+    existing = {existing["name"] for existing in inspect(conn).get_indexes("region_data")}
+    if index.name in existing:
+        return
+
+    conn.execute(text(
+        "DELETE FROM region_data WHERE EXISTS ("
+        " SELECT 1 FROM region_data AS newer"
+        " WHERE newer.year = region_data.year"
+        " AND newer.region_name = region_data.region_name"
+        " AND (newer.updated_at > region_data.updated_at"
+        " OR (newer.updated_at = region_data.updated_at AND newer.id > region_data.id)))"
+    ))
+    conn.execute(text(
+        "DELETE FROM region_diary_entries WHERE region_id NOT IN (SELECT id FROM region_data)"
+    ))
+    index.create(conn, checkfirst=True)
+
+
+def move_diary_entries(conn: Connection) -> None:
+    """Copy diary entries of the old ``region_data.diary_entries`` JSON column.
+
+    Entries now live in ``region_diary_entries``; a row keeps the first
+    ``diary_sample_size`` of them, like a refresh does. The old column is
+    emptied once copied (and left in place).
+    """
+    columns = {column["name"] for column in inspect(conn).get_columns("region_data")}
+    if "diary_entries" not in columns:
+        return
+
+    rows = conn.execute(text(
+        "SELECT id, diary_entries FROM region_data"
+        " WHERE diary_entries IS NOT NULL"
+        " AND id NOT IN (SELECT region_id FROM region_diary_entries)"
+    ))
+    values = []
+    for region_id, entries in rows:
+        # SQLite returns the JSON text, other databases may decode it
+        if isinstance(entries, str):
+            entries = json.loads(entries)
+        values.extend(
+            RegionDiaryEntry.values_from_dict(region_id, position, entry)
+            for position, entry in enumerate((entries or [])[:settings.diary_sample_size])
+        )
+    if values:
+        conn.execute(insert(RegionDiaryEntry), values)
+    conn.execute(text(
+        "UPDATE region_data SET diary_entries = NULL WHERE diary_entries IS NOT NULL"
+    ))
@@ -3,16 +3,20 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Float, Integer, String, Text, JSON
+from sqlalchemy import Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
+from app.utils.emotions import EmotionAggregator
 
 
 class RegionData(Base):
     """Cached region data with emotions and diary entries."""
 
     __tablename__ = "region_data"
+    __table_args__ = (
+        Index("ix_region_data_year_region_name", "year", "region_name", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     year: Mapped[int] = mapped_column(Integer, index=True)
@@ -28,14 +32,29 @@ class RegionData(Base):
     # Diary entries count
     diary_count: Mapped[int] = mapped_column(Integer, default=0)
 
-    # Raw data
-    diary_entries: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
-    stats: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    # Diary entries live in RegionDiaryEntry; population stats are not
+    # stored, they come from the census table of the population service
 
     # Cache metadata
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    def emotion_aggregator(self) -> EmotionAggregator:
+        """Aggregation state of the analyzed diary entries.
+
+        The stored average emotions and diary count fully determine it, so
+        new entries can be merged in without re-analyzing the old ones.
+        """
+        return EmotionAggregator.from_average(
+            {
+                "fear": self.fear,
+                "joy": self.joy,
+                "neutral": self.neutral,
+                "sadness": self.sadness,
+            },
+            self.diary_count or 0,
+        )
+
     def to_dict(self) -> dict:
         """Convert model to dictionary for API responses."""
         return {
@@ -49,3 +68,55 @@ class RegionData(Base):
             },
             "diary_count": self.diary_count,
         }
+
+
+class RegionDiaryEntry(Base):
+    """A stored diary entry of a cached region, loaded page by page for details."""
+
+    __tablename__ = "region_diary_entries"
+    __table_args__ = (
+        Index("ix_region_diary_entries_region_position", "region_id", "position", unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    region_id: Mapped[int] = mapped_column(ForeignKey("region_data.id", ondelete="CASCADE"))
+    position: Mapped[int] = mapped_column(Integer)
+
+    text: Mapped[str] = mapped_column(Text)
+    author: Mapped[str] = mapped_column(String(200), default="")
+    date: Mapped[str] = mapped_column(String(50), default="")
+    url: Mapped[str] = mapped_column(String(500), default="")
+
+    @staticmethod
+    def values_from_dict(region_id: int, position: int, entry: dict) -> dict:
+        """Column values of a row for a scraped diary entry (for bulk inserts)."""
+        return {
+            "region_id": region_id,
+            "position": position,
+            "text": entry.get("text", ""),
+            "author": entry.get("author", ""),
+            "date": entry.get("date", ""),
+            "url": entry.get("url", ""),
+        }
+
+    def to_dict(self) -> dict:
+        """Convert model to dictionary for API responses."""
+        return {"text": self.text, "author": self.author, "date": self.date, "url": self.url}
+
+
+class SentimentCache(Base):
+    """Memoized sentiment scores of a text, keyed by content hash and engine."""
+
+    __tablename__ = "sentiment_cache"
+
+    # sha256 of the normalized text
+    text_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # Engine and version that produced the scores (e.g. "rules:1a2b3c4d")
+    engine: Mapped[str] = mapped_column(String(200), primary_key=True)
+
+    fear: Mapped[float] = mapped_column(Float, default=0.0)
+    joy: Mapped[float] = mapped_column(Float, default=0.0)
+    neutral: Mapped[float] = mapped_column(Float, default=0.0)
+    sadness: Mapped[float] = mapped_column(Float, default=0.0)
+
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
@@ -0,0 +1,224 @@
+"""Bulk pre-warm of the region cache: compute every region x year up front.
+
+Usage::
+
+    python -m app.prewarm [--from 1920] [--to 1991] [--region NAME ...]
+                          [--concurrency N] [--checkpoint PATH] [--force]
+
+Cells that already have a fresh row are skipped, so it can run on every
+deploy and only computes what is missing or expired. Cells completed by
+the current run are recorded in a checkpoint file, which is removed when
+the run finishes, so an interrupted ``--force`` run resumes where it
+stopped.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from app.config import MAX_YEAR, MIN_YEAR, settings
+from app.database import Base, async_session_maker, engine
+from app.repository import get_region_rows_for_year
+from app.services import ml_service, scraper_service
+from app.services.region_refresh import FRESH, RegionRefreshService, cache_state
+from app.utils import get_region_registry, load_region_registry
+
+DEFAULT_CHECKPOINT = Path("./data/prewarm-checkpoint.json")
+
+
+@dataclass
+class PrewarmStats:
+    """Counters of a pre-warm run."""
+
+    total: int = 0
+    computed: int = 0
+    skipped: int = 0
+    # Computed without diary entries, so nothing was stored
+    empty: int = 0
+    failed: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def done(self) -> int:
+        return self.computed + self.skipped + self.empty + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def rate(self) -> float:
+        """Computed cells per second."""
+        return self.computed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.computed} computed, {self.skipped} skipped, {self.empty} empty, "
+            f"{self.failed} failed "
+            f"of {self.total} cells in {self.elapsed:.1f}s ({self.rate:.1f} cells/s)"
+        )
+
+
+class Checkpoint:
+    """Cells completed by an unfinished run, by year, persisted as JSON after every year."""
+
+    def __init__(self, path: Path | None):
+        self.path = path
+        self.done: dict[int, set[str]] = {}
+        if path is not None and path.exists():
+            data = json.loads(path.read_text(encoding="utf-8"))
+            self.done = {int(year): set(names) for year, names in data.items()}
+
+    def is_done(self, year: int, region_name: str) -> bool:
+        return region_name in self.done.get(year, ())
+
+    def mark(self, year: int, region_names: list[str]) -> None:
+        self.done.setdefault(year, set()).update(region_names)
+        if self.path is None:
+            return
+
+        data = {str(year): sorted(names) for year, names in sorted(self.done.items())}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Write atomically so an interrupted run never leaves a broken file
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        """Forget all cells, once a run has gone through every year."""
+        self.done = {}
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+
+
+async def prewarm(
+    years: range,
+    region_names: list[str] | None = None,
+    concurrency: int | None = None,
+    checkpoint: Path | None = None,
+    force: bool = False,
+    session_factory=async_session_maker,
+    progress: Callable[[str], None] = print,
+) -> PrewarmStats:
+    """
+    Compute and store every region of every year that is not fresh yet.
+
+    Up to ``concurrency`` years run at once, each refreshing its regions
+    with the usual bounded fan-out. With ``force`` fresh cells are
+    recomputed too, except those an interrupted run already did (in the
+    checkpoint and still fresh).
+    """
+    service = RegionRefreshService(session_factory)
+    names = region_names or [region.name for region in get_region_registry()]
+    state = Checkpoint(checkpoint)
+    stats = PrewarmStats(total=len(names) * len(years))
+    semaphore = asyncio.Semaphore(max(1, concurrency or settings.map_range_concurrency))
+    now = datetime.utcnow()
+
+    async def warm_year(year: int) -> None:
+        async with semaphore:
+            async with session_factory() as db:
+                rows = await get_region_rows_for_year(db, year)
+            todo = [
+                name
+                for name in names
+                if cache_state(rows.get(name), now) != FRESH
+                or (force and not state.is_done(year, name))
+            ]
+            stats.skipped += len(names) - len(todo)
+
+            if todo:
+                started = time.monotonic()
+                results = await service.refresh_regions(
+                    todo, year, settings.refresh_background_timeout
+                )
+                await service.store_results(year, results)
+                # Results without entries are not stored: try them again next time
+                stored = [name for name, result in results.items() if result["diary_entries"]]
+                state.mark(year, stored)
+                stats.computed += len(stored)
+                stats.empty += len(results) - len(stored)
+                stats.failed += len(todo) - len(results)
+                elapsed = time.monotonic() - started
+                detail = f"{len(stored)}/{len(todo)} regions in {elapsed:.1f}s"
+            else:
+                detail = "up to date"
+
+            progress(
+                f"[{stats.done}/{stats.total}] {year}: {detail} "
+                f"({stats.rate:.1f} cells/s)"
+            )
+
+    await asyncio.gather(*(warm_year(year) for year in years))
+    state.clear()
+    return stats
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.prewarm",
+        description="Compute every region x year into the cache.",
+    )
+    parser.add_argument("--from", dest="from_year", type=int, default=MIN_YEAR)
+    parser.add_argument("--to", dest="to_year", type=int, default=MAX_YEAR)
+    parser.add_argument(
+        "--region", dest="regions", action="append", help="Region name (repeatable)"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=settings.map_range_concurrency,
+        help="Years computed in parallel",
+    )
+    parser.add_argument("--checkpoint", type=Path, default=DEFAULT_CHECKPOINT)
+    parser.add_argument(
+        "--force", action="store_true", help="Recompute cells that are already fresh"
+    )
+    args = parser.parse_args(argv)
+
+    if not MIN_YEAR <= args.from_year <= args.to_year <= MAX_YEAR:
+        parser.error(f"years must satisfy {MIN_YEAR} <= --from <= --to <= {MAX_YEAR}")
+    return args
+
+
+async def _main(args: argparse.Namespace) -> int:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    registry = load_region_registry()
+
+    unknown = [name for name in args.regions or () if registry.get_by_name(name) is None]
+    if unknown:
+        print(f"Unknown regions: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    regions = [registry.get_by_name(name).name for name in args.regions or ()]
+    try:
+        stats = await prewarm(
+            range(args.from_year, args.to_year + 1),
+            region_names=regions or None,
+            concurrency=args.concurrency,
+            checkpoint=args.checkpoint,
+            force=args.force,
+        )
+    finally:
+        await asyncio.to_thread(ml_service.shutdown)
+        await scraper_service.close()
+        await engine.dispose()
+
+    print(f"Done: {stats.summary()}")
+    return 1 if stats.failed else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    return asyncio.run(_main(_parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
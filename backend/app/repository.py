@@ -0,0 +1,347 @@
+"""Data access helpers for cached region data and sentiment scores."""
+
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import RegionData, RegionDiaryEntry, SentimentCache
+from app.utils import EmotionAggregator, emotion_cube, map_payload_cache
+
+
+async def get_region_rows_for_year(db: AsyncSession, year: int) -> dict[str, RegionData]:
+    """Load all cached rows for a year in one query, keyed by region name."""
+    result = await db.execute(select(RegionData).where(RegionData.year == year))
+    return {row.region_name: row for row in result.scalars()}
+
+
+async def get_region_rows_for_years(
+    db: AsyncSession, from_year: int, to_year: int
+) -> dict[int, dict[str, RegionData]]:
+    """Load all cached rows of a year range in one query, keyed by year and region."""
+    result = await db.execute(
+        select(RegionData).where(RegionData.year.between(from_year, to_year))
+    )
+    rows: dict[int, dict[str, RegionData]] = {}
+    for row in result.scalars():
+        rows.setdefault(row.year, {})[row.region_name] = row
+    return rows
+
+
+async def get_region_row(db: AsyncSession, year: int, region_name: str) -> RegionData | None:
+    """Load the cached row for a single region and year."""
+    result = await db.execute(
+        select(RegionData).where(
+            RegionData.year == year,
+            RegionData.region_name == region_name,
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+async def get_diary_entries(
+    db: AsyncSession, region_id: int, offset: int = 0, limit: int | None = None
+) -> list[dict]:
+    """Load a page of the stored diary entries of a cached row."""
+    result = await db.execute(
+        select(RegionDiaryEntry)
+        .where(RegionDiaryEntry.region_id == region_id)
+        .order_by(RegionDiaryEntry.position)
+        .offset(offset)
+        .limit(limit)
+    )
+    return [entry.to_dict() for entry in result.scalars()]
+
+
+async def count_diary_entries(db: AsyncSession, region_id: int) -> int:
+    """Number of stored diary entries of a cached row."""
+    result = await db.execute(
+        select(func.count()).where(RegionDiaryEntry.region_id == region_id)
+    )
+    return result.scalar_one()
+
+
+# What the emotion cube keeps of a cached row
+_SUMMARY_COLUMNS = (
+    RegionData.year,
+    RegionData.region_name,
+    RegionData.geo_id,
+    RegionData.fear,
+    RegionData.joy,
+    RegionData.neutral,
+    RegionData.sadness,
+    RegionData.diary_count,
+    RegionData.updated_at,
+)
+
+
+async def get_region_summaries(db: AsyncSession):
+    """Emotions, counts and update times of all cached rows (for the emotion cube)."""
+    result = await db.execute(select(*_SUMMARY_COLUMNS))
+    return result.all()
+
+
+async def get_rows_updated_before(
+    db: AsyncSession, cutoff: datetime
+) -> list[tuple[int, str, datetime]]:
+    """Year, region name and update time of rows last updated before ``cutoff``."""
+    result = await db.execute(
+        select(RegionData.year, RegionData.region_name, RegionData.updated_at)
+        .where(RegionData.updated_at < cutoff)
+        .order_by(RegionData.updated_at)
+    )
+    return [tuple(row) for row in result]
+
+
+def apply_region_result(
+    db: AsyncSession,
+    cached: RegionData | None,
+    year: int,
+    region_name: str,
+    result: dict,
+    geo_id: str | None = None,
+) -> RegionData:
+    """Write a freshly computed result into a cached row (without committing).
+
+    ``result`` holds ``emotions`` and ``diary_entries``, and ``diary_count``
+    if ``diary_entries`` is only a sample of the entries.
+    """
+    emotions = result["emotions"]
+    diaries = result["diary_entries"]
+    db.info.setdefault("region_years", set()).add(year)
+
+    if cached is None:
+        cached = RegionData(year=year, region_name=region_name, geo_id=geo_id)
+        db.add(cached)
+    elif geo_id is not None:
+        cached.geo_id = geo_id
+
+    cached.fear = emotions["fear"]
+    cached.joy = emotions["joy"]
+    cached.neutral = emotions["neutral"]
+    cached.sadness = emotions["sadness"]
+    cached.diary_count = result.get("diary_count", len(diaries))
+    cached.updated_at = datetime.utcnow()
+    _queue_entries(db, cached, diaries, replace=True)
+    return cached
+
+
+# Region ids per diary entry delete, below SQLite's historical limit of 999 parameters
+_REGION_CHUNK = 500
+
+
+async def upsert_region_results(
+    db: AsyncSession,
+    results: dict[tuple[int, str], dict],
+    geo_ids: dict[str, str | None] | None = None,
+) -> None:
+    """Write freshly computed results of many regions and years (without committing).
+
+    ``results`` is keyed by (year, region name), with values as for
+    ``apply_region_result``. Rows are inserted or updated with ``INSERT ...
+    ON CONFLICT (year, region_name) DO UPDATE`` in one batched statement,
+    without loading them first, so a row a concurrent writer just inserted
+    is updated instead of failing the commit. The conflict target is the
+    unique (year, region_name) index, which ``app.migrations`` adds to
+    databases created without it. A known ``geo_id`` replaces the stored
+    one. Diary entries are replaced on commit.
+    """
+    if not results:
+        return
+
+    geo_ids = geo_ids or {}
+    insert_for_dialect = _dialect_insert(db)
+    if insert_for_dialect is None:
+        # No upsert statement for this database: update rows through the ORM
+        for year in sorted({year for year, _ in results}):
+            cached_rows = await get_region_rows_for_year(db, year)
+            for (row_year, name), result in results.items():
+                if row_year == year:
+                    apply_region_result(
+                        db, cached_rows.get(name), year, name, result, geo_id=geo_ids.get(name)
+                    )
+        return
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "year": year,
+            "region_name": name,
+            "geo_id": geo_ids.get(name),
+            **{key: result["emotions"][key] for key in ("fear", "joy", "neutral", "sadness")},
+            "diary_count": result.get("diary_count", len(result["diary_entries"])),
+            "updated_at": now,
+        }
+        for (year, name), result in results.items()
+    ]
+    db.info.setdefault("region_years", set()).update(year for year, _ in results)
+
+    stmt = insert_for_dialect(RegionData)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RegionData.year, RegionData.region_name],
+        set_={
+            "geo_id": func.coalesce(stmt.excluded.geo_id, RegionData.geo_id),
+            "fear": stmt.excluded.fear,
+            "joy": stmt.excluded.joy,
+            "neutral": stmt.excluded.neutral,
+            "sadness": stmt.excluded.sadness,
+            "diary_count": stmt.excluded.diary_count,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    ).returning(RegionData.id, *_SUMMARY_COLUMNS)
+    # Executed with many parameter sets, the rows are sent as batched VALUES
+    connection = await db.connection()
+    for row in await connection.execute(stmt, rows):
+        entries = results[(row.year, row.region_name)]["diary_entries"]
+        _queue_entries(db, row, entries, replace=True)
+
+
+def merge_region_entries(
+    db: AsyncSession,
+    cached: RegionData,
+    entries: list[dict],
+    aggregator: EmotionAggregator,
+) -> RegionData:
+    """Append diary entries to a cached row (without committing).
+
+    ``aggregator`` is the row's ``emotion_aggregator()`` with the new
+    entries already added.
+    """
+    emotions = aggregator.result()
+    db.info.setdefault("region_years", set()).add(cached.year)
+
+    cached.fear = emotions["fear"]
+    cached.joy = emotions["joy"]
+    cached.neutral = emotions["neutral"]
+    cached.sadness = emotions["sadness"]
+    cached.diary_count = aggregator.count
+    _queue_entries(db, cached, entries, replace=False)
+    return cached
+
+
+def _queue_entries(db: AsyncSession, row, entries: list[dict], replace: bool) -> None:
+    # New ORM rows have no id before the flush, so entries are written on
+    # commit; upserted rows are result rows with the same attributes
+    db.info.setdefault("region_entries", []).append((row, entries, replace))
+
+
+async def _write_entries(db: AsyncSession, queued: list) -> None:
+    """Write queued diary entries, keeping at most diary_sample_size per row.
+
+    Replaced entries are deleted and new ones inserted in bulk for all rows.
+    """
+    if not queued:
+        return
+
+    await db.flush()
+    replaced = [row.id for row, _, replace in queued if replace]
+    for i in range(0, len(replaced), _REGION_CHUNK):
+        await db.execute(
+            delete(RegionDiaryEntry).where(
+                RegionDiaryEntry.region_id.in_(replaced[i:i + _REGION_CHUNK])
+            )
+        )
+
+    values = []
+    for row, entries, replace in queued:
+        start = 0 if replace else await count_diary_entries(db, row.id)
+        entries = entries[:max(0, settings.diary_sample_size - start)]
+        values.extend(
+            RegionDiaryEntry.values_from_dict(row.id, start + i, entry)
+            for i, entry in enumerate(entries)
+        )
+    if values:
+        await db.execute(insert(RegionDiaryEntry), values)
+
+
+async def commit_region_results(db: AsyncSession) -> bool:
+    """Commit pending region writes in one transaction.
+
+    Returns False if a concurrent writer inserted the same (year, region)
+    first; the transaction is rolled back and the other writer's rows win.
+    Serialized map payloads of the written years are invalidated and the
+    written rows are copied into the emotion cube.
+    """
+    years = db.info.pop("region_years", set())
+    queued = db.info.pop("region_entries", [])
+    try:
+        await _write_entries(db, queued)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return False
+    finally:
+        map_payload_cache.invalidate(*years)
+    emotion_cube.update(row for row, _, _ in queued)
+    return True
+
+
+# Rows per query, keeping bound parameters below SQLite's historical limit of 999
+_SENTIMENT_CHUNK = 100
+
+
+async def get_sentiment_scores(
+    db: AsyncSession, engine: str, text_hashes: list[str]
+) -> dict[str, tuple[float, float, float, float]]:
+    """Load memoized scores as (fear, joy, neutral, sadness), keyed by text hash."""
+    scores = {}
+    for i in range(0, len(text_hashes), _SENTIMENT_CHUNK):
+        result = await db.execute(
+            select(SentimentCache).where(
+                SentimentCache.engine == engine,
+                SentimentCache.text_hash.in_(text_hashes[i:i + _SENTIMENT_CHUNK]),
+            )
+        )
+        for row in result.scalars():
+            scores[row.text_hash] = (row.fear, row.joy, row.neutral, row.sadness)
+    return scores
+
+
+async def add_sentiment_scores(
+    db: AsyncSession, engine: str, scores: dict[str, tuple[float, float, float, float]]
+) -> None:
+    """Insert memoized (fear, joy, neutral, sadness) scores (without committing).
+
+    Texts that a concurrent writer stored first are skipped, so the
+    transaction never has to be rolled back for them.
+    """
+    if not scores:
+        return
+
+    rows = [
+        {
+            "text_hash": text_hash,
+            "engine": engine,
+            "fear": fear,
+            "joy": joy,
+            "neutral": neutral,
+            "sadness": sadness,
+            "created_at": datetime.utcnow(),
+        }
+        for text_hash, (fear, joy, neutral, sadness) in scores.items()
+    ]
+    insert_for_dialect = _dialect_insert(db)
+    if insert_for_dialect is None:
+        db.add_all(SentimentCache(**row) for row in rows)
+        return
+
+    for i in range(0, len(rows), _SENTIMENT_CHUNK):
+        await db.execute(
+            insert_for_dialect(SentimentCache)
+            .values(rows[i:i + _SENTIMENT_CHUNK])
+            .on_conflict_do_nothing()
+        )
+
+
+def _dialect_insert(db: AsyncSession):
+    """The ``insert`` with ``ON CONFLICT`` support for the session's database, if any."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert
@@ -2,5 +2,6 @@
 
 from app.routers.map import router as map_router
 from app.routers.health import router as health_router
+from app.routers.geo import router as geo_router
 
-__all__ = ["map_router", "health_router"]
+__all__ = ["map_router", "health_router", "geo_router"]
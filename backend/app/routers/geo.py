@@ -0,0 +1,105 @@
+"""Region geometry endpoints."""
+
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Path, Query, Request, Response
+
+from app.schemas import GeoLevelInfo, GeoManifestResponse
+from app.utils import GEO_LEVELS, GeoAsset, etag_matches, geo_asset_store, level_for_zoom
+
+router = APIRouter(tags=["geo"])
+
+DEFAULT_LEVEL = "medium"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+TILE_CACHE_CONTROL = "public, max-age=86400"
+
+
+def _asset_response(request: Request, asset: GeoAsset, version: str | None) -> Response:
+    """Serve a pre-compressed asset, answering 304 if the client has it."""
+    headers = {
+        "ETag": asset.etag,
+        "Vary": "Accept-Encoding",
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if version == asset.version else "public, no-cache",
+    }
+    if etag_matches(request.headers.get("if-none-match"), asset.etag):
+        return Response(status_code=304, headers=headers)
+
+    body, encoding = asset.encoded(request.headers.get("accept-encoding"))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    media_type = "application/json" if asset.format == "topojson" else "application/geo+json"
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def _pick_level(level: str | None, zoom: int | None) -> str:
+    if level is not None:
+        return level
+    return level_for_zoom(zoom).name if zoom is not None else DEFAULT_LEVEL
+
+
+@router.get("/api/geo/manifest", response_model=GeoManifestResponse)
+async def get_geo_manifest() -> GeoManifestResponse:
+    """Available detail levels with their versioned, immutable URLs."""
+    levels = {}
+    for level in GEO_LEVELS.values():
+        geojson = await asyncio.to_thread(geo_asset_store.get, level.name)
+        topojson = await asyncio.to_thread(geo_asset_store.get, level.name, "topojson")
+        levels[level.name] = GeoLevelInfo(
+            max_zoom=level.max_zoom,
+            tolerance=level.tolerance,
+            size=len(geojson.body),
+            url=f"/api/geo/regions?level={level.name}&v={geojson.version}",
+            topojson_size=len(topojson.body),
+            topojson_url=f"/api/geo/topology?level={level.name}&v={topojson.version}",
+        )
+    return GeoManifestResponse(
+        default_level=DEFAULT_LEVEL,
+        levels=levels,
+        tiles="/api/geo/tiles/{z}/{x}/{y}.mvt",
+    )
+
+
+@router.get("/api/geo/regions")
+async def get_region_geometry(
+    request: Request,
+    level: str | None = Query(None, pattern="^(low|medium|high)$", description="Detail level"),
+    zoom: int | None = Query(None, ge=0, le=22, description="Map zoom to pick a level for"),
+    v: str | None = Query(None, description="Content version from the manifest"),
+) -> Response:
+    """
+    Simplified region geometries as GeoJSON.
+
+    Bodies are pre-compressed (brotli or gzip, by Accept-Encoding). When the
+    requested version matches the content, the response is cacheable forever.
+    """
+    asset = await asyncio.to_thread(geo_asset_store.get, _pick_level(level, zoom))
+    return _asset_response(request, asset, v)
+
+
+@router.get("/api/geo/topology")
+async def get_region_topology(
+    request: Request,
+    level: str | None = Query(None, pattern="^(low|medium|high)$", description="Detail level"),
+    zoom: int | None = Query(None, ge=0, le=22, description="Map zoom to pick a level for"),
+    v: str | None = Query(None, description="Content version from the manifest"),
+) -> Response:
+    """Region geometries as TopoJSON with shared, delta-encoded arcs."""
+    asset = await asyncio.to_thread(geo_asset_store.get, _pick_level(level, zoom), "topojson")
+    return _asset_response(request, asset, v)
+
+
+@router.get("/api/geo/tiles/{z}/{x}/{y}.mvt")
+async def get_region_tile(
+    z: int = Path(ge=0, le=14, description="Zoom"),
+    x: int = Path(ge=0, description="Tile column"),
+    y: int = Path(ge=0, description="Tile row"),
+) -> Response:
+    """Mapbox Vector Tile with the ``regions`` layer; 204 if the tile is empty."""
+    if x >= 2 ** z or y >= 2 ** z:
+        raise HTTPException(status_code=404, detail="Tile out of range")
+
+    tile = await asyncio.to_thread(geo_asset_store.tile, z, x, y)
+    headers = {"Cache-Control": TILE_CACHE_CONTROL}
+    if not tile:
+        return Response(status_code=204, headers=headers)
+    return Response(content=tile, media_type="application/vnd.mapbox-vector-tile", headers=headers)
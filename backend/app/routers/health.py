@@ -1,9 +1,16 @@
-"""Health check endpoint."""
+"""Health check and metrics endpoints."""
 
 from fastapi import APIRouter
 
 from app.config import settings
-from app.schemas import HealthResponse
+from app.schemas import HealthResponse, MetricsResponse
+from app.services import (
+    ml_service,
+    refresh_scheduler,
+    region_refresh_service,
+    scraper_service,
+)
+from app.utils import emotion_cube, map_payload_cache
 
 router = APIRouter(tags=["health"])
 
@@ -15,3 +22,22 @@ async def health_check() -> HealthResponse:
         status="ok",
         version=settings.api_version,
     )
+
+
+@router.get("/api/metrics", response_model=MetricsResponse)
+async def metrics() -> MetricsResponse:
+    """
+    In-process counters of this worker, reset on restart.
+
+    Covers region refreshes, materialized map payloads, the emotion cube,
+    sentiment analysis and its memo, outbound scraping (retries, HTTP
+    cache) and the background renewal scheduler.
+    """
+    return MetricsResponse(
+        refresh=region_refresh_service.stats(),
+        map_payloads=map_payload_cache.stats(),
+        emotion_cube=emotion_cube.stats(),
+        ml=ml_service.stats(),
+        scraper=scraper_service.stats(),
+        scheduler=refresh_scheduler.stats(),
+    )
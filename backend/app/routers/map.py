@@ -1,178 +1,381 @@
 """Map data endpoints."""
 
-from datetime import datetime
+import asyncio
+import json
+import math
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Depends, Query, Path
-from sqlalchemy import select
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.config import settings
-from app.database import get_db
+from app.config import MAX_YEAR, MIN_YEAR, settings
+from app.database import get_read_db
 from app.models import RegionData
-from app.schemas import MapResponse, RegionDetailResponse
-from app.services import ml_service, scraper_service
-from app.utils import get_regions_from_geojson
+from app.repository import (
+    count_diary_entries,
+    get_diary_entries,
+    get_region_row,
+    get_region_rows_for_year,
+    get_region_rows_for_years,
+)
+from app.schemas import MapResponse, RegionDetailResponse, RegionTimelineResponse
+from app.services import population_service, refresh_scheduler, region_refresh_service
+from app.services.region_refresh import EXPIRED, STALE, cache_state
+from app.utils import (
+    EMOTIONS,
+    CachedPayload,
+    CubeCell,
+    Region,
+    emotion_cube,
+    etag_matches,
+    get_region_registry,
+    map_payload_cache,
+    rolling_mean,
+    year_deltas,
+)
 
 router = APIRouter(tags=["map"])
 
+EMOTION_KEYS = ("fear", "joy", "neutral", "sadness")
+DEFAULT_EMOTIONS = {"fear": 0.0, "joy": 0.0, "neutral": 1.0, "sadness": 0.0}
+
+
+def _payload_response(request: Request, payload: CachedPayload) -> Response:
+    """Serve a serialized payload, answering 304 if the client has it."""
+    headers = {
+        "ETag": payload.etag,
+        "Cache-Control": f"public, max-age={settings.map_cache_max_age}",
+    }
+    if etag_matches(request.headers.get("if-none-match"), payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
+def _split_by_cache_state(
+    regions: tuple[Region, ...], cached_rows: dict[str, RegionData | CubeCell], now: datetime
+) -> tuple[list[str], list[str]]:
+    """Split region names into stale and expired (or missing) ones."""
+    stale = []
+    expired = []
+    for region in regions:
+        state = cache_state(cached_rows.get(region.name), now)
+        if state == STALE:
+            stale.append(region.name)
+        elif state == EXPIRED:
+            expired.append(region.name)
+    return stale, expired
+
+
+def _region_response(
+    region: Region, cached: RegionData | CubeCell | None, result: dict | None
+) -> dict:
+    """Map entry for a region from a fresh result, its cached row or defaults."""
+    if result and result["diary_entries"]:
+        return {
+            "name": region.name,
+            "geo_id": region.geo_id,
+            "emotions": result["emotions"],
+            # The entries are only the stored sample
+            "diary_count": result.get("diary_count", len(result["diary_entries"])),
+        }
+    if cached:
+        # Still valid, failed to refresh or no new data available
+        return cached.to_dict()
+    return {
+        "name": region.name,
+        "geo_id": region.geo_id,
+        "emotions": dict(DEFAULT_EMOTIONS),
+        "diary_count": 0,
+    }
+
+
+@router.get("/api/map", response_class=StreamingResponse)
+async def get_map_range(
+    from_year: int = Query(alias="from", ge=MIN_YEAR, le=MAX_YEAR, description="First year"),
+    to_year: int = Query(alias="to", ge=MIN_YEAR, le=MAX_YEAR, description="Last year"),
+    db: AsyncSession = Depends(get_read_db),
+) -> StreamingResponse:
+    """
+    Region emotions for a range of years as newline-delimited JSON.
+
+    The first line lists the regions and the value fields; every following
+    line is ``{"year": ..., "values": [[fear, joy, neutral, sadness,
+    diary_count], ...]}`` in region order. Cached years are streamed first,
+    years that need a refresh follow as soon as they are computed.
+    """
+    if from_year > to_year:
+        raise HTTPException(status_code=422, detail="'from' must not be after 'to'")
+    refresh_scheduler.record_access(*range(from_year, to_year + 1))
+
+    regions = get_region_registry().regions
+    now = datetime.utcnow()
+    rows = emotion_cube.rows_for_years(from_year, to_year)
+    if any(
+        _split_by_cache_state(regions, rows.get(year, {}), now)[1]
+        for year in range(from_year, to_year + 1)
+    ):
+        # Rows written by another process are missing from the cube
+        rows = await get_region_rows_for_years(db, from_year, to_year)
+        emotion_cube.update(row for year_rows in rows.values() for row in year_rows.values())
+        # Return the connection (and end its read snapshot) before streaming
+        await db.close()
+
+    return StreamingResponse(
+        _stream_map_range(regions, rows, from_year, to_year),
+        media_type="application/x-ndjson",
+    )
+
+
+def _ndjson(data: dict) -> bytes:
+    return (json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n").encode()
+
+
+def _range_line(
+    year: int,
+    regions: tuple[Region, ...],
+    cached_rows: dict[str, RegionData | CubeCell],
+    results: dict[str, dict],
+) -> bytes:
+    values = []
+    for region in regions:
+        entry = _region_response(region, cached_rows.get(region.name), results.get(region.name))
+        emotions = entry["emotions"]
+        values.append([round(emotions[key], 4) for key in EMOTION_KEYS] + [entry["diary_count"]])
+    return _ndjson({"year": year, "values": values})
+
+
+async def _stream_map_range(
+    regions: tuple[Region, ...],
+    rows: dict[int, dict[str, RegionData | CubeCell]],
+    from_year: int,
+    to_year: int,
+) -> AsyncIterator[bytes]:
+    yield _ndjson({
+        "from": from_year,
+        "to": to_year,
+        "regions": [{"name": region.name, "geo_id": region.geo_id} for region in regions],
+        "fields": [*EMOTION_KEYS, "diary_count"],
+    })
+
+    now = datetime.utcnow()
+    pending: dict[int, list[str]] = {}
+    for year in range(from_year, to_year + 1):
+        year_rows = rows.get(year, {})
+        stale, expired = _split_by_cache_state(regions, year_rows, now)
+        if stale:
+            region_refresh_service.schedule_refresh(stale, year)
+        if expired:
+            pending[year] = expired
+        else:
+            yield _range_line(year, regions, year_rows, {})
+
+    if not pending:
+        return
+
+    semaphore = asyncio.Semaphore(max(1, settings.map_range_concurrency))
+
+    async def refresh_year(year: int) -> tuple[int, dict[str, dict]]:
+        async with semaphore:
+            results = await region_refresh_service.refresh_regions(pending[year], year)
+            await region_refresh_service.store_results(year, results)
+            return year, results
+
+    tasks = [asyncio.create_task(refresh_year(year)) for year in pending]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            year, results = await next_done
+            yield _range_line(year, regions, rows.get(year, {}), results)
+    finally:
+        for task in tasks:
+            task.cancel()
+
 
 @router.get("/api/map/{year}", response_model=MapResponse)
 async def get_map_data(
-    year: int = Path(ge=1920, le=1991, description="Year to display"),
-    db: AsyncSession = Depends(get_db),
-) -> MapResponse:
+    request: Request,
+    year: int = Path(ge=MIN_YEAR, le=MAX_YEAR, description="Year to display"),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
+    refresh_scheduler.record_access(year)
 
-    regions = get_regions_from_geojson()
-    region_responses = []
+    payload = map_payload_cache.get(year)
+    if payload is None:
+        payload = await _build_map_payload(db, year)
+    return _payload_response(request, payload)
 
+
+async def _build_map_payload(db: AsyncSession, year: int) -> CachedPayload:
+    """Build the map response for a year, caching it when fully fresh."""
+    regions = get_region_registry().regions
+    now = datetime.utcnow()
+    # Writes committed while this builds make the payload outdated
+    generation = map_payload_cache.generation(year)
+    cached_rows = emotion_cube.rows_for_year(year)
+    stale, expired = _split_by_cache_state(regions, cached_rows, now)
+    if expired:
+        # Expired rows are updated in place, and rows written by another
+        # process are missing from the cube: load them from the database
+        cached_rows = await get_region_rows_for_year(db, year)
+        # Return the connection (and end its read snapshot) before refreshing;
+        # closing detaches the loaded rows without expiring them
+        await db.close()
+        emotion_cube.update(cached_rows.values())
+        stale, expired = _split_by_cache_state(regions, cached_rows, now)
+
+    # Serve stale rows while they refresh in the background; refresh
+    # every missing or expired region concurrently before responding
+    if stale:
+        region_refresh_service.schedule_refresh(stale, year)
+
+    fresh = await region_refresh_service.refresh_regions(expired, year) if expired else {}
+    failed = [name for name in expired if name not in fresh]
+
+    region_responses = []
+    # The payload is valid until the oldest row it is built from expires
+    expires_at = now + timedelta(seconds=settings.cache_ttl)
     for region in regions:
-        # Try to get cached data
-        stmt = select(RegionData).where(
-            RegionData.year == year,
-            RegionData.region_name == region["name"],
-        )
-        result = await db.execute(stmt)
-        cached = result.scalar_one_or_none()
-
-        if cached:
-            # Check if cache is still valid
-            cache_age = (datetime.utcnow() - cached.updated_at).total_seconds()
-            if cache_age < settings.cache_ttl:
-                region_responses.append(cached.to_dict())
-                continue
-
-        # Fetch fresh data
-        diaries = await scraper_service.fetch_diaries_for_region_year(region["name"], year)
-
-        if diaries:
-            # Analyze emotions
-            emotions_list = [
-                ml_service.analyze_sentiment(entry["text"]) for entry in diaries
-            ]
-            aggregated = ml_service.aggregate_emotions(emotions_list)
-
-            # Get stats
-            stats = await scraper_service.get_population_stats(region["name"], year)
-
-            # Update or create cache
-            if cached:
-                cached.fear = aggregated["fear"]
-                cached.joy = aggregated["joy"]
-                cached.neutral = aggregated["neutral"]
-                cached.sadness = aggregated["sadness"]
-                cached.diary_count = len(diaries)
-                cached.diary_entries = diaries
-                cached.stats = stats
-                cached.updated_at = datetime.utcnow()
-            else:
-                cached = RegionData(
-                    year=year,
-                    region_name=region["name"],
-                    geo_id=region.get("geo_id"),
-                    fear=aggregated["fear"],
-                    joy=aggregated["joy"],
-                    neutral=aggregated["neutral"],
-                    sadness=aggregated["sadness"],
-                    diary_count=len(diaries),
-                    diary_entries=diaries,
-                    stats=stats,
-                )
-                db.add(cached)
-
-            await db.commit()
-
-            region_responses.append({
-                "name": region["name"],
-                "geo_id": region.get("geo_id"),
-                "emotions": aggregated,
-                "diary_count": len(diaries),
-            })
-        else:
-            # No data available
-            if cached:
-                region_responses.append(cached.to_dict())
-            else:
-                region_responses.append({
-                    "name": region["name"],
-                    "geo_id": region.get("geo_id"),
-                    "emotions": {"fear": 0.0, "joy": 0.0, "neutral": 1.0, "sadness": 0.0},
-                    "diary_count": 0,
-                })
+        cached = cached_rows.get(region.name)
+        result = fresh.get(region.name)
+
+        if cached and region.name not in fresh:
+            expires_at = min(
+                expires_at, cached.updated_at + timedelta(seconds=settings.cache_ttl)
+            )
+        region_responses.append(_region_response(region, cached, result))
 
-    return MapResponse(year=year, regions=region_responses)
+    outdated = map_payload_cache.generation(year) != generation
+    if fresh:
+        # Written through the write engine; this request only reads
+        await region_refresh_service.store_results(year, fresh)
+        # That write invalidates the year too, but the payload includes it
+        generation = map_payload_cache.generation(year)
+
+    response = MapResponse(year=year, regions=region_responses, failed_regions=failed)
+    payload = CachedPayload.from_body(response.model_dump_json().encode(), expires_at)
+
+    # Stale, partial or outdated responses are not materialized
+    if not stale and not failed and not outdated:
+        map_payload_cache.put(year, payload, generation)
+    return payload
+
+
+def _series(values) -> list[float | None]:
+    """Rounded values of a series, with missing years as None."""
+    return [None if math.isnan(value) else round(value, 4) for value in values.tolist()]
+
+
+# Declared before /api/region/{year}/{region_name}, which would match it too
+@router.get("/api/region/{region_name}/timeline", response_model=RegionTimelineResponse)
+async def get_region_timeline(
+    region_name: str = Path(description="Region name"),
+    from_year: int = Query(MIN_YEAR, alias="from", ge=MIN_YEAR, le=MAX_YEAR),
+    to_year: int = Query(MAX_YEAR, alias="to", ge=MIN_YEAR, le=MAX_YEAR),
+    window: int = Query(1, ge=1, le=21, description="Rolling mean window in years"),
+    deltas: bool = Query(False, description="Include year-over-year changes"),
+) -> RegionTimelineResponse:
+    """
+    Emotions, diary counts and population of a region year by year.
+
+    Read from the emotion cube and the population table in vectorized
+    slices, without querying the database or triggering any refresh:
+    emotions of years without cached data are null.
+    """
+    if from_year > to_year:
+        raise HTTPException(status_code=422, detail="'from' must not be after 'to'")
+
+    region = get_region_registry().get_by_name(region_name)
+    name = region.name if region else region_name
+    years, scores, counts = emotion_cube.region_series(name, from_year, to_year)
+    if region is None and np.isnan(scores).all():
+        raise HTTPException(status_code=404, detail=f"Unknown region: {region_name}")
+
+    smoothed = rolling_mean(scores, window)
+
+    return RegionTimelineResponse(
+        name=name,
+        geo_id=region.geo_id if region else None,
+        years=years.tolist(),
+        window=window,
+        emotions={key: _series(smoothed[:, i]) for i, key in enumerate(EMOTIONS)},
+        diary_count=counts.tolist(),
+        population=population_service.populations(name, from_year, to_year).tolist(),
+        deltas=(
+            {key: _series(change) for key, change in zip(EMOTIONS, year_deltas(smoothed).T)}
+            if deltas
+            else None
+        ),
+    )
 
 
 @router.get("/api/region/{year}/{region_name}", response_model=RegionDetailResponse)
 async def get_region_detail(
-    year: int = Path(ge=1920, le=1991, description="Year to display"),
+    year: int = Path(ge=MIN_YEAR, le=MAX_YEAR, description="Year to display"),
     region_name: str = Path(description="Region name"),
-    db: AsyncSession = Depends(get_db),
+    offset: int = Query(0, ge=0, description="First diary entry to return"),
+    limit: int = Query(20, ge=1, le=100, description="Diary entries to return"),
+    db: AsyncSession = Depends(get_read_db),
 ) -> RegionDetailResponse:
+    region = get_region_registry().get_by_name(region_name)
+    if region is None:
+        raise HTTPException(status_code=404, detail=f"Unknown region: {region_name}")
+    # Rows, refreshes and cube columns are keyed by the canonical name
+    region_name = region.name
+    refresh_scheduler.record_access(year)
 
     # Get cached data
-    stmt = select(RegionData).where(
-        RegionData.year == year,
-        RegionData.region_name == region_name,
-    )
-    result = await db.execute(stmt)
-    cached = result.scalar_one_or_none()
+    cached = await get_region_row(db, year, region_name)
 
-    if cached:
-        cache_age = (datetime.utcnow() - cached.updated_at).total_seconds()
-        if cache_age < settings.cache_ttl:
-            return RegionDetailResponse(
-                name=cached.region_name,
-                year=cached.year,
-                emotions={
-                    "fear": cached.fear,
-                    "joy": cached.joy,
-                    "neutral": cached.neutral,
-                    "sadness": cached.sadness,
-                },
-                diary_entries=cached.diary_entries or [],
-                stats=cached.stats or {
-                    "population": 0,
-                    "change_percent": 0.0,
-                    "year": year,
-                },
-            )
+    state = cache_state(cached)
+    if state != EXPIRED:
+        if state == STALE:
+            region_refresh_service.schedule_refresh([region_name], year)
+        return await _cached_region_detail(db, cached, offset, limit)
 
-    # Fetch fresh data
-    diaries = await scraper_service.fetch_diaries_for_region_year(region_name, year)
-    emotions_list = [ml_service.analyze_sentiment(entry["text"]) for entry in diaries]
-    aggregated = ml_service.aggregate_emotions(emotions_list)
-    stats = await scraper_service.get_population_stats(region_name, year)
+    # Fetch fresh data, without holding a read connection meanwhile
+    await db.close()
+    try:
+        result = await region_refresh_service.compute_region(region_name, year)
+    except Exception as exc:
+        if cached is None:
+            raise HTTPException(
+                status_code=503, detail=f"Could not load {region_name} ({year})"
+            ) from exc
+        # Serve the expired row rather than nothing
+        return await _cached_region_detail(db, cached, offset, limit)
 
-    # Update cache
-    if cached:
-        cached.fear = aggregated["fear"]
-        cached.joy = aggregated["joy"]
-        cached.neutral = aggregated["neutral"]
-        cached.sadness = aggregated["sadness"]
-        cached.diary_count = len(diaries)
-        cached.diary_entries = diaries
-        cached.stats = stats
-        cached.updated_at = datetime.utcnow()
-    else:
-        cached = RegionData(
-            year=year,
-            region_name=region_name,
-            fear=aggregated["fear"],
-            joy=aggregated["joy"],
-            neutral=aggregated["neutral"],
-            sadness=aggregated["sadness"],
-            diary_count=len(diaries),
-            diary_entries=diaries,
-            stats=stats,
-        )
-        db.add(cached)
-
-    await db.commit()
+    # Update cache, also without entries so the next request does not scrape again
+    await region_refresh_service.store_results(year, {region_name: result}, keep_empty=True)
 
+    entries = result["diary_entries"][:settings.diary_sample_size]
     return RegionDetailResponse(
         name=region_name,
         year=year,
-        emotions=aggregated,
-        diary_entries=diaries,
-        stats=stats,
+        emotions=result["emotions"],
+        diary_entries=entries[offset:offset + limit],
+        diary_count=result.get("diary_count", len(entries)),
+        entries_total=len(entries),
+        stats=population_service.get_stats(region_name, year),
+    )
+
+
+async def _cached_region_detail(
+    db: AsyncSession, cached: RegionData, offset: int, limit: int
+) -> RegionDetailResponse:
+    """Region detail from a cached row and a page of its stored entries."""
+    return RegionDetailResponse(
+        name=cached.region_name,
+        year=cached.year,
+        emotions={
+            "fear": cached.fear,
+            "joy": cached.joy,
+            "neutral": cached.neutral,
+            "sadness": cached.sadness,
+        },
+        diary_entries=await get_diary_entries(db, cached.id, offset, limit),
+        diary_count=cached.diary_count,
+        entries_total=await count_diary_entries(db, cached.id),
+        stats=population_service.get_stats(cached.region_name, cached.year),
     )
@@ -26,6 +26,10 @@ class MapResponse(BaseModel):
 
     year: int = Field(description="Selected year")
     regions: list[RegionDataResponse] = Field(description="List of regions with emotion data")
+    failed_regions: list[str] = Field(
+        default_factory=list,
+        description="Regions whose refresh failed; served from stale cache or defaults",
+    )
 
 
 class DiaryEntry(BaseModel):
@@ -51,12 +55,61 @@ class RegionDetailResponse(BaseModel):
     name: str = Field(description="Region name")
     year: int = Field(description="Selected year")
     emotions: EmotionResponse = Field(description="Emotion scores")
-    diary_entries: list[DiaryEntry] = Field(description="Diary entries")
+    diary_entries: list[DiaryEntry] = Field(description="Page of the stored diary entries")
+    diary_count: int = Field(0, ge=0, description="Number of analyzed diary entries")
+    entries_total: int = Field(0, ge=0, description="Stored diary entries available for paging")
     stats: StatsResponse = Field(description="Population statistics")
 
 
+class RegionTimelineResponse(BaseModel):
+    """Per-year series of a region, one list element per year."""
+
+    name: str = Field(description="Region name")
+    geo_id: str | None = Field(None, description="GeoJSON feature ID")
+    years: list[int] = Field(description="Years of the series")
+    window: int = Field(description="Centered rolling mean window in years (1: raw values)")
+    emotions: dict[str, list[float | None]] = Field(
+        description="Scores by emotion; null for years without cached data"
+    )
+    diary_count: list[int] = Field(description="Number of diary entries per year")
+    population: list[int] = Field(description="Population per year")
+    deltas: dict[str, list[float | None]] | None = Field(
+        None, description="Change of each (smoothed) score from the previous year"
+    )
+
+
 class HealthResponse(BaseModel):
     """Health check response."""
 
     status: str = Field(description="Service status")
     version: str = Field(description="API version")
+
+
+class GeoLevelInfo(BaseModel):
+    """A geometry detail level."""
+
+    max_zoom: int = Field(description="Highest map zoom the level is meant for")
+    tolerance: float = Field(description="Simplification tolerance in degrees")
+    size: int = Field(ge=0, description="Uncompressed size in bytes")
+    url: str = Field(description="Versioned URL of the level")
+    topojson_size: int = Field(ge=0, description="Uncompressed TopoJSON size in bytes")
+    topojson_url: str = Field(description="Versioned URL of the level as TopoJSON")
+
+
+class GeoManifestResponse(BaseModel):
+    """Available geometry detail levels."""
+
+    default_level: str = Field(description="Level used when none is requested")
+    levels: dict[str, GeoLevelInfo] = Field(description="Levels by name, coarsest first")
+    tiles: str = Field(description="Vector tile URL template")
+
+
+class MetricsResponse(BaseModel):
+    """In-process cache and refresh counters."""
+
+    refresh: dict[str, int] = Field(description="Region refresh and coalescing counters")
+    map_payloads: dict[str, int] = Field(description="Serialized map response cache counters")
+    emotion_cube: dict[str, int] = Field(description="In-memory emotion matrix size")
+    ml: dict[str, int] = Field(description="Sentiment worker pool counters")
+    scraper: dict[str, int] = Field(description="Outbound request retry and cache counters")
+    scheduler: dict[str, int] = Field(description="Background renewal scan counters")
@@ -1,6 +1,20 @@
 """Services for ML and scraping."""
 
 from app.services.ml_service import MLService, ml_service
+from app.services.population import PopulationService, population_service
 from app.services.scraper import ScraperService, scraper_service
+from app.services.region_refresh import RegionRefreshService, region_refresh_service
+from app.services.refresh_scheduler import RefreshScheduler, refresh_scheduler
 
-__all__ = ["MLService", "ScraperService", "ml_service", "scraper_service"]
+__all__ = [
+    "MLService",
+    "PopulationService",
+    "RefreshScheduler",
+    "RegionRefreshService",
+    "ScraperService",
+    "ml_service",
+    "population_service",
+    "refresh_scheduler",
+    "region_refresh_service",
+    "scraper_service",
+]
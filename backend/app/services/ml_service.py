@@ -1,13 +1,38 @@
 """ML service for sentiment analysis of Russian text."""
 
+import asyncio
+import hashlib
+import logging
 import re
-from typing import Optional
+import unicodedata
+from contextlib import asynccontextmanager
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+from sqlalchemy.exc import SQLAlchemyError
 
 from app.config import settings
+from app.database import async_session_maker
+from app.repository import add_sentiment_scores, get_sentiment_scores
+from app.utils import EMOTIONS, EmotionAggregator, LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def text_hash(text: str) -> str:
+    """Content hash of a text after Unicode and whitespace normalization."""
+    normalized = " ".join(unicodedata.normalize("NFC", text).split())
+    return hashlib.sha256(normalized.encode()).hexdigest()
 
 
 class MLService:
-    """Service for sentiment analysis using rule-based approach."""
+    """Service for sentiment analysis.
+
+    The synchronous methods always use the keyword rules. The async API
+    runs off the event loop and uses the engine selected by
+    ``settings.ml_engine``: "rules" or "transformer" (see sentiment_model).
+    """
 
     _instance: Optional["MLService"] = None
 
@@ -17,6 +42,11 @@ class MLService:
         return cls._instance
 
     def __init__(self):
+        # __init__ runs on every MLService() call; keep the worker pool
+        if getattr(self, "_initialized", False):
+            return
+        self._initialized = True
+
         # Define emotion keywords for Russian language
         self._fear_keywords = [
             "страх", "боюсь", "пугаю", "ужас", "кошмар", "тревога", "боязнь",
@@ -45,6 +75,49 @@ class MLService:
             "|".join(self._sadness_keywords), re.IGNORECASE
         )
 
+        # Single pattern for batch scans: one named group per emotion plus
+        # a separator group marking text boundaries in a joined batch
+        self._batch_pattern = re.compile(
+            "|".join([
+                f"(?P<fear>{'|'.join(self._fear_keywords)})",
+                f"(?P<joy>{'|'.join(self._joy_keywords)})",
+                f"(?P<sadness>{'|'.join(self._sadness_keywords)})",
+                "(?P<sep>\x00)",
+            ]),
+            re.IGNORECASE,
+        )
+        # Group number -> score column (the separator maps to -1)
+        self._group_columns = np.full(self._batch_pattern.groups + 1, -1, dtype=np.intp)
+        for name, group in self._batch_pattern.groupindex.items():
+            if name != "sep":
+                self._group_columns[group] = EMOTIONS.index(name)
+        self._sep_group = self._batch_pattern.groupindex["sep"]
+
+        # Worker pool for the async API, created on first use
+        self._executor: Executor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._slots_loop: asyncio.AbstractEventLoop | None = None
+        self._running = 0
+        self._waiting = 0
+        self._batches = 0
+
+        # Transformer engine (settings.ml_engine), loaded on first use
+        self._engine = None
+        self._engine_failed = False
+        self._batcher = None
+        self._batcher_loop: asyncio.AbstractEventLoop | None = None
+        self._model_executor: Executor | None = None
+
+        # Per-text results of the async API by (engine id, text hash),
+        # backed by the sentiment_cache table
+        self.session_factory = async_session_maker
+        self._memo = LRUCache(settings.ml_cache_size)
+        self._store_hits = 0
+        self._computed = 0
+        self._rules_version = hashlib.sha256(
+            "|".join([self._batch_pattern.pattern, *EMOTIONS]).encode()
+        ).hexdigest()[:8]
+
     def analyze_sentiment(self, text: str) -> dict:
         """
         Analyze sentiment of a single text using rule-based approach.
@@ -81,27 +154,293 @@ class MLService:
 
         return emotions
 
+    def score_batch(self, texts: list[str]) -> np.ndarray:
+        """
+        Score many texts in one regex scan.
+
+        Texts are joined with NUL separators (NULs inside a text become
+        spaces) and scanned once with a combined pattern. Keyword counts
+        go straight into an array of shape (len(texts), 4) in ``EMOTIONS``
+        order, which is then normalized per row. Texts without keywords score as neutral.
+        """
+        counts = np.zeros((len(texts), len(EMOTIONS)))
+        if not texts:
+            return counts
+
+        # NULs inside a text would shift every following row
+        joined = "\x00".join(text.replace("\x00", " ") for text in texts)
+        groups = np.fromiter(
+            (m.lastindex for m in self._batch_pattern.finditer(joined.lower())),
+            dtype=np.intp,
+        )
+        is_sep = groups == self._sep_group
+        rows = np.cumsum(is_sep)[~is_sep]
+        np.add.at(counts, (rows, self._group_columns[groups[~is_sep]]), 1.0)
+
+        totals = counts.sum(axis=1)
+        matched = totals > 0
+        counts[matched] /= totals[matched, None]
+        counts[~matched, EMOTIONS.index("neutral")] = 1.0
+        return counts
+
     def analyze_batch(self, texts: list[str]) -> list[dict]:
         """Analyze sentiment for multiple texts."""
-        return [self.analyze_sentiment(text) for text in texts]
+        return [dict(zip(EMOTIONS, row)) for row in self.score_batch(texts).tolist()]
+
+    def aggregate_scores(self, scores: np.ndarray) -> dict:
+        """Aggregate a score array from ``score_batch`` into an average."""
+        return EmotionAggregator().add_scores(scores).result()
+
+    def aggregate_batch(self, texts: list[str]) -> dict:
+        """Score texts in one batch and aggregate them into an average."""
+        return self.aggregate_scores(self.score_batch(texts))
 
     def aggregate_emotions(self, emotion_list: list[dict]) -> dict:
         """Aggregate multiple emotion results into average."""
-        if not emotion_list:
-            return {"fear": 0.0, "joy": 0.0, "neutral": 1.0, "sadness": 0.0}
+        aggregator = EmotionAggregator()
+        for emotions in emotion_list:
+            aggregator.add(emotions)
+        return aggregator.result()
 
-        aggregated = {"fear": 0.0, "joy": 0.0, "neutral": 0.0, "sadness": 0.0}
+    # --- async API ---------------------------------------------------------
 
-        for emotions in emotion_list:
-            for key, value in emotions.items():
-                aggregated[key] += value
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            workers = max(1, settings.ml_workers)
+            if settings.ml_executor == "process":
+                self._executor = ProcessPoolExecutor(max_workers=workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="ml"
+                )
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # A semaphore is bound to one event loop (tests use one loop each)
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(max(1, settings.ml_max_pending))
+            self._slots_loop = loop
+        return self._slots
+
+    @asynccontextmanager
+    async def _slot(self):
+        """Hold one of ``settings.ml_max_pending`` batch slots.
+
+        Callers beyond that wait here, which keeps the worker pool and
+        model batcher queues bounded.
+        """
+        slots = self._get_slots()
+        self._waiting += 1
+        try:
+            await slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._running += 1
+        try:
+            yield
+        finally:
+            self._running -= 1
+            self._batches += 1
+            slots.release()
+
+    async def _submit(self, fn: Callable, texts: list[str]):
+        """Run a batch function in the worker pool."""
+        async with self._slot():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, texts)
+
+    def _get_engine(self):
+        """The transformer engine if configured and not known to be unavailable."""
+        if settings.ml_engine != "transformer" or self._engine_failed:
+            return None
+        if self._engine is None:
+            from app.services.sentiment_model import TransformerEngine
 
-        # Normalize
-        total = sum(aggregated.values()) or 1.0
-        aggregated = {k: v / total for k, v in aggregated.items()}
+            self._engine = TransformerEngine(
+                settings.ml_model_name,
+                runtime=settings.ml_runtime,
+                device=settings.ml_device,
+                negative_split=self.fear_share,
+            )
+        return self._engine
 
-        return aggregated
+    def _get_batcher(self, engine):
+        # A batcher is bound to one event loop (tests use one loop each)
+        loop = asyncio.get_running_loop()
+        if (
+            self._batcher is None
+            or self._batcher_loop is not loop
+            or self._batcher.score != engine.score
+        ):
+            from app.services.sentiment_model import MicroBatcher
+
+            if self._model_executor is None:
+                # One inference at a time; the model parallelizes internally
+                self._model_executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="ml-model"
+                )
+            self._batcher = MicroBatcher(
+                engine.score,
+                batch_size=settings.ml_batch_size,
+                max_wait=settings.ml_batch_max_wait,
+                executor=self._model_executor,
+            )
+            self._batcher_loop = loop
+        return self._batcher
+
+    def engine_id(self) -> str:
+        """Identifier of the engine (and version) the async API currently uses."""
+        engine = self._get_engine()
+        if engine is not None:
+            return f"{engine.model_name}:{engine.runtime}"
+        return f"rules:{self._rules_version}"
+
+    async def _compute_async(self, texts: list[str]) -> tuple[np.ndarray, str]:
+        """Score texts with the configured engine; returns the scores and engine id.
+
+        With ``ml_engine = "transformer"`` texts of concurrent callers are
+        micro-batched into the model. If the model cannot be loaded, the
+        service logs it once and falls back to the rule engine for good.
+        """
+        engine = self._get_engine()
+        if engine is not None:
+            from app.services.sentiment_model import ModelUnavailable
+
+            try:
+                async with self._slot():
+                    scores = await self._get_batcher(engine).submit(texts)
+                return scores, self.engine_id()
+            except ModelUnavailable as exc:
+                self._engine_failed = True
+                logger.warning("Falling back to rule-based sentiment: %s", exc)
+        return await self._submit(_score_batch, texts), self.engine_id()
+
+    async def _load_stored(self, engine_id: str, hashes: list[str]) -> dict[str, tuple]:
+        if not settings.ml_cache_persist or not hashes:
+            return {}
+        try:
+            async with self.session_factory() as db:
+                return await get_sentiment_scores(db, engine_id, hashes)
+        except SQLAlchemyError as exc:
+            logger.warning("Sentiment cache lookup failed: %r", exc)
+            return {}
+
+    async def _save_stored(self, engine_id: str, scores: dict[str, tuple]) -> None:
+        if not settings.ml_cache_persist or not scores:
+            return
+        try:
+            async with self.session_factory() as db:
+                await add_sentiment_scores(db, engine_id, scores)
+                await db.commit()
+        except SQLAlchemyError as exc:
+            logger.warning("Sentiment cache write failed: %r", exc)
+
+    async def score_batch_async(self, texts: list[str]) -> np.ndarray:
+        """
+        Score texts off the event loop, memoized per text.
+
+        Results are looked up by content hash and engine id in an LRU of
+        ``settings.ml_cache_size`` entries, then in the sentiment_cache
+        table. Only the remaining distinct texts are scored, and their
+        results are stored in both.
+        """
+        engine_id = self.engine_id()
+        hashes = [text_hash(text) for text in texts]
+        scores = np.zeros((len(texts), len(EMOTIONS)))
+
+        missing: dict[str, str] = {}
+        for index, (key, text) in enumerate(zip(hashes, texts)):
+            row = self._memo.get((engine_id, key))
+            if row is None:
+                missing.setdefault(key, text)
+            else:
+                scores[index] = row
+        if not missing:
+            return scores
+
+        found = await self._load_stored(engine_id, list(missing))
+        self._store_hits += len(found)
+        for key, row in found.items():
+            self._memo.put((engine_id, key), row)
+
+        todo = {key: text for key, text in missing.items() if key not in found}
+        if todo:
+            computed, used_id = await self._compute_async(list(todo.values()))
+            rows = dict(zip(todo, map(tuple, computed.tolist())))
+            self._computed += len(rows)
+            for key, row in rows.items():
+                self._memo.put((used_id, key), row)
+            found.update(rows)
+            await self._save_stored(used_id, rows)
+
+        for index, key in enumerate(hashes):
+            if key in found:
+                scores[index] = found[key]
+        return scores
+
+    def clear_cache(self) -> None:
+        """Drop the in-memory results (the database table is kept)."""
+        self._memo = LRUCache(settings.ml_cache_size)
+
+    async def analyze_batch_async(self, texts: list[str]) -> list[dict]:
+        """``analyze_batch`` off the event loop with the configured engine."""
+        scores = await self.score_batch_async(texts)
+        return [dict(zip(EMOTIONS, row)) for row in scores.tolist()]
+
+    async def aggregate_batch_async(self, texts: list[str]) -> dict:
+        """``aggregate_batch`` off the event loop with the configured engine."""
+        return self.aggregate_scores(await self.score_batch_async(texts))
+
+    async def accumulate(
+        self, texts: list[str], aggregator: EmotionAggregator | None = None
+    ) -> EmotionAggregator:
+        """Score texts off the event loop and add them to an aggregator.
+
+        Call it once per batch as texts arrive; previously added texts are
+        never scored again.
+        """
+        aggregator = aggregator if aggregator is not None else EmotionAggregator()
+        return aggregator.add_scores(await self.score_batch_async(texts))
+
+    def fear_share(self, texts: list[str]) -> np.ndarray:
+        """Per text, fear / (fear + sadness) keyword share (0.5 without any)."""
+        scores = self.score_batch(texts)
+        fear = scores[:, EMOTIONS.index("fear")]
+        negative = fear + scores[:, EMOTIONS.index("sadness")]
+        return np.divide(fear, negative, out=np.full(len(texts), 0.5), where=negative > 0)
+
+    def stats(self) -> dict[str, int]:
+        """Worker pool and memoization counters."""
+        return {
+            "workers": max(1, settings.ml_workers),
+            "batches": self._batches,
+            "running": self._running,
+            "waiting": self._waiting,
+            "memo_hits": self._memo.hits,
+            "memo_misses": self._memo.misses,
+            "memo_size": len(self._memo),
+            "store_hits": self._store_hits,
+            "computed": self._computed,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker pools (called at application shutdown)."""
+        for executor in (self._executor, self._model_executor):
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+        self._model_executor = None
+        self._batcher = None
 
 
 # Singleton instance
 ml_service = MLService()
+
+
+# Module-level entry point so that process pool workers can unpickle it
+# (each worker process builds its own singleton on import)
+
+def _score_batch(texts: list[str]) -> np.ndarray:
+    return ml_service.score_batch(texts)
@@ -0,0 +1,81 @@
+"""Population statistics per region and year from a census table."""
+
+import csv
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+from app.config import MAX_YEAR, MIN_YEAR, settings
+
+
+class PopulationService:
+    """
+    Population of every region and year, computed once from census anchors.
+
+    The anchors in ``settings.population_path`` are interpolated over all
+    years when the table is first used, so lookups are plain indexing and
+    a region and year always give the same numbers. Regions missing from
+    the table get a synthetic series seeded by their name.
+    """
+
+    def __init__(self, path: Path | None = None, first_year: int = MIN_YEAR, last_year: int = MAX_YEAR):
+        self.path = path
+        self.years = np.arange(first_year, last_year + 1)
+        # Lowercase region name -> (population, change percent) per year
+        self._series: dict[str, tuple[np.ndarray, np.ndarray]] | None = None
+
+    def load(self) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        """Read and interpolate the census table (once)."""
+        if self._series is None:
+            anchors: dict[str, list[tuple[int, int]]] = {}
+            with open(self.path or settings.population_path, encoding="utf-8", newline="") as f:
+                for row in csv.DictReader(line for line in f if not line.startswith("#")):
+                    anchors.setdefault(row["region"].strip().lower(), []).append(
+                        (int(row["year"]), int(row["population"]))
+                    )
+
+            series = {}
+            for name, points in anchors.items():
+                years, populations = zip(*sorted(points))
+                series[name] = self._with_change(np.interp(self.years, years, populations))
+            self._series = series
+        return self._series
+
+    @staticmethod
+    def _with_change(populations: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        change = np.zeros(len(populations))
+        change[1:] = (populations[1:] / populations[:-1] - 1) * 100
+        return np.rint(populations).astype(np.int64), np.round(change, 2)
+
+    def _synthetic(self, region_name: str) -> tuple[np.ndarray, np.ndarray]:
+        digest = hashlib.sha256(region_name.lower().encode()).digest()
+        rng = np.random.default_rng(int.from_bytes(digest[:8], "big"))
+        base = rng.integers(100_000, 5_000_000)
+        growth = rng.uniform(0.005, 0.02)
+        return self._with_change(base * (1 + growth) ** (self.years - self.years[0]))
+
+    def series(self, region_name: str) -> tuple[np.ndarray, np.ndarray]:
+        """Population and change from the previous year (percent) for every year."""
+        series = self.load().get(region_name.lower())
+        # Synthetic series are cheap and not kept: region names come from requests
+        return series if series is not None else self._synthetic(region_name)
+
+    def populations(self, region_name: str, from_year: int, to_year: int) -> np.ndarray:
+        """Population of a region for each year of a range."""
+        first = self.years[0]
+        return self.series(region_name)[0][max(from_year - first, 0):to_year - first + 1]
+
+    def get_stats(self, region_name: str, year: int) -> dict:
+        """Population statistics of a region for a year."""
+        populations, change = self.series(region_name)
+        i = int(np.clip(year - self.years[0], 0, len(self.years) - 1))
+        return {
+            "population": int(populations[i]),
+            "change_percent": float(change[i]),
+            "year": year,
+        }
+
+
+# Singleton instance
+population_service = PopulationService()
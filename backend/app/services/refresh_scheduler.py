@@ -0,0 +1,158 @@
+"""Background scheduler renewing cached regions before they expire."""
+
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.database import async_session_maker
+from app.repository import get_rows_updated_before
+from app.services.region_refresh import RegionRefreshService, region_refresh_service
+from app.utils import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshScheduler:
+    """
+    Periodically refresh cached rows that are about to reach ``cache_ttl``.
+
+    Rows are renewed ``settings.scheduler_refresh_ahead`` seconds before
+    they go stale, so request handlers rarely have to scrape. Years that
+    are requested most often are refreshed first (oldest rows first within
+    a year), and refreshes are paced by a token bucket so the scheduler
+    stays within a global budget toward the scraper. Rows that fail to
+    renew (or come back without entries) are retried with an exponential
+    backoff, so they do not use up every batch.
+    """
+
+    def __init__(
+        self,
+        refresh_service: RegionRefreshService = region_refresh_service,
+        session_factory=async_session_maker,
+    ):
+        self.refresh_service = refresh_service
+        self.session_factory = session_factory
+        self.access_counts: Counter[int] = Counter()
+        self._budget = TokenBucket(settings.scheduler_rate, settings.scheduler_burst)
+        self._task: asyncio.Task | None = None
+        # Consecutive failures and next attempt of cells that failed to renew
+        self._failures: Counter[tuple[int, str]] = Counter()
+        self._retry_at: dict[tuple[int, str], datetime] = {}
+        self.scans = 0
+        self.refreshed = 0
+        self.failed = 0
+        self.due = 0
+
+    def record_access(self, *years: int) -> None:
+        """Count requests for years; popular years are refreshed first."""
+        self.access_counts.update(years)
+
+    async def due_cells(self, now: datetime | None = None) -> list[tuple[int, str]]:
+        """(year, region name) of rows due for renewal, in priority order."""
+        now = now or datetime.utcnow()
+        ahead = min(max(settings.scheduler_refresh_ahead, 0), settings.cache_ttl)
+        cutoff = now - timedelta(seconds=settings.cache_ttl - ahead)
+        async with self.session_factory() as db:
+            rows = await get_rows_updated_before(db, cutoff)
+
+        cells = [(year, region_name) for year, region_name, _ in rows]
+        # Cells renewed some other way are not retried anymore
+        for cell in self._retry_at.keys() - set(cells):
+            del self._retry_at[cell]
+            del self._failures[cell]
+
+        # Cells that failed before go last once their backoff is over. Rows
+        # come oldest first and the sort is stable, so that order is kept
+        # among rows of equally popular years
+        cells = [cell for cell in cells if self._retry_at.get(cell, now) <= now]
+        cells.sort(key=lambda cell: (self._failures[cell], -self.access_counts[cell[0]]))
+        return cells
+
+    async def refresh_due(self, now: datetime | None = None) -> int:
+        """
+        Refresh up to ``settings.scheduler_batch_size`` due rows.
+
+        Returns the number of rows that were renewed.
+        """
+        due = await self.due_cells(now)
+        self.scans += 1
+        self.due = len(due)
+        cells = due[:max(0, settings.scheduler_batch_size)]
+        if not cells:
+            return 0
+
+        semaphore = asyncio.Semaphore(max(1, settings.refresh_concurrency))
+
+        async def refresh(year: int, region_name: str) -> tuple[int, dict[str, dict]]:
+            async with semaphore:
+                await self._budget.acquire()
+                results = await self.refresh_service.refresh_regions(
+                    [region_name], year, settings.refresh_background_timeout
+                )
+                return year, results
+
+        by_year: dict[int, dict[str, dict]] = {}
+        for year, results in await asyncio.gather(*(refresh(*cell) for cell in cells)):
+            by_year.setdefault(year, {}).update(results)
+
+        renewed = set()
+        for year, results in by_year.items():
+            await self.refresh_service.store_results(year, results)
+            # Results without entries are not stored and the row stays due
+            renewed.update(
+                (year, name) for name, result in results.items() if result["diary_entries"]
+            )
+
+        now = now or datetime.utcnow()
+        for cell in cells:
+            if cell in renewed:
+                self._failures.pop(cell, None)
+                self._retry_at.pop(cell, None)
+            else:
+                self._failures[cell] += 1
+                backoff = settings.scheduler_interval * 2 ** self._failures[cell]
+                self._retry_at[cell] = now + timedelta(seconds=min(backoff, settings.cache_ttl))
+
+        self.refreshed += len(renewed)
+        self.failed += len(cells) - len(renewed)
+        return len(renewed)
+
+    async def run(self) -> None:
+        """Refresh due rows every ``settings.scheduler_interval`` seconds."""
+        while True:
+            try:
+                await self.refresh_due()
+            except Exception:
+                logger.exception("Scheduled refresh failed")
+            await asyncio.sleep(settings.scheduler_interval)
+
+    def start(self) -> asyncio.Task:
+        """Start the scheduler loop in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        """Stop the scheduler loop."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def stats(self) -> dict[str, int]:
+        """Scan and refresh counters."""
+        return {
+            "scans": self.scans,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "due": self.due,
+            "backing_off": len(self._retry_at),
+            "tracked_years": len(self.access_counts),
+        }
+
+
+# Singleton instance
+refresh_scheduler = RefreshScheduler()
@@ -0,0 +1,295 @@
+"""Region refresh service: scrape diaries and compute emotions for a region."""
+
+import asyncio
+import logging
+import weakref
+from datetime import datetime
+
+from app.config import settings
+from app.database import async_session_maker
+from app.models import RegionData
+from app.repository import (
+    commit_region_results,
+    get_region_row,
+    get_region_rows_for_year,
+    merge_region_entries,
+    upsert_region_results,
+)
+from app.services.ml_service import ml_service
+from app.services.scraper import scraper_service
+from app.utils import EmotionAggregator, SingleFlight, emotion_cube, get_region_registry
+
+logger = logging.getLogger(__name__)
+
+# Cache states of a RegionData row
+FRESH = "fresh"
+STALE = "stale"
+EXPIRED = "expired"
+
+
+def cache_state(cached: RegionData | None, now: datetime | None = None) -> str:
+    """
+    Classify a cached row against the cache TTL settings.
+
+    FRESH rows are served as is, STALE rows are served while a background
+    refresh runs, EXPIRED (or missing) rows must be refreshed before serving.
+    """
+    if cached is None:
+        return EXPIRED
+
+    cache_age = ((now or datetime.utcnow()) - cached.updated_at).total_seconds()
+    if cache_age < settings.cache_ttl:
+        return FRESH
+    if settings.cache_stale_while_revalidate and cache_age < settings.cache_hard_ttl:
+        return STALE
+    return EXPIRED
+
+
+class RegionResult(dict):
+    """A computed region: emotions, diary_entries and diary_count.
+
+    One instance is shared by every caller coalesced on its computation,
+    which lets the cache write it only once.
+    """
+
+    __slots__ = ("__weakref__",)
+
+
+def _region_result(aggregator: EmotionAggregator, sample: list[dict]) -> RegionResult:
+    return RegionResult(
+        emotions=aggregator.result(),
+        diary_entries=list(sample),
+        diary_count=aggregator.count,
+    )
+
+
+class RegionRefreshService:
+    """Service computing fresh region data, optionally for many regions at once."""
+
+    def __init__(self, session_factory=async_session_maker):
+        self.session_factory = session_factory
+        self._pending: set[tuple[str, int]] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._flight = SingleFlight()
+        # Aggregate and sample of the computations in flight, by (region, year)
+        self._progress: dict[tuple[str, int], tuple[EmotionAggregator, list[dict]]] = {}
+        # SQLite allows a single writer; concurrent refreshes take turns
+        self._write_lock = asyncio.Lock()
+        # Results already written by id, kept while any caller still holds them
+        self._written: weakref.WeakValueDictionary[int, RegionResult] = (
+            weakref.WeakValueDictionary()
+        )
+
+    async def compute_region(
+        self, region_name: str, year: int, timeout: float | None = None
+    ) -> dict:
+        """
+        Scrape and analyze a single region for a year.
+
+        Pages still arriving after ``timeout`` seconds (``settings.refresh_timeout``
+        by default) are dropped and the entries analyzed so far are kept; it
+        is an error only if none were. Concurrent calls for the same region
+        and year share one computation, which runs until the deadline of the
+        caller that started it; every caller still waits at most its own
+        ``timeout`` and gets what was analyzed by then.
+        Returns dict with keys: emotions, diary_entries, diary_count
+        """
+        timeout = timeout or settings.refresh_timeout
+        key = (region_name, year)
+        try:
+            return await asyncio.wait_for(
+                self._flight.do(key, lambda: self._compute_region(region_name, year, timeout)),
+                timeout,
+            )
+        except TimeoutError:
+            # Joined a computation with a later deadline (or lost the race with ours)
+            progress = self._progress.get(key)
+            if progress is None or not progress[0].count:
+                raise
+            return _region_result(*progress)
+
+    async def _compute_region(self, region_name: str, year: int, timeout: float) -> dict:
+        # Pages are analyzed as they arrive; only a sample of entries is kept
+        aggregator = EmotionAggregator()
+        sample: list[dict] = []
+        self._progress[(region_name, year)] = (aggregator, sample)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        pages = scraper_service.iter_diaries(region_name, year)
+        try:
+            while True:
+                try:
+                    entries = await asyncio.wait_for(anext(pages), deadline - loop.time())
+                except StopAsyncIteration:
+                    break
+                except TimeoutError:
+                    if not aggregator.count:
+                        raise
+                    logger.info(
+                        "Refresh of %s (%s) timed out, keeping %d analyzed entries",
+                        region_name, year, aggregator.count,
+                    )
+                    break
+                await ml_service.accumulate([entry["text"] for entry in entries], aggregator)
+                sample.extend(entries[:max(0, settings.diary_sample_size - len(sample))])
+        finally:
+            del self._progress[(region_name, year)]
+            await pages.aclose()
+
+        return _region_result(aggregator, sample)
+
+    async def refresh_regions(
+        self, region_names: list[str], year: int, timeout: float | None = None
+    ) -> dict[str, dict]:
+        """
+        Compute many regions concurrently with a bounded fan-out.
+
+        At most ``settings.refresh_concurrency`` regions are in flight at
+        once and each gets ``timeout`` seconds (``settings.refresh_timeout``
+        by default) before it is cut short (see ``compute_region``).
+        Regions that fail, or time out before any entry, are left out of
+        the returned mapping.
+        """
+        semaphore = asyncio.Semaphore(max(1, settings.refresh_concurrency))
+
+        async def run(region_name: str) -> dict:
+            async with semaphore:
+                return await self.compute_region(region_name, year, timeout)
+
+        outcomes = await asyncio.gather(
+            *(run(name) for name in region_names),
+            return_exceptions=True,
+        )
+
+        results = {}
+        for region_name, outcome in zip(region_names, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.warning(
+                    "Refresh of %s (%s) failed: %r", region_name, year, outcome
+                )
+                continue
+            results[region_name] = outcome
+        return results
+
+    def schedule_refresh(self, region_names: list[str], year: int) -> asyncio.Task | None:
+        """
+        Refresh regions in the background and write them to the cache.
+
+        Regions that already have a background refresh pending are skipped.
+        Returns the scheduled task, or None if there was nothing to do.
+        """
+        names = [name for name in region_names if (name, year) not in self._pending]
+        if not names:
+            return None
+
+        self._pending.update((name, year) for name in names)
+        task = asyncio.create_task(self._refresh_and_store(names, year))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _refresh_and_store(self, region_names: list[str], year: int) -> None:
+        try:
+            # Another process (prewarm, the scheduler of another worker) may
+            # have renewed rows this one still sees as stale
+            async with self.session_factory() as db:
+                rows = await get_region_rows_for_year(db, year)
+            emotion_cube.update(rows.values())
+            stale = [name for name in region_names if cache_state(rows.get(name)) != FRESH]
+            if not stale:
+                return
+
+            results = await self.refresh_regions(
+                stale, year, settings.refresh_background_timeout
+            )
+            await self.store_results(year, results)
+        except Exception:
+            logger.exception("Background refresh for %s failed", year)
+        finally:
+            self._pending.difference_update((name, year) for name in region_names)
+
+    async def store_results(
+        self, year: int, results: dict[str, dict], keep_empty: bool = False
+    ) -> None:
+        """Write computed regions of a year to the cache in their own session.
+
+        Regions without diary entries are skipped, like in the map endpoint,
+        unless ``keep_empty`` is set (a region detail caches them too). A
+        result that another caller coalesced on the same computation already
+        wrote is skipped as well.
+        """
+        results = {
+            name: r for name, r in results.items() if keep_empty or r["diary_entries"]
+        }
+        if not results:
+            return
+
+        registry = get_region_registry()
+        geo_ids = {}
+        for name in results:
+            region = registry.get_by_name(name)
+            geo_ids[name] = region.geo_id if region else None
+
+        async with self._write_lock:
+            results = {
+                name: r for name, r in results.items() if self._written.get(id(r)) is not r
+            }
+            if not results:
+                return
+
+            async with self.session_factory() as db:
+                await upsert_region_results(
+                    db, {(year, name): result for name, result in results.items()}, geo_ids
+                )
+                await commit_region_results(db)
+            self._written.update(
+                (id(r), r) for r in results.values() if isinstance(r, RegionResult)
+            )
+
+    async def append_entries(
+        self, year: int, region_name: str, entries: list[dict]
+    ) -> RegionData | None:
+        """
+        Add new diary entries to a cached region.
+
+        Only the new texts are analyzed; they are merged into the stored
+        aggregate. Returns the updated row, or None if the region has no
+        cached row yet (a full refresh is needed then).
+        """
+        async with self.session_factory() as db:
+            if await get_region_row(db, year, region_name) is None:
+                return None
+
+        # Scored before taking the write lock, merged into the row read under it
+        added = await ml_service.accumulate([entry["text"] for entry in entries])
+        async with self._write_lock, self.session_factory() as db:
+            cached = await get_region_row(db, year, region_name)
+            if cached is None:
+                return None
+
+            aggregator = cached.emotion_aggregator().merge(added)
+            merge_region_entries(db, cached, entries, aggregator)
+            await commit_region_results(db)
+            return cached
+
+    def stats(self) -> dict[str, int]:
+        """Refresh counters, including how many callers were coalesced."""
+        return {
+            **self._flight.stats(),
+            "background_pending": len(self._pending),
+        }
+
+    async def wait_background(self) -> None:
+        """Wait until all scheduled background refreshes are done."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def shutdown(self) -> None:
+        """Cancel pending background refreshes."""
+        for task in list(self._tasks):
+            task.cancel()
+        await self.wait_background()
+
+
+# Singleton instance
+region_refresh_service = RegionRefreshService()
@@ -1,7 +1,12 @@
 """Scraper service for prozhito.org diary entries."""
 
 import asyncio
+import importlib.util
+import logging
+import math
 import random
+from collections.abc import AsyncIterator
+from dataclasses import asdict, dataclass
 from datetime import datetime
 from typing import Optional
 
@@ -9,20 +14,64 @@ import httpx
 from bs4 import BeautifulSoup
 
 from app.config import settings
+from app.utils import CachedResponse, HttpCache, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class DiaryPage:
+    """Entries parsed from one page of notes, with the paging information."""
+
+    entries: list[dict]
+    count: int | None = None  # total notes over all pages, if reported
+    has_next: bool = False
+
+
+# Responses worth retrying after a backoff
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Upper bound on a server-requested Retry-After wait (seconds)
+MAX_RETRY_AFTER = 60.0
 
 
 class ScraperService:
-    """Service for scraping diary entries from prozhito.org."""
+    """Service for scraping diary entries from prozhito.org.
+
+    Outbound requests share one pooled keep-alive client (HTTP/2 when the
+    h2 package is installed). Each host gets a token-bucket rate limit and
+    a concurrency cap, and 429/5xx responses and transport errors are
+    retried with exponential backoff.
+
+    Parsed API responses are cached on disk with their ETag/Last-Modified,
+    so refetching an unchanged page is a conditional request answered by
+    a 304 and the stored entries.
+    """
 
-    def __init__(self):
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None):
         self.base_url = settings.scraper_base_url
-        self.timeout = settings.scraper_delay
+        self.timeout = settings.scraper_timeout
+        self.transport = transport
         self._client: Optional[httpx.AsyncClient] = None
+        self._buckets: dict[str, TokenBucket] = {}
+        self._host_slots: dict[str, asyncio.Semaphore] = {}
+        self._slots_loop: asyncio.AbstractEventLoop | None = None
+        self.cache = HttpCache(settings.scraper_cache_dir, settings.scraper_cache_max_bytes)
+        self.retries = 0
+        self.revalidated = 0
 
     async def get_client(self) -> httpx.AsyncClient:
         """Get or create HTTP client."""
         if self._client is None:
-            self._client = httpx.AsyncClient(timeout=settings.scraper_timeout)
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=settings.scraper_max_connections,
+                    max_keepalive_connections=settings.scraper_max_keepalive,
+                    keepalive_expiry=settings.scraper_keepalive_expiry,
+                ),
+                http2=settings.scraper_http2 and importlib.util.find_spec("h2") is not None,
+                transport=self.transport,
+            )
         return self._client
 
     async def close(self):
@@ -31,6 +80,65 @@ class ScraperService:
             await self._client.aclose()
             self._client = None
 
+    def _host_limits(self, host: str) -> tuple[TokenBucket, asyncio.Semaphore]:
+        # Semaphores are bound to one event loop (tests use one loop each)
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._host_slots = {}
+            self._slots_loop = loop
+
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            rate = 1 / settings.scraper_delay if settings.scraper_delay > 0 else 0.0
+            bucket = self._buckets[host] = TokenBucket(rate, settings.scraper_burst)
+        slots = self._host_slots.get(host)
+        if slots is None:
+            slots = self._host_slots[host] = asyncio.Semaphore(
+                max(1, settings.scraper_per_host_concurrency)
+            )
+        return bucket, slots
+
+    @staticmethod
+    def _retry_delay(attempt: int, response: httpx.Response | None) -> float:
+        """Backoff before retry ``attempt`` (0-based), honouring Retry-After."""
+        if response is not None:
+            retry_after = response.headers.get("retry-after", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), MAX_RETRY_AFTER)
+        delay = settings.scraper_backoff * 2 ** attempt
+        return random.uniform(delay / 2, delay)
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a rate-limited request, retrying 429/5xx and transport errors.
+
+        Returns the last response (which may still be an error status) or
+        raises the last transport error once retries are exhausted.
+        """
+        client = await self.get_client()
+        bucket, slots = self._host_limits(httpx.URL(url).host)
+
+        attempt = 0
+        while True:
+            last_attempt = attempt >= settings.scraper_max_retries
+            response = None
+            async with slots:
+                await bucket.acquire()
+                try:
+                    response = await client.request(method, url, **kwargs)
+                except httpx.TransportError:
+                    if last_attempt:
+                        raise
+
+            if response is not None and (
+                response.status_code not in RETRY_STATUSES or last_attempt
+            ):
+                return response
+
+            self.retries += 1
+            await asyncio.sleep(self._retry_delay(attempt, response))
+            attempt += 1
+
     async def fetch_diaries_for_region_year(
         self, region: str, year: int, limit: int = 20
     ) -> list[dict]:
@@ -39,61 +147,146 @@ class ScraperService:
 
         Returns list of dicts with: text, author, date, url
         """
-        try:
-            client = await self.get_client()
-
-            # Simulate realistic delay to avoid blocking
-            await asyncio.sleep(random.uniform(0.1, 0.5))
-
-            # Try to fetch from prozhito API/search
-            # Note: Since actual scraping may be blocked, we return mock data
-            # In production, implement actual scraping logic
-
-            entries = await self._fetch_from_prozhito(region, year, limit, client)
-
-            # If no entries from real source, use mock data
-            if not entries:
-                return self._get_mock_data(region, year)
-
-            return entries
-
-        except Exception:
-            # Return mock data on error
-            return self._get_mock_data(region, year)
+        entries = []
+        async for batch in self.iter_diaries(region, year, page_size=limit, max_pages=1):
+            entries.extend(batch)
+        return entries[:limit]
+
+    async def iter_diaries(
+        self,
+        region: str,
+        year: int,
+        page_size: int | None = None,
+        max_pages: int | None = None,
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Stream all diary entries of a region and year, one page at a time.
 
-    async def _fetch_from_prozhito(
-        self, region: str, year: int, limit: int, client: httpx.AsyncClient
-    ) -> list[dict]:
-        """Attempt to fetch actual data from prozhito.org."""
+        After the first page, the remaining pages (up to ``max_pages``) are
+        fetched concurrently, at most ``settings.scraper_page_concurrency``
+        at a time, and yielded in order of arrival. If the source yields
+        nothing, mock entries are yielded instead.
+        """
+        # Note: Since actual scraping may be blocked, we fall back to mock data
+        page_size = page_size or settings.scraper_page_size
+        max_pages = max_pages or settings.scraper_max_pages
+        yielded = False
+
+        first = await self._fetch_page(region, year, 1, page_size)
+        if first is not None:
+            if first.entries:
+                yielded = True
+                yield first.entries
+
+            if first.count is not None:
+                last_page = min(max_pages, math.ceil(first.count / page_size))
+                pages = range(2, last_page + 1)
+                async for entries in self._iter_pages(region, year, pages, page_size):
+                    yielded = True
+                    yield entries
+            else:
+                # No total count: follow the pages one by one
+                page = first
+                number = 1
+                while page is not None and page.has_next and number < max_pages:
+                    number += 1
+                    page = await self._fetch_page(region, year, number, page_size)
+                    if page is not None and page.entries:
+                        yielded = True
+                        yield page.entries
+
+        if not yielded:
+            yield self._get_mock_data(region, year)
+
+    async def _iter_pages(
+        self, region: str, year: int, pages: range, page_size: int
+    ) -> AsyncIterator[list[dict]]:
+        """Fetch pages with bounded concurrency, yielding entries as they arrive."""
+        numbers = iter(pages)
+        pending: set[asyncio.Task] = set()
+        try:
+            while True:
+                while len(pending) < max(1, settings.scraper_page_concurrency):
+                    number = next(numbers, None)
+                    if number is None:
+                        break
+                    pending.add(asyncio.create_task(
+                        self._fetch_page(region, year, number, page_size)
+                    ))
+                if not pending:
+                    return
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    page = task.result()
+                    if page is not None and page.entries:
+                        yield page.entries
+        finally:
+            # The consumer stopped early: do not keep fetching
+            for task in pending:
+                task.cancel()
+
+    async def _fetch_page(
+        self, region: str, year: int, page: int, page_size: int
+    ) -> DiaryPage | None:
+        """Fetch one page of notes from prozhito.org; None if it failed."""
         try:
             # Build search URL
             url = f"{self.base_url}/api/notes"
             params = {
-                "page": 1,
-                "page_size": limit,
+                "page": page,
+                "page_size": page_size,
                 "year": year,
+                "region": region,
             }
 
-            response = await client.get(url, params=params, follow_redirects=True)
+            key = self.cache.key(url, params)
+            cached = await self.cache.get_async(key)
+
+            response = await self.request(
+                "GET",
+                url,
+                params=params,
+                headers=cached.conditional_headers() if cached else None,
+                follow_redirects=True,
+            )
+
+            if response.status_code == 304 and cached is not None:
+                await self.cache.touch_async(key)
+                self.revalidated += 1
+                return DiaryPage(**cached.data)
 
             if response.status_code == 200:
                 data = response.json()
                 entries = []
 
-                for note in data.get("results", [])[:limit]:
+                for note in data.get("results", []):
+                    if not _note_in_region(note, region):
+                        continue
                     entries.append({
-                        "text": note.get("text", "")[:500],
-                        "author": note.get("author", {}).get("name", "Аноним"),
+                        "text": note.get("text", ""),
+                        "author": (note.get("author") or {}).get("name", "Аноним"),
                         "date": note.get("date", datetime.now().strftime("%d.%m.%Y")),
                         "url": f"{self.base_url}/n/{note.get('id', '')}",
                     })
 
-                return entries
+                result = DiaryPage(
+                    entries=entries,
+                    count=data.get("count"),
+                    has_next=bool(data.get("next")),
+                )
+                etag = response.headers.get("etag")
+                last_modified = response.headers.get("last-modified")
+                if etag or last_modified:
+                    await self.cache.put_async(
+                        key, CachedResponse(etag, last_modified, asdict(result))
+                    )
+                return result
 
-        except Exception:
-            pass
+        except Exception as exc:
+            logger.warning("Fetching page %s of %s (%s) failed: %r", page, region, year, exc)
 
-        return []
+        return None
 
     def _get_mock_data(self, region: str, year: int) -> list[dict]:
         """Generate mock diary entries for development/testing."""
@@ -145,29 +338,26 @@ class ScraperService:
 
         return entries
 
-    async def get_population_stats(self, region: str, year: int) -> dict:
-        """Get population statistics for a region and year."""
-        # Mock data based on historical estimates
-        base_pop = random.randint(100000, 5000000)
-
-        # Simulate population changes based on decade
-        if 1941 <= year <= 1945:
-            change_percent = random.uniform(-30, -5)  # WWII losses
-        elif 1920 <= year <= 1930:
-            change_percent = random.uniform(2, 5)  # Growth
-        elif 1930 <= year <= 1940:
-            change_percent = random.uniform(1, 8)  # Industrialization
-        else:
-            change_percent = random.uniform(-1, 3)
-
-        population = int(base_pop * (1 + change_percent / 100 * (year - 1920) / 10))
-
+    def stats(self) -> dict[str, int]:
+        """Retry and response cache counters."""
         return {
-            "population": population,
-            "change_percent": change_percent,
-            "year": year,
+            "retries": self.retries,
+            "revalidated": self.revalidated,
+            **{f"cache_{name}": value for name, value in self.cache.stats().items()},
         }
 
 
+def _note_in_region(note: dict, region: str) -> bool:
+    """Whether a note belongs to a region (notes without a place are kept)."""
+    place = note.get("region") or note.get("place")
+    if isinstance(place, dict):
+        place = place.get("name")
+    if not place:
+        return True
+    place = str(place).lower()
+    region = region.lower()
+    return region in place or place in region
+
+
 # Singleton instance
 scraper_service = ScraperService()
@@ -0,0 +1,239 @@
+"""Transformer sentiment engine with lazy loading and async micro-batching."""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Executor
+from typing import Callable
+
+import numpy as np
+
+from app.services.ml_service import EMOTIONS
+
+logger = logging.getLogger(__name__)
+
+# Model labels -> emotion columns. "negative" (as in seara/rubert-tiny-sentiment)
+# is split between fear and sadness, see TransformerEngine.
+LABEL_EMOTIONS = {
+    "positive": "joy",
+    "joy": "joy",
+    "neutral": "neutral",
+    "fear": "fear",
+    "sadness": "sadness",
+    "negative": "negative",
+}
+
+
+class ModelUnavailable(RuntimeError):
+    """The configured sentiment model could not be loaded."""
+
+
+class TransformerEngine:
+    """Sequence classification model scoring texts on CPU.
+
+    The tokenizer and model are loaded on first use from a Hugging Face
+    model name or a local directory. ``runtime`` selects plain PyTorch
+    ("torch"), PyTorch with dynamic int8 quantization of the Linear layers
+    ("quantized") or ONNX Runtime through optimum ("onnx").
+
+    ``negative_split`` returns, per text, the share of a "negative"
+    prediction that goes to fear (the rest goes to sadness).
+    """
+
+    RUNTIMES = ("torch", "quantized", "onnx")
+
+    def __init__(
+        self,
+        model_name: str,
+        runtime: str = "quantized",
+        device: str = "cpu",
+        negative_split: Callable[[list[str]], np.ndarray] | None = None,
+        max_length: int = 512,
+    ):
+        if runtime not in self.RUNTIMES:
+            raise ValueError(f"Unknown ML runtime {runtime!r}")
+        self.model_name = model_name
+        self.runtime = runtime
+        self.device = device if runtime == "torch" else "cpu"
+        self.negative_split = negative_split
+        self.max_length = max_length
+
+        self._lock = threading.Lock()
+        self._tokenizer = None
+        self._model = None
+        self._labels: list[str | None] = []
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> None:
+        """Load the tokenizer and model (no-op once loaded)."""
+        with self._lock:
+            if self._model is not None:
+                return
+            try:
+                from transformers import AutoTokenizer
+
+                tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                if self.runtime == "onnx":
+                    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+                    model = ORTModelForSequenceClassification.from_pretrained(
+                        self.model_name, export=True
+                    )
+                else:
+                    import torch
+                    from transformers import AutoModelForSequenceClassification
+
+                    model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+                    model.eval()
+                    if self.runtime == "quantized":
+                        model = torch.quantization.quantize_dynamic(
+                            model, {torch.nn.Linear}, dtype=torch.qint8
+                        )
+                    else:
+                        model.to(self.device)
+            except (ImportError, OSError, ValueError) as exc:
+                raise ModelUnavailable(f"Cannot load {self.model_name}: {exc}") from exc
+
+            labels = [
+                LABEL_EMOTIONS.get(str(model.config.id2label[i]).lower())
+                for i in range(len(model.config.id2label))
+            ]
+            if not any(labels):
+                raise ModelUnavailable(
+                    f"{self.model_name} has no known labels: {model.config.id2label}"
+                )
+
+            self._tokenizer = tokenizer
+            self._model = model
+            self._labels = labels
+            logger.info("Loaded sentiment model %s (%s)", self.model_name, self.runtime)
+
+    def _logits(self, texts: list[str]) -> np.ndarray:
+        import torch
+
+        inputs = self._tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="pt",
+        )
+        if self.device != "cpu":
+            inputs = inputs.to(self.device)
+        with torch.inference_mode():
+            logits = self._model(**inputs).logits
+        return logits.detach().cpu().numpy()
+
+    def score(self, texts: list[str]) -> np.ndarray:
+        """Score texts into an array of shape (len(texts), 4) in ``EMOTIONS`` order."""
+        self.load()
+        scores = np.zeros((len(texts), len(EMOTIONS)))
+        if not texts:
+            return scores
+
+        logits = self._logits(texts)
+        probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probs /= probs.sum(axis=1, keepdims=True)
+
+        negative = np.zeros(len(texts))
+        for index, emotion in enumerate(self._labels):
+            if emotion == "negative":
+                negative += probs[:, index]
+            elif emotion is not None:
+                scores[:, EMOTIONS.index(emotion)] += probs[:, index]
+
+        if negative.any():
+            fear_share = (
+                self.negative_split(texts) if self.negative_split is not None
+                else np.full(len(texts), 0.5)
+            )
+            scores[:, EMOTIONS.index("fear")] += negative * fear_share
+            scores[:, EMOTIONS.index("sadness")] += negative * (1 - fear_share)
+
+        # Renormalize in case some model labels were not mapped
+        totals = scores.sum(axis=1, keepdims=True)
+        return np.divide(scores, totals, out=scores, where=totals > 0)
+
+
+class MicroBatcher:
+    """Collects texts from concurrent callers into batches for one scorer.
+
+    A batch is flushed once it holds ``batch_size`` texts or its oldest
+    text has waited ``max_wait`` seconds. Scoring runs in ``executor`` in
+    chunks of at most ``batch_size`` texts, and each caller gets back the
+    rows of its own texts. Must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        score: Callable[[list[str]], np.ndarray],
+        batch_size: int,
+        max_wait: float,
+        executor: Executor | None = None,
+    ):
+        self.score = score
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max_wait
+        self.executor = executor
+
+        self._pending: list[tuple[list[str], asyncio.Future]] = []
+        self._pending_texts = 0
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self.batches = 0
+
+    async def submit(self, texts: list[str]) -> np.ndarray:
+        """Score texts as part of the next batch."""
+        if not texts:
+            return np.zeros((0, len(EMOTIONS)))
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((texts, future))
+        self._pending_texts += len(texts)
+
+        if self._pending_texts >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        requests, self._pending, self._pending_texts = self._pending, [], 0
+        task = asyncio.get_running_loop().create_task(self._run(requests))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _score_chunks(self, texts: list[str]) -> np.ndarray:
+        chunks = [
+            self.score(texts[i:i + self.batch_size])
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        self.batches += len(chunks)
+        return np.concatenate(chunks)
+
+    async def _run(self, requests: list[tuple[list[str], asyncio.Future]]) -> None:
+        texts = [text for request_texts, _ in requests for text in request_texts]
+        try:
+            loop = asyncio.get_running_loop()
+            scores = await loop.run_in_executor(self.executor, self._score_chunks, texts)
+        except Exception as exc:
+            for _, future in requests:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        offset = 0
+        for request_texts, future in requests:
+            if not future.done():
+                future.set_result(scores[offset:offset + len(request_texts)])
+            offset += len(request_texts)
@@ -1,5 +1,62 @@
 """Utility functions."""
 
-from app.utils.geojson_loader import load_geojson, get_regions_from_geojson
+from app.utils.emotion_cube import CubeCell, EmotionCube, emotion_cube
+from app.utils.emotions import EMOTIONS, NEUTRAL_SCORES, EmotionAggregator
+from app.utils.geojson_loader import (
+    Region,
+    RegionRegistry,
+    get_region_by_name,
+    get_region_registry,
+    get_regions_from_geojson,
+    load_geojson,
+    load_region_registry,
+)
+from app.utils.geo_assets import (
+    GEO_FORMATS,
+    GEO_LEVELS,
+    GeoAsset,
+    GeoLevel,
+    geo_asset_store,
+    level_for_zoom,
+)
+from app.utils.http import accepted_encodings, etag_matches
+from app.utils.http_cache import CachedResponse, HttpCache
+from app.utils.lru_cache import LRUCache
+from app.utils.payload_cache import CachedPayload, PayloadCache, map_payload_cache
+from app.utils.rate_limit import TokenBucket
+from app.utils.singleflight import SingleFlight
+from app.utils.timeseries import rolling_mean, year_deltas
 
-__all__ = ["load_geojson", "get_regions_from_geojson"]
+__all__ = [
+    "EMOTIONS",
+    "GEO_FORMATS",
+    "GEO_LEVELS",
+    "NEUTRAL_SCORES",
+    "CachedPayload",
+    "CachedResponse",
+    "CubeCell",
+    "EmotionAggregator",
+    "EmotionCube",
+    "GeoAsset",
+    "GeoLevel",
+    "HttpCache",
+    "LRUCache",
+    "PayloadCache",
+    "Region",
+    "RegionRegistry",
+    "SingleFlight",
+    "TokenBucket",
+    "accepted_encodings",
+    "emotion_cube",
+    "etag_matches",
+    "geo_asset_store",
+    "get_region_by_name",
+    "get_region_registry",
+    "get_regions_from_geojson",
+    "level_for_zoom",
+    "load_geojson",
+    "load_region_registry",
+    "map_payload_cache",
+    "rolling_mean",
+    "year_deltas",
+]
@@ -0,0 +1,183 @@
+"""Dense in-memory year x region matrix of cached emotion summaries."""
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.config import MAX_YEAR, MIN_YEAR
+from app.utils.emotions import EMOTIONS
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+@dataclass(frozen=True, slots=True)
+class CubeCell:
+    """Summary of a cached region row: what map responses need of it."""
+
+    region_name: str
+    geo_id: str | None
+    fear: float
+    joy: float
+    neutral: float
+    sadness: float
+    diary_count: int
+    updated_at: datetime
+
+    def to_dict(self) -> dict:
+        """Same shape as ``RegionData.to_dict``."""
+        return {
+            "name": self.region_name,
+            "geo_id": self.geo_id,
+            "emotions": {
+                "fear": self.fear,
+                "joy": self.joy,
+                "neutral": self.neutral,
+                "sadness": self.sadness,
+            },
+            "diary_count": self.diary_count,
+        }
+
+
+class EmotionCube:
+    """Emotion scores, diary counts and update times of all cached rows.
+
+    The whole cache is small and dense (years x regions x 4 floats), so
+    it is held as NumPy arrays and map reads never go to the database.
+    It is filled from ``region_data`` at startup and updated by the
+    repository on every committed write. Cells that are missing (e.g.
+    written by another process) read as missing, so callers fall back
+    to the database and feed the rows they load back into the cube.
+    """
+
+    def __init__(self, first_year: int = MIN_YEAR, last_year: int = MAX_YEAR, capacity: int = 32):
+        self.first_year = first_year
+        self.last_year = last_year
+        years = last_year - first_year + 1
+        # float64 so responses match the database values byte for byte
+        self.scores = np.zeros((years, capacity, len(EMOTIONS)))
+        self.counts = np.zeros((years, capacity), dtype=np.int32)
+        # Seconds since the epoch (naive UTC); NaN marks a missing cell
+        self.updated = np.full((years, capacity), np.nan)
+        self._index: dict[str, int] = {}
+        self._names: list[str] = []
+        self._geo_ids: list[str | None] = []
+        # Cells built by reads, per year, until the year is written again
+        self._year_cells: dict[int, dict[str, CubeCell]] = {}
+
+    def _region_index(self, region_name: str, geo_id: str | None) -> int:
+        i = self._index.get(region_name)
+        if i is None:
+            i = self._index[region_name] = len(self._names)
+            self._names.append(region_name)
+            self._geo_ids.append(geo_id)
+            if i >= self.counts.shape[1]:
+                self._grow()
+        elif geo_id is not None:
+            self._geo_ids[i] = geo_id
+        return i
+
+    def _grow(self) -> None:
+        extra = self.counts.shape[1]
+        self.scores = np.concatenate([self.scores, np.zeros_like(self.scores[:, :extra])], axis=1)
+        self.counts = np.concatenate([self.counts, np.zeros_like(self.counts[:, :extra])], axis=1)
+        self.updated = np.concatenate(
+            [self.updated, np.full_like(self.updated[:, :extra], np.nan)], axis=1
+        )
+
+    def update(self, rows: Iterable) -> None:
+        """Store rows with ``RegionData`` attributes (ORM objects or result rows)."""
+        for row in rows:
+            if not self.first_year <= row.year <= self.last_year:
+                continue
+            y = row.year - self.first_year
+            r = self._region_index(row.region_name, row.geo_id)
+            self.scores[y, r] = (row.fear, row.joy, row.neutral, row.sadness)
+            self.counts[y, r] = row.diary_count or 0
+            self.updated[y, r] = (row.updated_at - _EPOCH).total_seconds()
+            self._year_cells.pop(row.year, None)
+
+    def _cells(self, year: int) -> dict[str, CubeCell]:
+        cells = self._year_cells.get(year)
+        if cells is None:
+            cells = self._year_cells[year] = self._build_cells(year)
+        return cells
+
+    def _build_cells(self, year: int) -> dict[str, CubeCell]:
+        y = year - self.first_year
+        n = len(self._names)
+        present = np.flatnonzero(~np.isnan(self.updated[y, :n]))
+        scores = self.scores[y, present].tolist()
+        counts = self.counts[y, present].tolist()
+        updated = self.updated[y, present].tolist()
+        return {
+            self._names[r]: CubeCell(
+                self._names[r],
+                self._geo_ids[r],
+                *score,
+                count,
+                _EPOCH + timedelta(seconds=seconds),
+            )
+            for r, score, count, seconds in zip(present.tolist(), scores, counts, updated)
+        }
+
+    def rows_for_year(self, year: int) -> dict[str, CubeCell]:
+        """Cells of a year keyed by region name; missing cells are left out.
+
+        The mapping is shared between reads and must not be modified.
+        """
+        if not self.first_year <= year <= self.last_year:
+            return {}
+        return self._cells(year)
+
+    def rows_for_years(self, from_year: int, to_year: int) -> dict[int, dict[str, CubeCell]]:
+        """Cells of a year range keyed by year and region name."""
+        rows = {}
+        for year in range(max(from_year, self.first_year), min(to_year, self.last_year) + 1):
+            cells = self._cells(year)
+            if cells:
+                rows[year] = cells
+        return rows
+
+    def region_series(
+        self, region_name: str, from_year: int, to_year: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Years, scores and diary counts of one region over a year range.
+
+        Scores are a (years, 4) array in ``EMOTIONS`` order with NaN rows
+        for years without a cached row; their diary count is 0.
+        """
+        first = max(from_year, self.first_year)
+        last = min(to_year, self.last_year)
+        years = np.arange(first, last + 1)
+        r = self._index.get(region_name)
+        if r is None:
+            return years, np.full((len(years), len(EMOTIONS)), np.nan), np.zeros(len(years), int)
+
+        rows = slice(first - self.first_year, last - self.first_year + 1)
+        missing = np.isnan(self.updated[rows, r])
+        scores = self.scores[rows, r].copy()
+        scores[missing] = np.nan
+        return years, scores, self.counts[rows, r].astype(int)
+
+    def clear(self) -> None:
+        """Drop all cells."""
+        self.scores[:] = 0
+        self.counts[:] = 0
+        self.updated[:] = np.nan
+        self._year_cells.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Size counters, including the memory held by the arrays."""
+        return {
+            "years": self.counts.shape[0],
+            "regions": len(self._names),
+            "cells": int(np.count_nonzero(~np.isnan(self.updated))),
+            "bytes": self.scores.nbytes + self.counts.nbytes + self.updated.nbytes,
+        }
+
+
+# Emotion summaries of all cached region rows
+emotion_cube = EmotionCube()
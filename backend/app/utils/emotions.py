@@ -0,0 +1,64 @@
+"""Incremental, mergeable aggregation of per-text emotion scores."""
+
+from collections.abc import Iterable, Mapping
+
+import numpy as np
+
+# Column order of score arrays
+EMOTIONS = ("fear", "joy", "neutral", "sadness")
+NEUTRAL_SCORES = {"fear": 0.0, "joy": 0.0, "neutral": 1.0, "sadness": 0.0}
+
+
+class EmotionAggregator:
+    """Running sums of per-text emotion scores.
+
+    Scores can be added one text or one batch at a time as they arrive,
+    and aggregators of separate shards merge by adding their sums. The
+    result is the sums normalized to 1, i.e. the average of the texts.
+
+    Since every per-text score sums to 1, the average and the text count
+    are a complete state: ``from_average`` rebuilds an aggregator from the
+    emotions and diary count stored on a ``RegionData`` row.
+    """
+
+    __slots__ = ("sums", "count")
+
+    def __init__(self, sums: Iterable[float] | None = None, count: int = 0):
+        self.sums = np.zeros(len(EMOTIONS)) if sums is None else np.array(sums, dtype=float)
+        self.count = count
+
+    @classmethod
+    def from_average(cls, emotions: Mapping[str, float], count: int) -> "EmotionAggregator":
+        """Rebuild the state of ``count`` texts whose average is ``emotions``."""
+        if count <= 0:
+            return cls()
+        return cls([emotions.get(key, 0.0) * count for key in EMOTIONS], count)
+
+    def add(self, scores: Mapping[str, float]) -> "EmotionAggregator":
+        """Add the scores of one text."""
+        self.sums += [scores.get(key, 0.0) for key in EMOTIONS]
+        self.count += 1
+        return self
+
+    def add_scores(self, scores: np.ndarray) -> "EmotionAggregator":
+        """Add a (n, 4) score array in ``EMOTIONS`` order."""
+        if len(scores):
+            self.sums += scores.sum(axis=0)
+            self.count += len(scores)
+        return self
+
+    def merge(self, other: "EmotionAggregator") -> "EmotionAggregator":
+        """Add the state of another aggregator (e.g. another shard)."""
+        self.sums += other.sums
+        self.count += other.count
+        return self
+
+    def __add__(self, other: "EmotionAggregator") -> "EmotionAggregator":
+        return EmotionAggregator(self.sums, self.count).merge(other)
+
+    def result(self) -> dict[str, float]:
+        """Normalized average of the added scores (neutral if empty)."""
+        total = self.sums.sum()
+        if self.count == 0 or total <= 0:
+            return dict(NEUTRAL_SCORES)
+        return dict(zip(EMOTIONS, (self.sums / total).tolist()))
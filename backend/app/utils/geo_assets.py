@@ -0,0 +1,196 @@
+"""Precomputed, pre-compressed region geometry assets at several detail levels."""
+
+import gzip
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+from app.config import settings
+from app.utils.geojson_loader import RegionRegistry, get_region_registry
+from app.utils.geometry import simplify_geometry
+from app.utils.http import accepted_encodings
+from app.utils.topojson import build_topology
+from app.utils.vector_tiles import TileCache, render_tile, tiles_covering
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+@dataclass(frozen=True, slots=True)
+class GeoLevel:
+    """Simplification settings of a detail level."""
+
+    name: str
+    tolerance: float  # Douglas-Peucker tolerance in degrees
+    precision: int  # decimals kept in coordinates
+    quantization: int  # TopoJSON grid size
+    max_zoom: int  # highest map zoom this level is meant for
+
+
+# Ordered from coarsest to finest
+GEO_LEVELS: dict[str, GeoLevel] = {
+    level.name: level
+    for level in (
+        GeoLevel("low", tolerance=0.1, precision=2, quantization=10_000, max_zoom=2),
+        GeoLevel("medium", tolerance=0.03, precision=3, quantization=100_000, max_zoom=4),
+        GeoLevel("high", tolerance=0.005, precision=4, quantization=1_000_000, max_zoom=99),
+    )
+}
+
+GEO_FORMATS = ("geojson", "topojson")
+
+
+def level_for_zoom(zoom: int) -> GeoLevel:
+    """Coarsest level that is detailed enough for a map zoom."""
+    for level in GEO_LEVELS.values():
+        if zoom <= level.max_zoom:
+            return level
+    return list(GEO_LEVELS.values())[-1]
+
+
+@dataclass(frozen=True, slots=True)
+class GeoAsset:
+    """Serialized GeoJSON or TopoJSON of one level with pre-compressed variants."""
+
+    level: str
+    format: str
+    body: bytes
+    gzip: bytes
+    brotli: bytes | None
+    etag: str
+
+    @property
+    def version(self) -> str:
+        """Content version for cache-busting URLs."""
+        return self.etag.strip('"')
+
+    def encoded(self, accept_encoding: str | None) -> tuple[bytes, str | None]:
+        """Pick the best representation for an Accept-Encoding header."""
+        accepted = accepted_encodings(accept_encoding)
+        if self.brotli is not None and "br" in accepted:
+            return self.brotli, "br"
+        if "gzip" in accepted:
+            return self.gzip, "gzip"
+        return self.body, None
+
+
+def _feature_collection(registry: RegionRegistry, level: GeoLevel) -> dict[str, Any]:
+    features = []
+    for region in registry:
+        geometry = simplify_geometry(
+            registry.get_geometry(region.geo_id), level.tolerance, level.precision
+        )
+        features.append({
+            "type": "Feature",
+            "id": region.geo_id,
+            "properties": {"name": region.name},
+            "geometry": geometry,
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def _topology(registry: RegionRegistry, level: GeoLevel) -> dict[str, Any]:
+    # Simplified after arc extraction so that shared borders stay seamless
+    features = [
+        {
+            "id": region.geo_id,
+            "properties": {"name": region.name},
+            "geometry": registry.get_geometry(region.geo_id),
+        }
+        for region in registry
+    ]
+    return build_topology(features, level.quantization, level.tolerance)
+
+
+def build_geo_asset(
+    registry: RegionRegistry, level: GeoLevel, fmt: str = "geojson"
+) -> GeoAsset:
+    """Simplify, serialize and compress the regions of a registry."""
+    data = _topology(registry, level) if fmt == "topojson" else _feature_collection(
+        registry, level
+    )
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+    return GeoAsset(
+        level=level.name,
+        format=fmt,
+        body=body,
+        gzip=gzip.compress(body, compresslevel=9, mtime=0),
+        brotli=brotli.compress(body, quality=11) if brotli is not None else None,
+        etag='"' + hashlib.sha256(body).hexdigest()[:16] + '"',
+    )
+
+
+class GeoAssetStore:
+    """Geometry assets of the current region registry, built once per level.
+
+    Assets are rebuilt when the registry is reloaded (GeoJSON file changed).
+    Vector tiles are rendered from the GeoJSON level matching their zoom and
+    persisted in a disk cache under ``settings.tile_cache_dir``.
+    """
+
+    def __init__(self):
+        self._registry: RegionRegistry | None = None
+        self._assets: dict[tuple[str, str], GeoAsset] = {}
+        self._lock = threading.RLock()
+
+    def get(self, level: str, fmt: str = "geojson") -> GeoAsset:
+        """Get the asset for a level name (see ``GEO_LEVELS``) and format."""
+        registry = get_region_registry()
+
+        with self._lock:
+            if registry is not self._registry:
+                self._registry = registry
+                self._assets = {}
+
+            asset = self._assets.get((level, fmt))
+            if asset is None:
+                asset = build_geo_asset(registry, GEO_LEVELS[level], fmt)
+                self._assets[(level, fmt)] = asset
+            return asset
+
+    def tile(self, z: int, x: int, y: int) -> bytes:
+        """Get an MVT tile, empty bytes if no region intersects it."""
+        asset = self.get(level_for_zoom(z).name)
+
+        def render() -> bytes:
+            return render_tile(json.loads(asset.body)["features"], z, x, y)
+
+        return TileCache(settings.tile_cache_dir).get_or_render(asset.version, z, x, y, render)
+
+    def warm(self) -> None:
+        """Build every level and format up front (called at startup)."""
+        for level in GEO_LEVELS:
+            for fmt in GEO_FORMATS:
+                self.get(level, fmt)
+
+    def warm_tiles(self, min_zoom: int, max_zoom: int) -> int:
+        """Render every tile covering the regions for a zoom range."""
+        registry = get_region_registry()
+        lons = []
+        lats = []
+        for region in registry:
+            geometry = registry.get_geometry(region.geo_id) or {}
+            polygons = geometry.get("coordinates") or []
+            if geometry.get("type") == "Polygon":
+                polygons = [polygons]
+            for polygon in polygons:
+                lons += [point[0] for point in polygon[0]]
+                lats += [point[1] for point in polygon[0]]
+        if not lons:
+            return 0
+
+        count = 0
+        for z in range(min_zoom, max_zoom + 1):
+            for _, x, y in tiles_covering((min(lons), min(lats), max(lons), max(lats)), z):
+                self.tile(z, x, y)
+                count += 1
+        return count
+
+
+# Singleton instance
+geo_asset_store = GeoAssetStore()
@@ -1,12 +1,95 @@
 """GeoJSON utilities for loading and parsing USSR map data."""
 
 import json
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from types import MappingProxyType
+from typing import Any, Mapping
 
 from app.config import settings
 
 
+@dataclass(frozen=True, slots=True)
+class Region:
+    """A map region as needed by the API hot path (no geometry)."""
+
+    name: str
+    geo_id: str
+
+
+class RegionRegistry:
+    """Immutable index of regions parsed once from the GeoJSON file.
+
+    Regions are kept in file order and can be looked up in O(1) by
+    name (case-insensitive) or by GeoJSON feature id. Geometries are
+    stored separately so that map data requests never touch them.
+    """
+
+    __slots__ = ("path", "mtime", "regions", "_by_name", "_by_geo_id", "_geometries")
+
+    def __init__(
+        self,
+        path: Path,
+        mtime: float | None,
+        regions: tuple[Region, ...],
+        geometries: Mapping[str, Any],
+    ):
+        self.path = path
+        self.mtime = mtime
+        self.regions = regions
+        self._by_name = MappingProxyType({r.name.lower(): r for r in regions})
+        self._by_geo_id = MappingProxyType({r.geo_id: r for r in regions})
+        self._geometries = MappingProxyType(dict(geometries))
+
+    @classmethod
+    def from_geojson(
+        cls, geojson: dict[str, Any], path: Path, mtime: float | None = None
+    ) -> "RegionRegistry":
+        """Build a registry from an already parsed GeoJSON document."""
+        regions = []
+        geometries = {}
+
+        for index, feature in enumerate(geojson.get("features", [])):
+            props = feature.get("properties") or {}
+            geo_id = str(feature.get("id") or f"region-{index}")
+            name = props.get("name") or props.get("CNTRY_NAME") or "Unknown Region"
+
+            regions.append(Region(name=name, geo_id=geo_id))
+            geometries[geo_id] = feature.get("geometry")
+
+        return cls(path, mtime, tuple(regions), geometries)
+
+    def __len__(self) -> int:
+        return len(self.regions)
+
+    def __iter__(self):
+        return iter(self.regions)
+
+    def get_by_name(self, name: str) -> Region | None:
+        """Get a region by name (case-insensitive)."""
+        return self._by_name.get(name.lower())
+
+    def get_by_geo_id(self, geo_id: str) -> Region | None:
+        """Get a region by GeoJSON feature id."""
+        return self._by_geo_id.get(geo_id)
+
+    def get_geometry(self, geo_id: str) -> dict[str, Any] | None:
+        """Get the raw GeoJSON geometry of a region."""
+        return self._geometries.get(geo_id)
+
+
+_registry: RegionRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def _file_mtime(path: Path) -> float | None:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return None
+
+
 def load_geojson() -> dict[str, Any]:
     """Load the USSR GeoJSON file."""
     geojson_path = settings.geojson_path
@@ -22,28 +105,53 @@ def load_geojson() -> dict[str, Any]:
         return json.load(f)
 
 
-def get_regions_from_geojson() -> list[dict[str, Any]]:
-    """Extract list of regions from GeoJSON."""
-    geojson = load_geojson()
-    regions = []
+def load_region_registry() -> RegionRegistry:
+    """Parse the GeoJSON file and install it as the current registry."""
+    global _registry
+
+    with _registry_lock:
+        path = settings.geojson_path
+        mtime = _file_mtime(path)
+        _registry = RegionRegistry.from_geojson(load_geojson(), path, mtime)
+        return _registry
 
-    for feature in geojson.get("features", []):
-        props = feature.get("properties", {})
-        region_id = feature.get("id", "")
 
-        regions.append({
-            "name": props.get("name", "Unknown Region"),
-            "geo_id": region_id,
-            "geometry": feature.get("geometry"),
-        })
+def get_region_registry() -> RegionRegistry:
+    """Get the current region registry.
 
-    return regions
+    The file is re-parsed only if the configured path or its mtime
+    changed since the last load, so this is cheap to call per request.
+    """
+    registry = _registry
+    path = settings.geojson_path
+
+    if registry is None or registry.path != path or registry.mtime != _file_mtime(path):
+        return load_region_registry()
+    return registry
+
+
+def get_regions_from_geojson() -> list[dict[str, Any]]:
+    """Extract list of regions from GeoJSON."""
+    registry = get_region_registry()
+
+    return [
+        {
+            "name": region.name,
+            "geo_id": region.geo_id,
+            "geometry": registry.get_geometry(region.geo_id),
+        }
+        for region in registry
+    ]
 
 
 def get_region_by_name(name: str) -> dict[str, Any] | None:
     """Get a specific region by name from GeoJSON."""
-    regions = get_regions_from_geojson()
-    for region in regions:
-        if region["name"].lower() == name.lower():
-            return region
-    return None
+    registry = get_region_registry()
+    region = registry.get_by_name(name)
+    if region is None:
+        return None
+    return {
+        "name": region.name,
+        "geo_id": region.geo_id,
+        "geometry": registry.get_geometry(region.geo_id),
+    }
@@ -0,0 +1,122 @@
+"""Geometry simplification and coordinate quantization for GeoJSON polygons."""
+
+from typing import Any
+
+Point = list[float]
+Ring = list[Point]
+
+
+def _perpendicular_distance_sq(point: Point, start: Point, end: Point) -> float:
+    """Squared distance from a point to the segment start-end."""
+    x, y = point
+    x1, y1 = start
+    dx = end[0] - x1
+    dy = end[1] - y1
+
+    if dx == 0 and dy == 0:
+        return (x - x1) ** 2 + (y - y1) ** 2
+
+    t = ((x - x1) * dx + (y - y1) * dy) / (dx * dx + dy * dy)
+    t = max(0.0, min(1.0, t))
+    return (x - x1 - t * dx) ** 2 + (y - y1 - t * dy) ** 2
+
+
+def simplify_line(points: Ring, tolerance: float) -> Ring:
+    """Simplify a polyline with the Douglas-Peucker algorithm.
+
+    Implemented with an explicit stack so that very long rings (the Russia
+    outline has tens of thousands of points) do not hit the recursion limit.
+    """
+    if tolerance <= 0 or len(points) < 3:
+        return list(points)
+
+    tolerance_sq = tolerance * tolerance
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+
+    while stack:
+        first, last = stack.pop()
+        max_dist = 0.0
+        index = first
+
+        for i in range(first + 1, last):
+            dist = _perpendicular_distance_sq(points[i], points[first], points[last])
+            if dist > max_dist:
+                max_dist = dist
+                index = i
+
+        if max_dist > tolerance_sq:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def quantize_ring(ring: Ring, precision: int) -> Ring:
+    """Round coordinates to ``precision`` decimals, dropping repeated points."""
+    result: Ring = []
+    for x, y, *_ in ring:
+        point = [round(x, precision), round(y, precision)]
+        if not result or result[-1] != point:
+            result.append(point)
+    return result
+
+
+def simplify_ring(ring: Ring, tolerance: float, precision: int) -> Ring | None:
+    """Simplify and quantize a closed ring; None if it collapses."""
+    ring = quantize_ring(simplify_line(ring, tolerance), precision)
+    if len(ring) < 4 or ring[0] != ring[-1]:
+        return None
+    return ring
+
+
+def simplify_polygon(
+    rings: list[Ring], tolerance: float, precision: int
+) -> list[Ring] | None:
+    """Simplify a polygon; None if its exterior ring collapses."""
+    exterior = simplify_ring(rings[0], tolerance, precision) if rings else None
+    if exterior is None:
+        return None
+
+    holes = [simplify_ring(ring, tolerance, precision) for ring in rings[1:]]
+    return [exterior, *(hole for hole in holes if hole is not None)]
+
+
+def simplify_geometry(
+    geometry: dict[str, Any] | None, tolerance: float, precision: int
+) -> dict[str, Any] | None:
+    """Simplify a Polygon or MultiPolygon geometry.
+
+    Polygons smaller than the tolerance (tiny islands) disappear. If every
+    polygon of a MultiPolygon collapses, the largest input polygon is kept
+    quantized but unsimplified so that no region vanishes from the map.
+    Other geometry types are returned unchanged.
+    """
+    if not geometry:
+        return geometry
+
+    geom_type = geometry.get("type")
+    coordinates = geometry.get("coordinates") or []
+
+    if geom_type == "Polygon":
+        polygons = [coordinates]
+    elif geom_type == "MultiPolygon":
+        polygons = coordinates
+    else:
+        return geometry
+
+    simplified = [
+        polygon
+        for polygon in (simplify_polygon(p, tolerance, precision) for p in polygons)
+        if polygon is not None
+    ]
+
+    if not simplified and polygons:
+        largest = max(polygons, key=lambda p: len(p[0]) if p else 0)
+        simplified = [simplify_polygon(largest, 0, precision) or largest]
+
+    if geom_type == "Polygon":
+        return {"type": "Polygon", "coordinates": simplified[0]}
+    return {"type": "MultiPolygon", "coordinates": simplified}
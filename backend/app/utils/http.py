@@ -0,0 +1,39 @@
+"""HTTP caching helpers."""
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    return opaque(etag) in {opaque(tag) for tag in if_none_match.split(",")}
+
+
+def accepted_encodings(accept_encoding: str | None) -> set[str]:
+    """Content codings accepted by an Accept-Encoding header (q > 0).
+
+    A ``*`` wildcard is expanded to the codings we can produce.
+    """
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding)
+
+    if "*" in accepted:
+        accepted.update({"br", "gzip"})
+    return accepted
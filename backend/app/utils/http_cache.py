@@ -0,0 +1,185 @@
+"""Disk-backed cache of parsed HTTP responses for conditional requests."""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlencode
+
+from app.utils.lru_cache import LRUCache
+
+
+@dataclass(frozen=True, slots=True)
+class CachedResponse:
+    """Validators of a response and the data parsed from its body."""
+
+    etag: str | None
+    last_modified: str | None
+    data: Any
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Headers that make the next request conditional on this response."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """Parsed responses stored under ``<root>/<key[:2]>/<key>.json``.
+
+    Keys are hashes of the URL and query parameters. Recently used entries
+    are also kept in memory, so a 304 usually costs no disk read. The
+    files are bounded to ``max_bytes`` in total; the least recently used
+    ones are evicted first. A ``max_bytes`` of 0 disables the cache.
+
+    The ``*_async`` methods do their disk work in a worker thread, so the
+    event loop never waits on the file system; the in-memory entries are
+    only touched by the calling thread.
+    """
+
+    def __init__(self, root: Path, max_bytes: int, memory_entries: int = 1024):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._memory = LRUCache(memory_entries)
+        # path -> size in least recently used order, loaded from disk on first write
+        self._index: OrderedDict[Path, int] | None = None
+        self._index_lock = threading.Lock()
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(url: str, params: dict[str, Any] | None = None) -> str:
+        """Cache key of a GET request."""
+        query = urlencode(sorted((params or {}).items()))
+        return hashlib.sha256(f"{url}?{query}".encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> CachedResponse | None:
+        """Get the stored response for a key, from memory or disk."""
+        if self.max_bytes <= 0:
+            return None
+        entry = self._memory.get(key)
+        return self._remember(key, entry if entry is not None else self._read(key))
+
+    async def get_async(self, key: str) -> CachedResponse | None:
+        """Like ``get``, reading the disk off the event loop."""
+        if self.max_bytes <= 0:
+            return None
+        entry = self._memory.get(key)
+        if entry is None:
+            entry = await asyncio.to_thread(self._read, key)
+        return self._remember(key, entry)
+
+    def _remember(self, key: str, entry: CachedResponse | None) -> CachedResponse | None:
+        if entry is None:
+            self.misses += 1
+            return None
+        self._memory.put(key, entry)
+        self.hits += 1
+        return entry
+
+    def _read(self, key: str) -> CachedResponse | None:
+        try:
+            raw = json.loads(self._path(key).read_text(encoding="utf-8"))
+            return CachedResponse(raw["etag"], raw["last_modified"], raw["data"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def touch(self, key: str) -> None:
+        """Mark an entry as used (e.g. revalidated by a 304)."""
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return
+        with self._index_lock:
+            if self._index is not None and path in self._index:
+                self._index.move_to_end(path)
+
+    async def touch_async(self, key: str) -> None:
+        """Like ``touch``, off the event loop."""
+        await asyncio.to_thread(self.touch, key)
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        """Store a response, evicting old entries beyond ``max_bytes``."""
+        if self.max_bytes <= 0:
+            return
+        self._memory.put(key, entry)
+        for evicted in self._write(key, entry):
+            self._memory.discard(evicted)
+
+    async def put_async(self, key: str, entry: CachedResponse) -> None:
+        """Like ``put``, writing and evicting files off the event loop."""
+        if self.max_bytes <= 0:
+            return
+        self._memory.put(key, entry)
+        for evicted in await asyncio.to_thread(self._write, key, entry):
+            self._memory.discard(evicted)
+
+    def _write(self, key: str, entry: CachedResponse) -> list[str]:
+        """Write an entry to disk; returns the keys of evicted entries."""
+        body = json.dumps(
+            {"etag": entry.etag, "last_modified": entry.last_modified, "data": entry.data},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode()
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write atomically so concurrent readers never see partial entries
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+        with self._index_lock:
+            index = self._load_index()
+            self._total += len(body) - index.pop(path, 0)
+            index[path] = len(body)
+            return self._evict(index)
+
+    def _load_index(self) -> OrderedDict[Path, int]:
+        # Scanned once, oldest first; afterwards uses reorder it in place
+        if self._index is None:
+            files = []
+            for path in self.root.glob("*/*.json"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, path, stat.st_size))
+            files.sort(key=lambda file: file[0])
+            self._index = OrderedDict((path, size) for _, path, size in files)
+            self._total = sum(self._index.values())
+        return self._index
+
+    def _evict(self, index: OrderedDict[Path, int]) -> list[str]:
+        evicted = []
+        while self._total > self.max_bytes and index:
+            path, size = index.popitem(last=False)
+            path.unlink(missing_ok=True)
+            self._total -= size
+            self.evictions += 1
+            evicted.append(path.stem)
+        return evicted
+
+    def stats(self) -> dict[str, int]:
+        """Hit, miss and eviction counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "bytes": self._total,
+        }
@@ -0,0 +1,99 @@
+"""In-memory cache of pre-serialized response bodies with strong ETags."""
+
+import hashlib
+import itertools
+from collections.abc import Hashable
+from dataclasses import dataclass
+from datetime import datetime
+
+
+@dataclass(frozen=True, slots=True)
+class CachedPayload:
+    """Serialized response body with its strong ETag."""
+
+    body: bytes
+    etag: str
+    expires_at: datetime | None = None
+
+    @classmethod
+    def from_body(cls, body: bytes, expires_at: datetime | None = None) -> "CachedPayload":
+        """Build a payload, deriving the ETag from the body bytes."""
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        return cls(body=body, etag=etag, expires_at=expires_at)
+
+
+class PayloadCache:
+    """Cache of serialized responses that expire or are invalidated by key.
+
+    Used for per-year map responses: a payload is dropped when any region
+    row of its year is written, or when the oldest row it was built from
+    reaches the cache TTL.
+
+    Builders read ``generation(key)`` before loading the data and pass it
+    to ``put``; a payload whose key was invalidated in between is built
+    from outdated rows and is not stored.
+    """
+
+    def __init__(self):
+        self._payloads: dict[Hashable, CachedPayload] = {}
+        # Every invalidation takes the next number, so generations only grow
+        self._counter = itertools.count(1)
+        self._generations: dict[Hashable, int] = {}
+        self._cleared = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, now: datetime | None = None) -> CachedPayload | None:
+        """Get the cached payload for a key if it has not expired."""
+        payload = self._payloads.get(key)
+        if payload is not None and payload.expires_at is not None:
+            if (now or datetime.utcnow()) >= payload.expires_at:
+                self._payloads.pop(key, None)
+                payload = None
+
+        if payload is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return payload
+
+    def generation(self, key: Hashable) -> int:
+        """Number that changes whenever the key is invalidated."""
+        return max(self._generations.get(key, 0), self._cleared)
+
+    def put(self, key: Hashable, payload: CachedPayload, generation: int | None = None) -> bool:
+        """Store the payload for a key, unless invalidated since ``generation``.
+
+        Returns whether the payload was stored.
+        """
+        if generation is not None and generation != self.generation(key):
+            return False
+        self._payloads[key] = payload
+        return True
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """Drop cached payloads for the given keys."""
+        for key in keys:
+            self._generations[key] = next(self._counter)
+            if self._payloads.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop all cached payloads."""
+        self._payloads.clear()
+        self._generations.clear()
+        self._cleared = next(self._counter)
+
+    def stats(self) -> dict[str, int]:
+        """Hit, miss and invalidation counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "size": len(self._payloads),
+        }
+
+
+# Serialized /api/map/{year} responses, keyed by year
+map_payload_cache = PayloadCache()
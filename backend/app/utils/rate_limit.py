@@ -0,0 +1,36 @@
+"""Token-bucket rate limiting for outbound requests."""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Allow ``rate`` operations per second with bursts of up to ``capacity``.
+
+    Callers reserve a token synchronously and then sleep until it is due,
+    so concurrent callers queue up fairly without a lock and the bucket
+    can be shared across event loops.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Take a token; returns the seconds to wait before using it."""
+        if self.rate <= 0:
+            return 0.0
+
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self) -> None:
+        """Wait until a token is available."""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,57 @@
+"""In-process request coalescing (single-flight) for async work."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task instead of starting their own. A
+    caller that is cancelled (e.g. by a timeout) does not cancel the shared
+    work for the others.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn()`` for ``key``, or join the execution already in flight."""
+        self.calls += 1
+        task = self._inflight.get(key)
+
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every caller gave up waiting
+        if not task.cancelled():
+            task.exception()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of keys currently being executed."""
+        return len(self._inflight)
+
+    def stats(self) -> dict[str, int]:
+        """Counters for monitoring how much work was coalesced."""
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight,
+        }
@@ -0,0 +1,33 @@
+"""Vectorized helpers for per-year series with missing years (NaN)."""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Centered moving average along the first axis, ignoring missing values.
+
+    Each present value is replaced by the mean of the present values in the
+    ``window`` years around it; missing values stay missing.
+    """
+    if window <= 1 or len(values) == 0:
+        return values.copy()
+
+    present = ~np.isnan(values)
+    half = window // 2
+    padding = [(half, window - 1 - half)] + [(0, 0)] * (values.ndim - 1)
+    sums = sliding_window_view(
+        np.pad(np.where(present, values, 0.0), padding), window, axis=0
+    ).sum(axis=-1)
+    counts = sliding_window_view(np.pad(present, padding), window, axis=0).sum(axis=-1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(present, sums / counts, np.nan)
+
+
+def year_deltas(values: np.ndarray) -> np.ndarray:
+    """Change from the previous year along the first axis (NaN if either is missing)."""
+    deltas = np.full(values.shape, np.nan)
+    deltas[1:] = values[1:] - values[:-1]
+    return deltas
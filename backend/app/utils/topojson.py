@@ -0,0 +1,188 @@
+"""TopoJSON encoding: shared arcs, quantized and delta-encoded coordinates."""
+
+from typing import Any
+
+from app.utils.geometry import simplify_line
+
+QPoint = tuple[int, int]
+
+
+def _polygons(geometry: dict[str, Any] | None) -> list[list[list[list[float]]]]:
+    if not geometry:
+        return []
+    if geometry.get("type") == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry.get("type") == "MultiPolygon":
+        return geometry["coordinates"]
+    return []
+
+
+class _ArcBuilder:
+    """Splits quantized rings into arcs shared between neighbouring rings."""
+
+    def __init__(self, rings: list[list[QPoint]]):
+        self.arcs: list[list[QPoint]] = []
+        self._index: dict[tuple[QPoint, ...], int] = {}
+        self._junctions = self._find_junctions(rings)
+
+    @staticmethod
+    def _find_junctions(rings: list[list[QPoint]]) -> set[QPoint]:
+        """Points where rings meet with different neighbours (ends of shared borders)."""
+        neighbours: dict[QPoint, frozenset] = {}
+        junctions = set()
+
+        for ring in rings:
+            n = len(ring) - 1  # last point repeats the first
+            for i in range(n):
+                point = ring[i]
+                pair = frozenset((ring[i - 1] if i else ring[n - 1], ring[i + 1]))
+                seen = neighbours.setdefault(point, pair)
+                if seen != pair:
+                    junctions.add(point)
+        return junctions
+
+    def _arc_id(self, points: list[QPoint]) -> int:
+        """Index of an arc, ~index if it is stored in the reverse direction."""
+        key = tuple(points)
+        if key in self._index:
+            return self._index[key]
+
+        reverse = key[::-1]
+        if reverse in self._index:
+            return ~self._index[reverse]
+
+        self._index[key] = len(self.arcs)
+        self.arcs.append(points)
+        return self._index[key]
+
+    def ring_arcs(self, ring: list[QPoint]) -> list[int]:
+        """Arc ids forming a closed ring."""
+        open_ring = ring[:-1]
+        cuts = [i for i, point in enumerate(open_ring) if point in self._junctions]
+
+        if not cuts:
+            # Rotate to a canonical start so identical rings share one arc
+            # (in either direction, see _arc_id)
+            start = open_ring.index(min(open_ring))
+            rotated = open_ring[start:] + open_ring[:start]
+            return [self._arc_id(rotated + rotated[:1])]
+
+        rotated = open_ring[cuts[0]:] + open_ring[:cuts[0]]
+        cuts = [i - cuts[0] for i in cuts] + [len(rotated)]
+        rotated.append(rotated[0])
+        return [self._arc_id(rotated[a:b + 1]) for a, b in zip(cuts, cuts[1:])]
+
+
+def _quantize_ring(ring: list[list[float]], x0: float, y0: float, kx: float, ky: float):
+    result: list[QPoint] = []
+    for x, y, *_ in ring:
+        point = (round((x - x0) / kx), round((y - y0) / ky))
+        if not result or result[-1] != point:
+            result.append(point)
+    if result and result[0] != result[-1]:
+        result.append(result[0])
+    return result if len(result) >= 4 else None
+
+
+def _delta_encode(arc: list[QPoint]) -> list[list[int]]:
+    encoded = [list(arc[0])]
+    for (px, py), (x, y) in zip(arc, arc[1:]):
+        encoded.append([x - px, y - py])
+    return encoded
+
+
+def build_topology(
+    features: list[dict[str, Any]],
+    quantization: int = 100_000,
+    tolerance: float = 0.0,
+    object_name: str = "regions",
+) -> dict[str, Any]:
+    """
+    Encode GeoJSON (Multi)Polygon features as a TopoJSON topology.
+
+    Coordinates are quantized onto a ``quantization`` x ``quantization``
+    grid, borders shared by neighbouring regions are stored once, and each
+    arc is simplified (endpoints kept) with ``tolerance`` in degrees so
+    that neighbours stay seamless. Rings that collapse are dropped, but
+    every feature keeps at least its largest polygon.
+    """
+    points = [
+        point
+        for feature in features
+        for polygon in _polygons(feature.get("geometry"))
+        for ring in polygon
+        for point in ring
+    ]
+    if not points:
+        return {
+            "type": "Topology",
+            "objects": {object_name: {"type": "GeometryCollection", "geometries": []}},
+            "arcs": [],
+        }
+
+    x0 = min(point[0] for point in points)
+    y0 = min(point[1] for point in points)
+    x1 = max(point[0] for point in points)
+    y1 = max(point[1] for point in points)
+    kx = (x1 - x0) / (quantization - 1) or 1.0
+    ky = (y1 - y0) / (quantization - 1) or 1.0
+
+    # Quantize: feature -> polygons -> rings
+    quantized = []
+    for feature in features:
+        polygons = []
+        for polygon in _polygons(feature.get("geometry")):
+            rings = [_quantize_ring(ring, x0, y0, kx, ky) for ring in polygon]
+            if rings and rings[0] is not None:
+                polygons.append([ring for ring in rings if ring is not None])
+        quantized.append(polygons)
+
+    builder = _ArcBuilder([ring for polygons in quantized for p in polygons for ring in p])
+    arc_rings = [
+        [[builder.ring_arcs(ring) for ring in polygon] for polygon in polygons]
+        for polygons in quantized
+    ]
+
+    # Simplify each shared arc once, in grid units
+    grid_tolerance = tolerance / min(kx, ky) if tolerance > 0 else 0.0
+    arcs = [simplify_line(arc, grid_tolerance) for arc in builder.arcs]
+
+    def ring_size(ring: list[int]) -> int:
+        return sum(len(arcs[~i if i < 0 else i]) - 1 for i in ring)
+
+    geometries = []
+    for feature, polygons in zip(features, arc_rings):
+        kept = []
+        for polygon in polygons:
+            if ring_size(polygon[0]) < 3:
+                continue
+            kept.append([polygon[0], *(ring for ring in polygon[1:] if ring_size(ring) >= 3)])
+
+        if not kept and polygons:
+            # Keep the largest polygon at full resolution, on private arcs
+            largest = max(polygons, key=lambda p: ring_size(p[0]))
+            outline = [
+                point
+                for i in largest[0]
+                for point in (builder.arcs[i] if i >= 0 else builder.arcs[~i][::-1])[:-1]
+            ]
+            arcs.append(outline + outline[:1])
+            kept = [[[len(arcs) - 1]]]
+
+        geometry = {
+            "type": "MultiPolygon",
+            "arcs": kept,
+        }
+        if feature.get("id") is not None:
+            geometry["id"] = feature["id"]
+        if feature.get("properties"):
+            geometry["properties"] = feature["properties"]
+        geometries.append(geometry)
+
+    return {
+        "type": "Topology",
+        "bbox": [x0, y0, x1, y1],
+        "transform": {"scale": [kx, ky], "translate": [x0, y0]},
+        "objects": {object_name: {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": [_delta_encode(arc) for arc in arcs],
+    }
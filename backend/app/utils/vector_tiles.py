@@ -0,0 +1,281 @@
+"""Mapbox Vector Tile (MVT 2.1) encoding of region polygons, with a disk cache."""
+
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable
+
+EXTENT = 4096
+BUFFER = 64
+LAYER_NAME = "regions"
+
+# MVT geometry commands and types
+_MOVE_TO = 1
+_LINE_TO = 2
+_CLOSE_PATH = 7
+_POLYGON = 3
+_MAX_LAT = 85.0511287798
+
+
+# --- protobuf wire format --------------------------------------------------
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 31)
+
+
+def _field_varint(field: int, value: int) -> bytes:
+    return _varint(field << 3) + _varint(value)
+
+
+def _field_bytes(field: int, value: bytes) -> bytes:
+    return _varint((field << 3) | 2) + _varint(len(value)) + value
+
+
+def _field_packed(field: int, values: list[int]) -> bytes:
+    return _field_bytes(field, b"".join(_varint(v) for v in values))
+
+
+# --- projection and clipping -----------------------------------------------
+
+def tile_bounds(z: int, x: int, y: int) -> tuple[float, float, float, float]:
+    """Longitude/latitude bounds (west, south, east, north) of a tile."""
+    n = 2 ** z
+
+    def lat(row: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360 - 180, lat(y + 1), (x + 1) / n * 360 - 180, lat(y)
+
+
+def _project(lon: float, lat: float, z: int, x: int, y: int) -> tuple[float, float]:
+    """Project lon/lat to tile-local coordinates in [0, EXTENT]."""
+    n = 2 ** z
+    lat = max(-_MAX_LAT, min(_MAX_LAT, lat))
+    world_x = (lon + 180) / 360 * n
+    sin_lat = math.sin(math.radians(lat))
+    world_y = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * n
+    return (world_x - x) * EXTENT, (world_y - y) * EXTENT
+
+
+def _clip_ring(ring: list[tuple[float, float]], lo: float, hi: float) -> list[tuple[float, float]]:
+    """Sutherland-Hodgman clipping of a ring against the square [lo, hi]^2."""
+    def clip(points, inside, intersect):
+        result = []
+        for i, current in enumerate(points):
+            previous = points[i - 1]
+            if inside(current):
+                if not inside(previous):
+                    result.append(intersect(previous, current))
+                result.append(current)
+            elif inside(previous):
+                result.append(intersect(previous, current))
+        return result
+
+    def at_x(edge):
+        return lambda p, q: (edge, p[1] + (q[1] - p[1]) * (edge - p[0]) / (q[0] - p[0]))
+
+    def at_y(edge):
+        return lambda p, q: (p[0] + (q[0] - p[0]) * (edge - p[1]) / (q[1] - p[1]), edge)
+
+    points = ring
+    for inside, intersect in (
+        (lambda p: p[0] >= lo, at_x(lo)),
+        (lambda p: p[0] <= hi, at_x(hi)),
+        (lambda p: p[1] >= lo, at_y(lo)),
+        (lambda p: p[1] <= hi, at_y(hi)),
+    ):
+        if not points:
+            break
+        points = clip(points, inside, intersect)
+    return points
+
+
+def _signed_area(ring: list[tuple[int, int]]) -> int:
+    return sum(
+        x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1])
+    )
+
+
+def _polygon_commands(polygons: list[list[list[tuple[int, int]]]]) -> list[int]:
+    """Encode polygons as MVT geometry commands."""
+    commands: list[int] = []
+    cursor = (0, 0)
+
+    for polygon in polygons:
+        for index, ring in enumerate(polygon):
+            # Exterior rings wind clockwise in tile space (positive area, y down),
+            # interior rings counter-clockwise
+            if (_signed_area(ring) > 0) != (index == 0):
+                ring = ring[::-1]
+
+            commands.append((_MOVE_TO & 0x7) | (1 << 3))
+            commands += [_zigzag(ring[0][0] - cursor[0]), _zigzag(ring[0][1] - cursor[1])]
+            cursor = ring[0]
+
+            commands.append((_LINE_TO & 0x7) | ((len(ring) - 1) << 3))
+            for point in ring[1:]:
+                commands += [_zigzag(point[0] - cursor[0]), _zigzag(point[1] - cursor[1])]
+                cursor = point
+
+            commands.append((_CLOSE_PATH & 0x7) | (1 << 3))
+    return commands
+
+
+def _tile_ring(ring, z: int, x: int, y: int) -> list[tuple[int, int]] | None:
+    projected = [_project(lon, lat, z, x, y) for lon, lat, *_ in ring]
+    clipped = _clip_ring(projected[:-1], -BUFFER, EXTENT + BUFFER)
+
+    result: list[tuple[int, int]] = []
+    for px, py in clipped:
+        point = (round(px), round(py))
+        if not result or result[-1] != point:
+            result.append(point)
+    if len(result) > 1 and result[0] == result[-1]:
+        result.pop()
+    if len(result) < 3 or _signed_area(result) == 0:
+        return None
+    return result
+
+
+def _feature_bbox(geometry: dict[str, Any]) -> tuple[float, float, float, float]:
+    polygons = geometry["coordinates"] if geometry["type"] == "MultiPolygon" else [
+        geometry["coordinates"]
+    ]
+    lons = [p[0] for polygon in polygons for p in polygon[0]]
+    lats = [p[1] for polygon in polygons for p in polygon[0]]
+    return min(lons), min(lats), max(lons), max(lats)
+
+
+def render_tile(features: list[dict[str, Any]], z: int, x: int, y: int) -> bytes:
+    """
+    Encode the polygon features intersecting a tile as an MVT tile.
+
+    Features are GeoJSON dicts with ``id``, ``properties`` and a Polygon or
+    MultiPolygon ``geometry``. Returns empty bytes if no feature intersects.
+    """
+    west, south, east, north = tile_bounds(z, x, y)
+    pad_x = (east - west) * BUFFER / EXTENT
+    pad_y = (north - south) * BUFFER / EXTENT
+
+    keys: dict[str, int] = {}
+    values: dict[str, int] = {}
+    encoded_features = []
+
+    for feature_id, feature in enumerate(features, start=1):
+        geometry = feature.get("geometry")
+        if not geometry or geometry.get("type") not in ("Polygon", "MultiPolygon"):
+            continue
+
+        min_lon, min_lat, max_lon, max_lat = _feature_bbox(geometry)
+        if (
+            max_lon < west - pad_x or min_lon > east + pad_x
+            or max_lat < south - pad_y or min_lat > north + pad_y
+        ):
+            continue
+
+        source = geometry["coordinates"]
+        if geometry["type"] == "Polygon":
+            source = [source]
+
+        polygons = []
+        for polygon in source:
+            exterior = _tile_ring(polygon[0], z, x, y)
+            if exterior is None:
+                continue
+            holes = [_tile_ring(ring, z, x, y) for ring in polygon[1:]]
+            polygons.append([exterior, *(hole for hole in holes if hole is not None)])
+
+        if not polygons:
+            continue
+
+        tags = []
+        for key, value in (feature.get("properties") or {}).items():
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault(str(value), len(values)))
+
+        encoded_features.append(
+            _field_varint(1, feature_id)
+            + _field_packed(2, tags)
+            + _field_varint(3, _POLYGON)
+            + _field_packed(4, _polygon_commands(polygons))
+        )
+
+    if not encoded_features:
+        return b""
+
+    layer = (
+        _field_varint(15, 2)
+        + _field_bytes(1, LAYER_NAME.encode())
+        + b"".join(_field_bytes(2, feature) for feature in encoded_features)
+        + b"".join(_field_bytes(3, key.encode()) for key in keys)
+        + b"".join(_field_bytes(4, _field_bytes(1, value.encode())) for value in values)
+        + _field_varint(5, EXTENT)
+    )
+    return _field_bytes(3, layer)
+
+
+def tiles_covering(
+    bbox: tuple[float, float, float, float], z: int
+) -> list[tuple[int, int, int]]:
+    """Tiles of zoom ``z`` intersecting a lon/lat bounding box."""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    n = 2 ** z
+
+    def column(lon: float) -> int:
+        return min(n - 1, max(0, int((lon + 180) / 360 * n)))
+
+    def row(lat: float) -> int:
+        _, world_y = _project(0.0, lat, 0, 0, 0)
+        return min(n - 1, max(0, int(world_y / EXTENT * n)))
+
+    return [
+        (z, x, y)
+        for x in range(column(min_lon), column(max_lon) + 1)
+        for y in range(row(max_lat), row(min_lat) + 1)
+    ]
+
+
+class TileCache:
+    """Rendered tiles persisted under ``<root>/<version>/<z>/<x>/<y>.mvt``.
+
+    The version is the content hash of the source geometry, so tiles of an
+    outdated GeoJSON file are never served.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, version: str, z: int, x: int, y: int) -> Path:
+        return self.root / version / str(z) / str(x) / f"{y}.mvt"
+
+    def get_or_render(
+        self, version: str, z: int, x: int, y: int, render: Callable[[], bytes]
+    ) -> bytes:
+        """Read a tile from disk, rendering and storing it on a miss."""
+        path = self._path(version, z, x, y)
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            pass
+
+        tile = render()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write atomically so concurrent readers never see partial tiles
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(tile)
+        os.replace(tmp, path)
+        return tile
@@ -0,0 +1,106 @@
+"""Memory footprint and read latency of the emotion cube vs. the database.
+
+Run from ``backend/``::
+
+    python -m benchmarks.emotion_cube [--regions 17] [--repeat 200]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import MAX_YEAR, MIN_YEAR
+from app.database import Base
+from app.models import RegionData
+from app.repository import get_region_rows_for_year, get_region_rows_for_years
+from app.utils import EmotionCube
+
+
+def _rows(regions: int) -> list[RegionData]:
+    rng = random.Random(0)
+    rows = []
+    for year in range(MIN_YEAR, MAX_YEAR + 1):
+        for i in range(regions):
+            fear, joy, sadness = rng.random() / 3, rng.random() / 3, rng.random() / 3
+            rows.append(RegionData(
+                year=year,
+                region_name=f"region-{i}",
+                geo_id=f"geo-{i}",
+                fear=fear,
+                joy=joy,
+                neutral=1 - fear - joy - sadness,
+                sadness=sadness,
+                diary_count=rng.randint(1, 500),
+                updated_at=datetime.utcnow(),
+            ))
+    return rows
+
+
+async def _timed(fn, repeat: int) -> float:
+    """Median latency of an async callable in microseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+async def main(regions: int, repeat: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    rows = _rows(regions)
+    async with sessions() as db:
+        db.add_all(rows)
+        await db.commit()
+
+    cube = EmotionCube()
+    cube.update(rows)
+    year = (MIN_YEAR + MAX_YEAR) // 2
+
+    async def db_year():
+        async with sessions() as db:
+            await get_region_rows_for_year(db, year)
+
+    async def db_range():
+        async with sessions() as db:
+            await get_region_rows_for_years(db, MIN_YEAR, MAX_YEAR)
+
+    async def cube_year():
+        cube.rows_for_year(year)
+
+    async def cube_year_cold():
+        # First read after a write builds the cells of the year
+        cube._build_cells(year)
+
+    async def cube_range():
+        cube.rows_for_years(MIN_YEAR, MAX_YEAR)
+
+    stats = cube.stats()
+    print(f"{stats['years']} years x {stats['regions']} regions = {stats['cells']} cells")
+    print(f"cube arrays: {stats['bytes'] / 1024:.1f} KiB")
+    print(f"{'read':<14}{'database':>12}{'cube':>12}")
+    for name, db_read, cube_read in (
+        ("one year", db_year, cube_year),
+        ("year (cold)", db_year, cube_year_cold),
+        ("all years", db_range, cube_range),
+    ):
+        db_us = await _timed(db_read, repeat)
+        cube_us = await _timed(cube_read, repeat)
+        print(f"{name:<14}{db_us:>10.1f}us{cube_us:>10.1f}us")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--regions", type=int, default=17)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.regions, args.repeat))
@@ -0,0 +1,121 @@
+"""Read and write throughput of a SQLite file under concurrent load.
+
+Compares a default engine with the tuned engines of ``app.database``
+(WAL, pragmas, sized pool and a separate read-only engine). Run from
+``backend/``::
+
+    python -m benchmarks.sqlite_concurrency [--readers 8] [--writers 2] [--seconds 5]
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import MAX_YEAR, MIN_YEAR
+from app.database import Base, create_engine
+from app.models import RegionData
+from app.repository import get_region_rows_for_year
+
+
+def _rows(regions: int) -> list[RegionData]:
+    return [
+        RegionData(
+            year=year,
+            region_name=f"region-{i}",
+            geo_id=f"geo-{i}",
+            fear=0.25,
+            joy=0.25,
+            neutral=0.25,
+            sadness=0.25,
+            diary_count=10,
+            updated_at=datetime.utcnow(),
+        )
+        for year in range(MIN_YEAR, MAX_YEAR + 1)
+        for i in range(regions)
+    ]
+
+
+async def _run(
+    write_engine: AsyncEngine, read_engine: AsyncEngine, readers: int, writers: int, seconds: float
+) -> dict[str, int]:
+    write_sessions = async_sessionmaker(write_engine, class_=AsyncSession, expire_on_commit=False)
+    read_sessions = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    deadline = time.perf_counter() + seconds
+    rng = random.Random(0)
+
+    async def reader():
+        while time.perf_counter() < deadline:
+            try:
+                async with read_sessions() as db:
+                    await get_region_rows_for_year(db, rng.randint(MIN_YEAR, MAX_YEAR))
+                counts["reads"] += 1
+            except OperationalError:
+                counts["errors"] += 1
+
+    async def writer():
+        while time.perf_counter() < deadline:
+            try:
+                async with write_sessions() as db:
+                    await db.execute(
+                        update(RegionData)
+                        .where(RegionData.year == rng.randint(MIN_YEAR, MAX_YEAR))
+                        .values(updated_at=datetime.utcnow())
+                    )
+                    await db.commit()
+                counts["writes"] += 1
+            except OperationalError:
+                counts["errors"] += 1
+
+    await asyncio.gather(*[reader() for _ in range(readers)], *[writer() for _ in range(writers)])
+    return counts
+
+
+async def _bench(name: str, url: str, tuned: bool, args) -> None:
+    if tuned:
+        write_engine = create_engine(url)
+        read_engine = create_engine(url, read_only=True)
+    else:
+        write_engine = read_engine = create_async_engine(url)
+
+    async with write_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(write_engine)() as db:
+        db.add_all(_rows(args.regions))
+        await db.commit()
+
+    counts = await _run(write_engine, read_engine, args.readers, args.writers, args.seconds)
+    print(
+        f"{name:<10}{counts['reads'] / args.seconds:>12.0f}"
+        f"{counts['writes'] / args.seconds:>12.0f}{counts['errors']:>10}"
+    )
+    if read_engine is not write_engine:
+        await read_engine.dispose()
+    await write_engine.dispose()
+
+
+async def main(args) -> None:
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s")
+    print(f"{'engine':<10}{'reads/s':>12}{'writes/s':>12}{'errors':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, tuned in (("default", False), ("tuned", True)):
+            url = f"sqlite+aiosqlite:///{Path(tmp) / f'{name}.db'}"
+            await _bench(name, url, tuned, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--regions", type=int, default=17)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args))
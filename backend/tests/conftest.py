@@ -3,14 +3,17 @@
 import asyncio
 from pathlib import Path
 
+import httpx
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_read_db
 from app.config import settings
+from app.services import ml_service, region_refresh_service, scraper_service
+from app.utils import HttpCache, emotion_cube, map_payload_cache
 
 
 # Test database URL
@@ -46,6 +49,30 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def ml_cache():
+    """Keep memoized sentiment results from leaking between tests."""
+    ml_service.session_factory = TestSessionLocal
+    ml_service.clear_cache()
+    yield ml_service
+    ml_service.clear_cache()
+
+
+@pytest.fixture(autouse=True)
+def scraper_transport(monkeypatch, tmp_path):
+    """Answer outbound scraper requests locally (404, so mock diaries are used)."""
+    transport = httpx.MockTransport(lambda request: httpx.Response(404))
+    monkeypatch.setattr(scraper_service, "transport", transport)
+    monkeypatch.setattr(scraper_service, "_client", None)
+    monkeypatch.setattr(
+        scraper_service, "cache", HttpCache(tmp_path / "http_cache", 1024 * 1024)
+    )
+    # No need to be polite to a local transport
+    monkeypatch.setattr(settings, "scraper_delay", 0)
+    monkeypatch.setattr(scraper_service, "_buckets", {})
+    return transport
+
+
 @pytest_asyncio.fixture(scope="function")
 async def db_session():
     """Create a test database session."""
@@ -57,12 +84,19 @@ async def db_session():
 
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+    # The in-memory database lives on one pooled connection whose asyncio
+    # lock binds to the test's event loop; start the next test afresh
+    await test_engine.dispose()
 
 
 @pytest_asyncio.fixture(scope="function")
 async def client(db_session):
     """Create test client with overridden database."""
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    region_refresh_service.session_factory = TestSessionLocal
+    map_payload_cache.clear()
+    emotion_cube.clear()
 
     async with AsyncClient(
         transport=ASGITransport(app=app),
@@ -70,6 +104,7 @@ async def client(db_session):
     ) as ac:
         yield ac
 
+    await region_refresh_service.wait_background()
     app.dependency_overrides.clear()
 
 
@@ -67,6 +67,90 @@ async def test_get_region_detail(client: AsyncClient, mock_geojson):
     assert "stats" in data
 
 
+@pytest.mark.asyncio
+async def test_region_detail_unknown_region(client: AsyncClient, mock_geojson):
+    """Test that only registry regions are refreshed, under their canonical name."""
+    from app.utils import emotion_cube
+
+    response = await client.get("/api/region/1941/Атлантида")
+    assert response.status_code == 404
+    assert (await client.get("/api/region/Атлантида/timeline")).status_code == 404
+
+    response = await client.get("/api/region/1941/московская область")
+    assert response.status_code == 200
+    assert response.json()["name"] == "Московская область"
+    assert set(emotion_cube.rows_for_year(1941)) == {"Московская область"}
+
+
+@pytest.mark.asyncio
+async def test_region_detail_pages_stored_entries(client: AsyncClient, mock_geojson):
+    """Test that cached diary entries are paged with offset and limit."""
+    url = "/api/region/1941/Московская область"
+    computed = (await client.get(url, params={"limit": 100})).json()
+    total = computed["entries_total"]
+    assert total == len(computed["diary_entries"]) > 1
+    assert computed["diary_count"] >= total
+
+    page = (await client.get(url, params={"offset": 1, "limit": 1})).json()
+
+    assert page["entries_total"] == total
+    assert page["diary_entries"] == computed["diary_entries"][1:2]
+    assert page["stats"] == computed["stats"]
+
+    response = await client.get(url, params={"limit": 0})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_region_detail_caches_empty_result(client: AsyncClient, mock_geojson, monkeypatch):
+    """Test that a region without diaries is cached instead of scraped on every request."""
+    from app.services import region_refresh_service
+    from app.utils import NEUTRAL_SCORES
+
+    calls = []
+
+    async def no_diaries(region_name, year, timeout=None):
+        calls.append((region_name, year))
+        return {"emotions": dict(NEUTRAL_SCORES), "diary_entries": [], "diary_count": 0}
+
+    monkeypatch.setattr(region_refresh_service, "compute_region", no_diaries)
+
+    for _ in range(2):
+        response = await client.get("/api/region/1947/Московская область")
+        assert response.status_code == 200
+        assert response.json()["diary_count"] == 0
+
+    assert calls == [("Московская область", 1947)]
+
+
+@pytest.mark.asyncio
+async def test_region_timeline(client: AsyncClient, mock_geojson):
+    """Test the per-year series of a region, smoothed and with deltas."""
+    for year in (1941, 1943):
+        await client.get(f"/api/region/{year}/Московская область")
+
+    url = "/api/region/московская область/timeline"
+    response = await client.get(url, params={"from": 1940, "to": 1944})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["name"] == "Московская область"
+    assert data["years"] == [1940, 1941, 1942, 1943, 1944]
+    assert data["emotions"]["fear"][0] is None
+    assert data["emotions"]["fear"][1] is not None
+    assert [count > 0 for count in data["diary_count"]] == [False, True, False, True, False]
+    assert len(data["population"]) == 5 and all(data["population"])
+    assert data["deltas"] is None
+
+    smoothed = (await client.get(url, params={"window": 5, "deltas": True})).json()
+    assert smoothed["window"] == 5
+    assert len(smoothed["years"]) == 72
+    fear = [value for value in smoothed["emotions"]["fear"] if value is not None]
+    assert len(fear) == 2 and fear[0] == fear[1]
+
+    response = await client.get("/api/region/Атлантида/timeline")
+    assert response.status_code == 404
+
+
 @pytest.mark.asyncio
 async def test_region_caching(client: AsyncClient, mock_geojson):
     """Test that region data is cached and returns consistent results."""
@@ -109,3 +193,405 @@ async def test_root_endpoint(client: AsyncClient):
     data = response.json()
     assert "message" in data
     assert "version" in data
+
+
+@pytest.mark.asyncio
+async def test_map_data_single_row_per_region(client: AsyncClient, mock_geojson, db_session):
+    """Test that repeated map requests keep one cached row per region and year."""
+    from sqlalchemy import func, select
+
+    from app.models import RegionData
+
+    await client.get("/api/map/1942")
+    await client.get("/api/map/1942")
+
+    result = await db_session.execute(
+        select(RegionData.region_name, func.count())
+        .where(RegionData.year == 1942)
+        .group_by(RegionData.region_name)
+    )
+    counts = dict(result.all())
+    assert counts == {"Московская область": 1, "Ленинградская область": 1}
+
+
+async def _age_region_rows(db_session, year: int, seconds: int):
+    """Backdate cached rows of a year to simulate cache expiry."""
+    from datetime import datetime, timedelta
+
+    from sqlalchemy import update
+
+    from app.models import RegionData
+    from app.utils import emotion_cube, map_payload_cache
+
+    # Payloads and cube cells built from the rows would be updated with them
+    map_payload_cache.clear()
+    emotion_cube.clear()
+    await db_session.execute(
+        update(RegionData)
+        .where(RegionData.year == year)
+        .values(fear=0.0, joy=0.0, neutral=1.0, sadness=0.0,
+                updated_at=datetime.utcnow() - timedelta(seconds=seconds))
+    )
+    await db_session.commit()
+
+
+@pytest.mark.asyncio
+async def test_stale_region_served_and_revalidated(client: AsyncClient, mock_geojson, db_session):
+    """Test that stale rows are served immediately and refreshed in the background."""
+    from app.config import settings
+    from app.services import region_refresh_service
+
+    await client.get("/api/map/1943")
+    await _age_region_rows(db_session, 1943, settings.cache_ttl + 60)
+
+    response = await client.get("/api/map/1943")
+    assert response.status_code == 200
+    # Stale values are served as is
+    assert all(r["emotions"]["neutral"] == 1.0 for r in response.json()["regions"])
+
+    await region_refresh_service.wait_background()
+
+    response = await client.get("/api/map/1943")
+    assert any(r["emotions"]["neutral"] < 1.0 for r in response.json()["regions"])
+
+
+@pytest.mark.asyncio
+async def test_stale_cell_renewed_elsewhere_not_scraped(
+    client: AsyncClient, mock_geojson, db_session, monkeypatch
+):
+    """Test that a cell stale in the cube but fresh in the database is not refreshed."""
+    from datetime import datetime
+
+    from sqlalchemy import update
+
+    from app.config import settings
+    from app.models import RegionData
+    from app.repository import get_region_rows_for_year
+    from app.services import region_refresh_service
+    from app.services.region_refresh import FRESH, STALE, cache_state
+    from app.utils import emotion_cube
+
+    await client.get("/api/map/1943")
+    await _age_region_rows(db_session, 1943, settings.cache_ttl + 60)
+    emotion_cube.update((await get_region_rows_for_year(db_session, 1943)).values())
+    # Another process renews the rows; this process' cube still has them stale
+    await db_session.execute(
+        update(RegionData).where(RegionData.year == 1943).values(updated_at=datetime.utcnow())
+    )
+    await db_session.commit()
+    assert cache_state(emotion_cube.rows_for_year(1943)["Московская область"]) == STALE
+
+    async def fail_compute(region_name, year, timeout=None):
+        raise AssertionError("refreshed a fresh row")
+
+    monkeypatch.setattr(region_refresh_service, "compute_region", fail_compute)
+
+    await client.get("/api/map/1943")
+    await region_refresh_service.wait_background()
+
+    assert cache_state(emotion_cube.rows_for_year(1943)["Московская область"]) == FRESH
+
+
+@pytest.mark.asyncio
+async def test_hard_expired_region_refreshed_before_serving(
+    client: AsyncClient, mock_geojson, db_session
+):
+    """Test that rows past the hard TTL are refreshed before responding."""
+    from app.config import settings
+
+    await client.get("/api/region/1943/Московская область")
+    await _age_region_rows(db_session, 1943, settings.cache_hard_ttl + 60)
+
+    response = await client.get("/api/region/1943/Московская область")
+    assert response.status_code == 200
+    assert response.json()["emotions"]["neutral"] < 1.0
+
+
+@pytest.mark.asyncio
+async def test_region_detail_falls_back_when_refresh_times_out(
+    client: AsyncClient, mock_geojson, db_session, monkeypatch
+):
+    """Test that a timed out detail refresh serves the expired row, or 503 without one."""
+    from app.config import settings
+    from app.services import region_refresh_service
+
+    url = "/api/region/1943/Московская область"
+    cached = (await client.get(url)).json()
+    await _age_region_rows(db_session, 1943, settings.cache_hard_ttl + 60)
+
+    async def timed_out(region_name, year, timeout=None):
+        raise TimeoutError
+
+    monkeypatch.setattr(region_refresh_service, "compute_region", timed_out)
+
+    response = await client.get(url)
+    assert response.status_code == 200
+    # The aged row, with its stored entries
+    assert response.json()["emotions"]["neutral"] == 1.0
+    assert response.json()["diary_entries"] == cached["diary_entries"]
+
+    response = await client.get("/api/region/1944/Московская область")
+    assert response.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client: AsyncClient):
+    """Test metrics endpoint exposes refresh coalescing counters."""
+    response = await client.get("/api/metrics")
+
+    assert response.status_code == 200
+    refresh = response.json()["refresh"]
+    assert "coalesced" in refresh
+    assert "executions" in refresh
+    assert "waiting" in response.json()["ml"]
+    assert "refreshed" in response.json()["scheduler"]
+
+
+@pytest.mark.asyncio
+async def test_map_data_etag_not_modified(client: AsyncClient, mock_geojson):
+    """Test that map responses carry an ETag and honour If-None-Match."""
+    response = await client.get("/api/map/1944")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert "max-age" in response.headers["cache-control"]
+
+    response = await client.get("/api/map/1944", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = await client.get("/api/map/1944", headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+    assert response.headers["etag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_map_payload_invalidated_on_region_write(client: AsyncClient, mock_geojson):
+    """Test that writing a region row drops the year's materialized payload."""
+    from app.services import region_refresh_service
+    from app.utils import NEUTRAL_SCORES, map_payload_cache
+
+    await client.get("/api/map/1944")
+    assert map_payload_cache.get(1944) is not None
+
+    # A region write, e.g. by a background refresh, invalidates 1944
+    await region_refresh_service.store_results(1944, {
+        "Московская область": {
+            "emotions": dict(NEUTRAL_SCORES),
+            "diary_entries": [{"text": "день"}],
+        }
+    })
+    assert map_payload_cache.get(1944) is None
+
+
+@pytest.mark.asyncio
+async def test_map_payload_not_cached_after_concurrent_write(
+    client: AsyncClient, mock_geojson, monkeypatch
+):
+    """Test that a payload invalidated while it was built is not materialized."""
+    from app.services import region_refresh_service
+    from app.utils import map_payload_cache
+
+    refresh_regions = region_refresh_service.refresh_regions
+
+    async def refresh_with_concurrent_write(region_names, year, timeout=None):
+        # Another writer commits rows of the year while this request scrapes
+        map_payload_cache.invalidate(year)
+        return await refresh_regions(region_names, year, timeout)
+
+    monkeypatch.setattr(region_refresh_service, "refresh_regions", refresh_with_concurrent_write)
+
+    assert (await client.get("/api/map/1946")).status_code == 200
+    assert map_payload_cache.get(1946) is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_map_misses_write_once(client: AsyncClient, mock_geojson, monkeypatch):
+    """Test that requests coalesced on one refresh write its result only once."""
+    import asyncio
+
+    from app.services import region_refresh
+
+    written = []
+    upsert = region_refresh.upsert_region_results
+
+    async def counting_upsert(db, results, geo_ids=None):
+        written.extend(results)
+        await upsert(db, results, geo_ids)
+
+    monkeypatch.setattr(region_refresh, "upsert_region_results", counting_upsert)
+
+    responses = await asyncio.gather(*(client.get("/api/map/1950") for _ in range(10)))
+
+    assert all(response.status_code == 200 for response in responses)
+    assert sorted(written) == [(1950, "Ленинградская область"), (1950, "Московская область")]
+
+
+@pytest.mark.asyncio
+async def test_refresh_releases_read_connection(
+    client: AsyncClient, mock_geojson, tmp_path, monkeypatch
+):
+    """Test that map and detail reads return their pooled connection before refreshing."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    from app.database import Base, create_engine, get_read_db
+    from app.main import app
+    from app.services import region_refresh_service
+
+    read_engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'read.db'}")
+    async with read_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    read_sessions = async_sessionmaker(read_engine, expire_on_commit=False)
+
+    async def get_file_read_db():
+        async with read_sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_read_db] = get_file_read_db
+    checked_out = []
+    compute_region = region_refresh_service.compute_region
+
+    async def recording_compute(region_name, year, timeout=None):
+        checked_out.append(read_engine.pool.checkedout())
+        return await compute_region(region_name, year, timeout)
+
+    monkeypatch.setattr(region_refresh_service, "compute_region", recording_compute)
+    try:
+        await client.get("/api/map/1952")
+        await client.get("/api/map", params={"from": 1953, "to": 1953})
+        await client.get("/api/region/1954/Московская область")
+    finally:
+        await read_engine.dispose()
+
+    assert len(checked_out) == 5
+    assert set(checked_out) == {0}
+
+
+@pytest.mark.asyncio
+async def test_get_map_range(client: AsyncClient, mock_geojson):
+    """Test that a year range is returned as compact NDJSON, one line per year."""
+    import json
+
+    await client.get("/api/map/1940")
+
+    response = await client.get("/api/map", params={"from": 1939, "to": 1941})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    header, *lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["name"] for r in header["regions"]] == ["Московская область", "Ленинградская область"]
+    assert header["fields"] == ["fear", "joy", "neutral", "sadness", "diary_count"]
+
+    # Cached 1940 is streamed before the years that need a refresh
+    assert lines[0]["year"] == 1940
+    assert sorted(line["year"] for line in lines) == [1939, 1940, 1941]
+    for line in lines:
+        assert len(line["values"]) == 2
+        assert all(len(values) == 5 for values in line["values"])
+
+
+@pytest.mark.asyncio
+async def test_map_diary_count_beyond_sample(client: AsyncClient, mock_geojson, monkeypatch):
+    """Test that fresh and cached map reads count all entries, not the stored sample."""
+    import json
+
+    from app.config import settings
+    from app.services import scraper_service
+    from app.utils import map_payload_cache
+    from tests.test_scraper import _paged_handler
+
+    monkeypatch.setattr(settings, "diary_sample_size", 5)
+    monkeypatch.setattr(settings, "scraper_page_size", 50)
+    monkeypatch.setattr(scraper_service, "transport", _paged_handler(150, place=None))
+
+    fresh = (await client.get("/api/map/1950")).json()
+    assert {region["diary_count"] for region in fresh["regions"]} == {150}
+
+    response = await client.get("/api/map", params={"from": 1951, "to": 1951})
+    line = json.loads(response.text.splitlines()[1])
+    assert {values[4] for values in line["values"]} == {150}
+
+    map_payload_cache.clear()
+    cached = (await client.get("/api/map/1950")).json()
+    assert cached == fresh
+
+
+@pytest.mark.asyncio
+async def test_map_reads_served_from_emotion_cube(client: AsyncClient, mock_geojson, monkeypatch):
+    """Test that cached years are served without querying the database."""
+    from app.routers import map as map_router
+    from app.utils import map_payload_cache
+
+    first = (await client.get("/api/map/1945")).json()
+    map_payload_cache.clear()
+
+    async def no_db(*args, **kwargs):
+        raise AssertionError("database queried")
+
+    monkeypatch.setattr(map_router, "get_region_rows_for_year", no_db)
+    monkeypatch.setattr(map_router, "get_region_rows_for_years", no_db)
+
+    assert (await client.get("/api/map/1945")).json() == first
+    response = await client.get("/api/map", params={"from": 1945, "to": 1945})
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_get_map_range_invalid(client: AsyncClient):
+    """Test range validation."""
+    response = await client.get("/api/map", params={"from": 1950, "to": 1940})
+    assert response.status_code == 422
+
+    response = await client.get("/api/map", params={"from": 1900, "to": 1940})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_geo_manifest_and_regions(client: AsyncClient, mock_geojson):
+    """Test geometry levels are served compressed with immutable versioned URLs."""
+    response = await client.get("/api/geo/manifest")
+    assert response.status_code == 200
+    manifest = response.json()
+    assert set(manifest["levels"]) == {"low", "medium", "high"}
+
+    url = manifest["levels"]["medium"]["url"]
+    response = await client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "immutable" in response.headers["cache-control"]
+    assert len(response.json()["features"]) == 2
+
+    etag = response.headers["etag"]
+    response = await client.get("/api/geo/regions?zoom=3", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert "immutable" not in response.headers["cache-control"]
+
+
+@pytest.mark.asyncio
+async def test_geo_regions_invalid_level(client: AsyncClient):
+    """Test that unknown levels are rejected."""
+    response = await client.get("/api/geo/regions?level=ultra")
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_geo_topology_and_tiles(client: AsyncClient, mock_geojson, tmp_path, monkeypatch):
+    """Test TopoJSON and vector tile endpoints."""
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "tile_cache_dir", tmp_path / "tiles")
+
+    response = await client.get("/api/geo/topology?level=low")
+    assert response.status_code == 200
+    assert response.json()["type"] == "Topology"
+
+    # Moscow region at zoom 4
+    response = await client.get("/api/geo/tiles/4/9/5.mvt")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.mapbox-vector-tile"
+    assert list((tmp_path / "tiles").rglob("*.mvt"))
+
+    response = await client.get("/api/geo/tiles/4/0/0.mvt")
+    assert response.status_code == 204
+
+    response = await client.get("/api/geo/tiles/4/16/0.mvt")
+    assert response.status_code == 404
@@ -0,0 +1,42 @@
+"""Tests for database engine setup."""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.database import create_engine
+
+
+@pytest.mark.asyncio
+async def test_sqlite_file_engine_pragmas(tmp_path):
+    """Test that file databases run in WAL mode with the configured pragmas."""
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    try:
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+            assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() == 5000
+            # NORMAL
+            assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1
+        assert engine.pool.size() == 5
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_read_only_engine_rejects_writes(tmp_path):
+    """Test that the read engine can read but not write."""
+    url = f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    engine = create_engine(url)
+    read_engine = create_engine(url, read_only=True)
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            await conn.execute(text("INSERT INTO t VALUES (1)"))
+
+        async with read_engine.connect() as conn:
+            assert (await conn.execute(text("SELECT x FROM t"))).scalar() == 1
+            with pytest.raises(OperationalError, match="readonly"):
+                await conn.execute(text("INSERT INTO t VALUES (2)"))
+    finally:
+        await read_engine.dispose()
+        await engine.dispose()
@@ -0,0 +1,70 @@
+"""Tests for the in-memory emotion cube."""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.utils import EmotionCube
+
+
+def _row(year, region_name, fear=0.1, count=3, updated_at=datetime(2024, 5, 1, 12, 30)):
+    return SimpleNamespace(
+        year=year,
+        region_name=region_name,
+        geo_id=f"geo-{region_name}",
+        fear=fear,
+        joy=0.2,
+        neutral=0.6,
+        sadness=1.0 - fear - 0.8,
+        diary_count=count,
+        updated_at=updated_at,
+    )
+
+
+def test_cube_round_trips_rows():
+    """Test that stored rows read back as cells with the same values."""
+    cube = EmotionCube(1940, 1945)
+    cube.update([_row(1941, "Москва"), _row(1941, "Ленинград", fear=0.15, count=7)])
+
+    cells = cube.rows_for_year(1941)
+
+    assert set(cells) == {"Москва", "Ленинград"}
+    cell = cells["Ленинград"]
+    assert cell.fear == pytest.approx(0.15)
+    assert cell.diary_count == 7
+    assert cell.updated_at == datetime(2024, 5, 1, 12, 30)
+    assert cell.to_dict()["geo_id"] == "geo-Ленинград"
+    assert cube.rows_for_year(1942) == {}
+    assert cube.rows_for_year(1900) == {}
+
+
+def test_cube_updates_and_grows():
+    """Test that rows are overwritten in place and new regions are added."""
+    cube = EmotionCube(1940, 1945, capacity=2)
+    cube.update(_row(1940 + i % 6, f"region-{i}") for i in range(5))
+    cube.update([_row(1940, "region-0", fear=0.05)])
+
+    assert cube.stats()["regions"] == 5
+    assert cube.stats()["cells"] == 5
+    assert cube.rows_for_year(1940)["region-0"].fear == pytest.approx(0.05)
+    assert set(cube.rows_for_years(1939, 1942)) == {1940, 1941, 1942}
+
+    cube.clear()
+    assert cube.stats()["cells"] == 0
+    assert cube.rows_for_years(1940, 1945) == {}
+
+
+def test_region_series_marks_missing_years():
+    """Test that a region's series has NaN scores for years without rows."""
+    cube = EmotionCube(1940, 1945)
+    cube.update([_row(1941, "Москва", fear=0.1), _row(1943, "Москва", fear=0.2, count=5)])
+
+    years, scores, counts = cube.region_series("Москва", 1940, 1943)
+
+    assert years.tolist() == [1940, 1941, 1942, 1943]
+    assert np.isnan(scores[[0, 2]]).all()
+    assert scores[[1, 3], 0] == pytest.approx([0.1, 0.2])
+    assert counts.tolist() == [0, 3, 0, 5]
+    assert np.isnan(cube.region_series("Киев", 1940, 1945)[1]).all()
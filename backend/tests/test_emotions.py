@@ -0,0 +1,50 @@
+"""Tests for incremental emotion aggregation."""
+
+import numpy as np
+import pytest
+
+from app.services.ml_service import ml_service
+from app.utils import EMOTIONS, EmotionAggregator
+
+
+def test_aggregator_matches_aggregate_emotions():
+    """Test that streaming aggregation equals the list-then-average result."""
+    texts = ["Я рад", "Мне страх", "Печаль и страх", "Обычный день"]
+    emotion_list = ml_service.analyze_batch(texts)
+
+    aggregator = EmotionAggregator()
+    for emotions in emotion_list:
+        aggregator.add(emotions)
+
+    assert aggregator.count == 4
+    assert aggregator.result() == pytest.approx(ml_service.aggregate_emotions(emotion_list))
+
+
+def test_aggregator_merges_shards():
+    """Test that shards merged in any order give the same aggregate."""
+    scores = ml_service.score_batch(["Я рад", "Мне страх", "Печаль", "Победа! Радость"])
+    whole = EmotionAggregator().add_scores(scores)
+
+    left = EmotionAggregator().add_scores(scores[:1])
+    right = EmotionAggregator().add_scores(scores[1:])
+
+    assert (right + left).result() == pytest.approx(whole.result())
+    assert left.merge(right).count == whole.count
+
+
+def test_aggregator_from_average_round_trip():
+    """Test that the stored average and count rebuild the running sums."""
+    scores = ml_service.score_batch(["Я рад", "Мне страх", "Печаль"])
+    aggregator = EmotionAggregator().add_scores(scores)
+
+    rebuilt = EmotionAggregator.from_average(aggregator.result(), aggregator.count)
+
+    assert np.allclose(rebuilt.sums, aggregator.sums)
+
+
+def test_empty_aggregator_is_neutral():
+    """Test the neutral default without any scores."""
+    result = EmotionAggregator().result()
+
+    assert result == {key: 1.0 if key == "neutral" else 0.0 for key in EMOTIONS}
+    assert EmotionAggregator.from_average(result, 0).count == 0
@@ -0,0 +1,59 @@
+"""Tests for GeoJSON region registry."""
+
+import json
+import os
+
+from app.utils import get_region_by_name, get_region_registry, load_region_registry
+
+
+def test_registry_lookup_by_name(mock_geojson):
+    """Test case-insensitive lookup by region name."""
+    registry = get_region_registry()
+
+    assert len(registry) == 2
+    region = registry.get_by_name("московская ОБЛАСТЬ")
+    assert region is not None
+    assert region.geo_id == "ru-mos"
+    assert registry.get_by_name("Unknown") is None
+
+
+def test_registry_lookup_by_geo_id(mock_geojson):
+    """Test lookup by GeoJSON feature id."""
+    registry = get_region_registry()
+
+    region = registry.get_by_geo_id("ru-len")
+    assert region is not None
+    assert region.name == "Ленинградская область"
+    assert registry.get_geometry("ru-len")["type"] == "Polygon"
+
+
+def test_registry_is_cached(mock_geojson):
+    """Test that the file is parsed once while unchanged."""
+    registry = load_region_registry()
+
+    assert get_region_registry() is registry
+
+
+def test_registry_reloads_on_mtime_change(mock_geojson):
+    """Test hot reload when the GeoJSON file is modified."""
+    registry = get_region_registry()
+
+    with open(mock_geojson, encoding="utf-8") as f:
+        data = json.load(f)
+    data["features"] = data["features"][:1]
+    with open(mock_geojson, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    stat = mock_geojson.stat()
+    os.utime(mock_geojson, (stat.st_atime, stat.st_mtime + 10))
+
+    reloaded = get_region_registry()
+    assert reloaded is not registry
+    assert len(reloaded) == 1
+
+
+def test_get_region_by_name_includes_geometry(mock_geojson):
+    """Test legacy region dict helper."""
+    region = get_region_by_name("Ленинградская область")
+
+    assert region["geo_id"] == "ru-len"
+    assert region["geometry"] is not None
@@ -0,0 +1,122 @@
+"""Tests for geometry simplification and geometry assets."""
+
+import gzip
+import json
+
+from app.utils import GEO_LEVELS, get_region_registry, level_for_zoom
+from app.utils.geo_assets import build_geo_asset
+from app.utils.geometry import quantize_ring, simplify_geometry, simplify_line
+
+
+def test_simplify_line_drops_collinear_points():
+    """Test that points within tolerance of the chord are removed."""
+    line = [[0, 0], [1, 0.001], [2, 0], [3, 5], [4, 0]]
+
+    assert simplify_line(line, 0.01) == [[0, 0], [2, 0], [3, 5], [4, 0]]
+    assert simplify_line(line, 0) == line
+
+
+def test_quantize_ring_removes_duplicates():
+    """Test coordinate rounding and deduplication."""
+    ring = [[37.123456, 55.654321], [37.123459, 55.654324], [38.0, 56.0]]
+
+    assert quantize_ring(ring, 4) == [[37.1235, 55.6543], [38.0, 56.0]]
+
+
+def test_simplify_geometry_keeps_closed_rings():
+    """Test that simplified polygons stay closed and tiny islands are dropped."""
+    square = [[0, 0], [0.5, 0.0001], [1, 0], [1, 1], [0, 1], [0, 0]]
+    island = [[5, 5], [5.001, 5], [5.001, 5.001], [5, 5]]
+    geometry = {"type": "MultiPolygon", "coordinates": [[square], [island]]}
+
+    simplified = simplify_geometry(geometry, 0.01, 3)
+
+    assert simplified["type"] == "MultiPolygon"
+    assert len(simplified["coordinates"]) == 1
+    ring = simplified["coordinates"][0][0]
+    assert ring[0] == ring[-1]
+    assert len(ring) == 5
+
+
+def test_level_for_zoom():
+    """Test zoom to detail level mapping."""
+    assert level_for_zoom(1).name == "low"
+    assert level_for_zoom(3).name == "medium"
+    assert level_for_zoom(6).name == "high"
+
+
+def test_build_geo_asset(mock_geojson):
+    """Test that assets carry region names and a matching gzip body."""
+    asset = build_geo_asset(get_region_registry(), GEO_LEVELS["medium"])
+    data = json.loads(asset.body)
+
+    assert [f["properties"]["name"] for f in data["features"]] == [
+        "Московская область",
+        "Ленинградская область",
+    ]
+    assert gzip.decompress(asset.gzip) == asset.body
+    assert asset.encoded("gzip, deflate")[1] == "gzip"
+    assert asset.encoded("identity")[1] is None
+
+
+def _decode_topology(topology):
+    """Decode arcs of a topology back into absolute coordinates."""
+    sx, sy = topology["transform"]["scale"]
+    tx, ty = topology["transform"]["translate"]
+    arcs = []
+    for arc in topology["arcs"]:
+        x = y = 0
+        points = []
+        for dx, dy in arc:
+            x += dx
+            y += dy
+            points.append((x * sx + tx, y * sy + ty))
+        arcs.append(points)
+
+    def ring(arc_ids):
+        points = []
+        for i in arc_ids:
+            arc = arcs[i] if i >= 0 else arcs[~i][::-1]
+            points.extend(arc if not points else arc[1:])
+        return points
+
+    return [
+        [[ring(r) for r in polygon] for polygon in geometry["arcs"]]
+        for geometry in topology["objects"]["regions"]["geometries"]
+    ]
+
+
+def test_topology_shares_borders():
+    """Test that a border shared by two regions is stored as one arc."""
+    from app.utils.topojson import build_topology
+
+    left = [[0, 0], [0, 1], [1, 1], [1, 0], [0, 0]]
+    right = [[1, 0], [1, 1], [2, 1], [2, 0], [1, 0]]
+    features = [
+        {"id": "a", "properties": {"name": "A"},
+         "geometry": {"type": "Polygon", "coordinates": [left]}},
+        {"id": "b", "properties": {"name": "B"},
+         "geometry": {"type": "Polygon", "coordinates": [right]}},
+    ]
+
+    topology = build_topology(features, quantization=3)
+
+    # Shared edge, plus the two outer parts
+    assert len(topology["arcs"]) == 3
+    geometries = topology["objects"]["regions"]["geometries"]
+    assert [g["id"] for g in geometries] == ["a", "b"]
+    assert geometries[0]["properties"] == {"name": "A"}
+
+    decoded = _decode_topology(topology)
+    assert sorted(decoded[0][0][0][:-1]) == sorted(tuple(map(float, p)) for p in left[:-1])
+    assert sorted(decoded[1][0][0][:-1]) == sorted(tuple(map(float, p)) for p in right[:-1])
+
+
+def test_topology_asset(mock_geojson):
+    """Test that the TopoJSON asset carries every region."""
+    topojson = build_geo_asset(get_region_registry(), GEO_LEVELS["high"], "topojson")
+    data = json.loads(topojson.body)
+
+    assert topojson.format == "topojson"
+    assert data["type"] == "Topology"
+    assert [g["id"] for g in data["objects"]["regions"]["geometries"]] == ["ru-mos", "ru-len"]
@@ -0,0 +1,64 @@
+"""Tests for the disk-backed HTTP response cache."""
+
+import os
+
+import pytest
+
+from app.utils import CachedResponse, HttpCache
+
+
+def test_http_cache_round_trip(tmp_path):
+    """Test that entries survive a new cache instance (restart)."""
+    key = HttpCache.key("https://prozhito.org/api/notes", {"year": 1941, "page": 1})
+    entry = CachedResponse('"abc"', "Mon, 22 Jun 1941 04:00:00 GMT", [{"text": "Война"}])
+
+    HttpCache(tmp_path, 1024).put(key, entry)
+    restored = HttpCache(tmp_path, 1024).get(key)
+
+    assert restored == entry
+    assert restored.conditional_headers() == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Mon, 22 Jun 1941 04:00:00 GMT",
+    }
+
+
+def test_http_cache_key_ignores_param_order():
+    """Test that equivalent requests share a key."""
+    url = "https://prozhito.org/api/notes"
+
+    assert HttpCache.key(url, {"a": 1, "b": 2}) == HttpCache.key(url, {"b": 2, "a": 1})
+    assert HttpCache.key(url, {"a": 1}) != HttpCache.key(url, {"a": 2})
+
+
+def test_http_cache_evicts_least_recently_used(tmp_path):
+    """Test that the store stays within max_bytes, dropping old entries first."""
+    cache = HttpCache(tmp_path, max_bytes=250)
+    entry = CachedResponse('"v"', None, ["x" * 50])
+
+    cache.put("a" * 64, entry)
+    cache.put("b" * 64, entry)
+    os.utime(cache._path("a" * 64), (0, 0))
+    cache._index = None  # reload last-use times from disk
+    cache.put("c" * 64, entry)
+    cache.put("d" * 64, entry)
+
+    assert cache.stats()["bytes"] <= 250
+    assert cache.stats()["evictions"] >= 1
+    assert not cache._path("a" * 64).exists()
+    assert cache.get("a" * 64) is None
+    assert cache.get("d" * 64) == entry
+
+
+@pytest.mark.asyncio
+async def test_http_cache_async_round_trip(tmp_path):
+    """Test that the async methods read and write the same entries."""
+    key = HttpCache.key("https://prozhito.org/api/notes", {"page": 2})
+    entry = CachedResponse(None, "Mon, 22 Jun 1941 04:00:00 GMT", {"entries": []})
+
+    cache = HttpCache(tmp_path, 1024)
+    await cache.put_async(key, entry)
+    await cache.touch_async(key)
+
+    assert await HttpCache(tmp_path, 1024).get_async(key) == entry
+    assert await cache.get_async("0" * 64) is None
+    assert cache.stats()["bytes"] == cache._path(key).stat().st_size
@@ -0,0 +1,27 @@
+"""Tests for the bounded LRU cache."""
+
+from app.utils import LRUCache
+
+
+def test_lru_evicts_least_recently_used():
+    """Test that the oldest untouched entry is evicted first."""
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {"hits": 3, "misses": 1, "size": 2}
+
+
+def test_lru_zero_size_stores_nothing():
+    """Test that a zero-size cache is disabled."""
+    cache = LRUCache(maxsize=0)
+    cache.put("a", 1)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
@@ -0,0 +1,127 @@
+"""Tests for upgrading databases created by older versions."""
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import inspect, text
+
+from app.database import Base, create_engine
+from app.migrations import migrate
+
+# region_data as created before the unique index and the diary entries table
+OLD_REGION_DATA = """
+CREATE TABLE region_data (
+    id INTEGER NOT NULL PRIMARY KEY,
+    year INTEGER NOT NULL,
+    region_name VARCHAR(200) NOT NULL,
+    geo_id VARCHAR(50),
+    fear FLOAT NOT NULL,
+    joy FLOAT NOT NULL,
+    neutral FLOAT NOT NULL,
+    sadness FLOAT NOT NULL,
+    diary_count INTEGER NOT NULL,
+    diary_entries JSON,
+    stats JSON,
+    created_at DATETIME NOT NULL,
+    updated_at DATETIME NOT NULL
+)
+"""
+
+OLD_ENTRIES = '[{"text": "Я рад", "author": "Иванов"}, {"text": "Победа!"}]'
+
+
+def _old_row(row_id: int, region_name: str, updated_at: str, diary_entries: str = "null") -> str:
+    return (
+        "INSERT INTO region_data VALUES "
+        f"({row_id}, 1941, '{region_name}', NULL, 0.1, 0.2, 0.3, 0.4, 2,"
+        f" '{diary_entries}', NULL, '2020-01-01 00:00:00', '{updated_at}')"
+    )
+
+
+@pytest_asyncio.fixture
+async def old_engine(tmp_path):
+    """An engine on a database with the old region_data schema and duplicate rows."""
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'old.db'}")
+    async with engine.begin() as conn:
+        await conn.execute(text(OLD_REGION_DATA))
+        await conn.execute(text(_old_row(1, "Москва", "2020-01-01 00:00:00")))
+        await conn.execute(text(_old_row(2, "Москва", "2020-02-01 00:00:00")))
+        await conn.execute(text(_old_row(3, "Ленинград", "2020-01-01 00:00:00", OLD_ENTRIES)))
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_migrate_adds_unique_region_index(old_engine):
+    """Test that duplicate rows are dropped and the unique index is created."""
+    async with old_engine.begin() as conn:
+        await conn.run_sync(migrate)
+        # Running again on an upgraded database is a no-op
+        await conn.run_sync(migrate)
+
+    async with old_engine.connect() as conn:
+        rows = (await conn.execute(text("SELECT id, region_name FROM region_data"))).all()
+        indexes = await conn.run_sync(lambda sync: inspect(sync).get_indexes("region_data"))
+
+    assert sorted(rows) == [(2, "Москва"), (3, "Ленинград")]
+    unique = {index["name"] for index in indexes if index["unique"]}
+    assert "ix_region_data_year_region_name" in unique
+
+
+@pytest.mark.asyncio
+async def test_migrate_moves_diary_entries(old_engine):
+    """Test that entries of the old JSON column are copied to their own table."""
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    from app.repository import get_diary_entries
+
+    async with old_engine.begin() as conn:
+        await conn.run_sync(migrate)
+        await conn.run_sync(migrate)
+
+    async with async_sessionmaker(old_engine)() as db:
+        entries = await get_diary_entries(db, 3)
+        leftover = await db.scalar(
+            text("SELECT count(*) FROM region_data WHERE diary_entries IS NOT NULL")
+        )
+
+    assert entries == [
+        {"text": "Я рад", "author": "Иванов", "date": "", "url": ""},
+        {"text": "Победа!", "author": "", "date": "", "url": ""},
+    ]
+    assert leftover == 0
+
+
+@pytest.mark.asyncio
+async def test_upsert_into_migrated_table(old_engine):
+    """Test that the ON CONFLICT upsert works on an old table once it is migrated."""
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    from app.repository import get_region_rows_for_year, upsert_region_results
+    from app.utils import NEUTRAL_SCORES
+
+    sessions = async_sessionmaker(old_engine, expire_on_commit=False)
+    results = {
+        (1941, "Москва"): {
+            "emotions": dict(NEUTRAL_SCORES), "diary_entries": [], "diary_count": 7
+        },
+        (1941, "Киев"): {"emotions": dict(NEUTRAL_SCORES), "diary_entries": []},
+    }
+
+    # Without the unique index there is no conflict target
+    async with sessions() as db:
+        with pytest.raises(OperationalError, match="ON CONFLICT"):
+            await upsert_region_results(db, results)
+
+    async with old_engine.begin() as conn:
+        await conn.run_sync(migrate)
+
+    async with sessions() as db:
+        await upsert_region_results(db, results)
+        await db.commit()
+        rows = await get_region_rows_for_year(db, 1941)
+
+    assert sorted(rows) == ["Киев", "Ленинград", "Москва"]
+    assert rows["Москва"].id == 2
+    assert rows["Москва"].diary_count == 7
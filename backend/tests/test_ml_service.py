@@ -96,3 +96,123 @@ def test_aggregate_empty_emotions():
     assert aggregated["fear"] == 0.0
     assert aggregated["joy"] == 0.0
     assert aggregated["sadness"] == 0.0
+
+
+def test_score_batch_matches_single_analysis():
+    """Test that batch scores equal per-text analysis."""
+    texts = [
+        "Сегодня чудесный день! Я очень рад и счастлив!",
+        "Мне так страшно. Война вокруг, везде трагедия и смерть.",
+        "",
+        "Обычный день без происшествий.",
+        "УЖАС и печаль, но потом радость",
+    ]
+    scores = ml_service.score_batch(texts)
+
+    assert scores.shape == (len(texts), 4)
+    for row, text in zip(ml_service.analyze_batch(texts), texts):
+        expected = ml_service.analyze_sentiment(text)
+        assert row == pytest.approx(expected)
+
+
+def test_score_batch_texts_with_nul():
+    """Test that NUL characters inside a text do not shift the rows."""
+    scores = ml_service.score_batch(["a\x00страх", "b"])
+
+    assert scores[0] == pytest.approx(ml_service.score_batch(["a страх"])[0])
+    assert scores[1].tolist() == [0.0, 0.0, 1.0, 0.0]
+    assert ml_service.score_batch(["x\x00страх"]).shape == (1, 4)
+
+
+def test_aggregate_batch():
+    """Test batch aggregation against the per-text path."""
+    texts = ["Я рад", "Мне страшно", "Ничего особенного"]
+    expected = ml_service.aggregate_emotions(
+        [ml_service.analyze_sentiment(text) for text in texts]
+    )
+
+    assert ml_service.aggregate_batch(texts) == pytest.approx(expected)
+    assert ml_service.aggregate_batch([])["neutral"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_async_batch_matches_sync():
+    """Test that the worker pool API returns the same results."""
+    texts = ["Я рад", "Мне страшно", ""]
+
+    assert await ml_service.analyze_batch_async(texts) == ml_service.analyze_batch(texts)
+    assert await ml_service.aggregate_batch_async(texts) == ml_service.aggregate_batch(texts)
+
+
+@pytest.mark.asyncio
+async def test_async_batch_backpressure(monkeypatch):
+    """Test that callers wait once ml_max_pending batches are in flight."""
+    import asyncio
+    import threading
+
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "ml_max_pending", 1)
+    monkeypatch.setattr(ml_service, "_slots", None)
+    release = threading.Event()
+
+    def blocking(texts):
+        release.wait(5)
+        return len(texts)
+
+    first = asyncio.create_task(ml_service._submit(blocking, ["a"]))
+    second = asyncio.create_task(ml_service._submit(blocking, ["b", "c"]))
+    await asyncio.sleep(0.05)
+
+    stats = ml_service.stats()
+    assert stats["running"] == 1
+    assert stats["waiting"] == 1
+
+    release.set()
+    assert await asyncio.gather(first, second) == [1, 2]
+    assert ml_service.stats()["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_async_batch_process_pool(monkeypatch):
+    """Test that batches can run in a process pool."""
+    from app.config import settings
+
+    ml_service.shutdown()
+    monkeypatch.setattr(settings, "ml_executor", "process")
+    monkeypatch.setattr(settings, "ml_workers", 1)
+    try:
+        result = await ml_service.aggregate_batch_async(["Мне страх"])
+        assert result["fear"] == pytest.approx(1.0)
+    finally:
+        ml_service.shutdown()
+
+
+def test_text_hash_normalizes_whitespace():
+    """Test that texts differing only in whitespace share a hash."""
+    from app.services.ml_service import text_hash
+
+    assert text_hash("Я  рад\n") == text_hash("Я рад")
+    assert text_hash("Я рад") != text_hash("Я груст")
+
+
+@pytest.mark.asyncio
+async def test_async_batch_memoizes_results(db_session):
+    """Test that repeated texts are scored once and survive a memory reset."""
+    texts = ["Я рад", "Мне страх", "Я рад"]
+
+    first = await ml_service.score_batch_async(texts)
+    computed = ml_service.stats()["computed"]
+    assert ml_service.stats()["memo_size"] == 2
+
+    second = await ml_service.score_batch_async(texts)
+    assert (second == first).all()
+    assert ml_service.stats()["computed"] == computed
+
+    # Reloaded from the sentiment_cache table after a restart
+    ml_service.clear_cache()
+    store_hits = ml_service.stats()["store_hits"]
+    third = await ml_service.score_batch_async(texts)
+    assert (third == first).all()
+    assert ml_service.stats()["store_hits"] == store_hits + 2
+    assert ml_service.stats()["computed"] == computed
@@ -0,0 +1,55 @@
+"""Tests for serialized payload cache and ETag helpers."""
+
+from datetime import datetime, timedelta
+
+from app.utils import CachedPayload, PayloadCache, etag_matches
+
+
+def test_payload_etag_is_stable():
+    """Test that equal bodies produce equal strong ETags."""
+    first = CachedPayload.from_body(b'{"year": 1941}')
+    second = CachedPayload.from_body(b'{"year": 1941}')
+
+    assert first.etag == second.etag
+    assert first.etag.startswith('"')
+    assert CachedPayload.from_body(b"{}").etag != first.etag
+
+
+def test_payload_cache_expiry_and_invalidation():
+    """Test that payloads expire and can be invalidated by key."""
+    cache = PayloadCache()
+    now = datetime.utcnow()
+    cache.put(1941, CachedPayload.from_body(b"a", now + timedelta(seconds=10)))
+    cache.put(1942, CachedPayload.from_body(b"b"))
+
+    assert cache.get(1941, now) is not None
+    assert cache.get(1941, now + timedelta(seconds=11)) is None
+
+    cache.invalidate(1942)
+    assert cache.get(1942) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_payload_cache_skips_put_after_invalidation():
+    """Test that a payload built before an invalidation is not stored."""
+    cache = PayloadCache()
+    generation = cache.generation(1941)
+    cache.invalidate(1941)
+
+    assert not cache.put(1941, CachedPayload.from_body(b"old"), generation)
+    assert cache.get(1941) is None
+
+    generation = cache.generation(1941)
+    cache.clear()
+    assert not cache.put(1941, CachedPayload.from_body(b"old"), generation)
+    assert cache.put(1941, CachedPayload.from_body(b"new"), cache.generation(1941))
+    assert cache.get(1941).body == b"new"
+
+
+def test_etag_matches():
+    """Test If-None-Match parsing."""
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches(None, '"abc"')
+    assert not etag_matches('"x"', '"abc"')
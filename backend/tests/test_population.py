@@ -0,0 +1,40 @@
+"""Tests for census-based population statistics."""
+
+import pytest
+
+from app.services import population_service
+from app.services.population import PopulationService
+
+
+def test_census_years_and_interpolation():
+    """Test that census anchors are exact and years between are interpolated."""
+    assert population_service.get_stats("Ukraine", 1959)["population"] == 41_869_000
+    assert population_service.get_stats("ukraine", 1970)["population"] == 47_126_000
+
+    populations = population_service.populations("Ukraine", 1959, 1970)
+    assert len(populations) == 12
+    assert (populations[1:] > populations[:-1]).all()
+    # Before the first census the first value is used
+    assert population_service.get_stats("Ukraine", 1920)["population"] == 40_469_000
+
+
+def test_stats_are_reproducible():
+    """Test that the same region and year always give the same numbers."""
+    stats = population_service.get_stats("Москва", 1941)
+
+    assert stats == population_service.get_stats("Москва", 1941)
+    assert stats == PopulationService().get_stats("Москва", 1941)
+    assert stats["year"] == 1941
+    assert stats["population"] > 0
+    assert population_service.get_stats("Москва", 1920)["change_percent"] == 0.0
+
+
+def test_change_percent(tmp_path):
+    """Test the year-over-year change computed from a custom table."""
+    path = tmp_path / "census.csv"
+    path.write_text("# comment\nregion,year,population\nA,1920,1000\nA,1922,1200\n")
+    service = PopulationService(path, first_year=1920, last_year=1923)
+
+    assert service.populations("A", 1920, 1923).tolist() == [1000, 1100, 1200, 1200]
+    assert service.get_stats("A", 1921)["change_percent"] == pytest.approx(10.0)
+    assert service.get_stats("A", 1923)["change_percent"] == 0.0
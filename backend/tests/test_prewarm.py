@@ -0,0 +1,122 @@
+"""Tests for the bulk pre-warm job."""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.config import settings
+from app.models import RegionData
+from app.prewarm import Checkpoint, _parse_args, prewarm
+from app.repository import get_region_rows_for_year
+from app.services.region_refresh import RegionRefreshService
+from tests.conftest import TestSessionLocal
+
+
+@pytest.mark.asyncio
+async def test_prewarm_computes_and_skips_fresh(db_session, mock_geojson, tmp_path):
+    """Test that every cell is computed once and a rerun only redoes expired ones."""
+    checkpoint = tmp_path / "checkpoint.json"
+    lines: list[str] = []
+
+    # The in-memory test database is one shared connection: one year at a time
+    stats = await prewarm(
+        range(1950, 1952),
+        concurrency=1,
+        session_factory=TestSessionLocal,
+        checkpoint=checkpoint,
+        progress=lines.append,
+    )
+
+    assert (stats.total, stats.computed, stats.skipped, stats.failed) == (4, 4, 0, 0)
+    assert len(lines) == 2
+    for year in (1950, 1951):
+        rows = await get_region_rows_for_year(db_session, year)
+        assert set(rows) == {"Московская область", "Ленинградская область"}
+    # A finished run leaves no checkpoint behind
+    assert not checkpoint.exists()
+
+    rerun = await prewarm(
+        range(1950, 1952),
+        concurrency=1,
+        session_factory=TestSessionLocal,
+        checkpoint=checkpoint,
+        progress=lines.append,
+    )
+    assert (rerun.computed, rerun.skipped) == (0, 4)
+
+    await db_session.execute(
+        update(RegionData)
+        .where(RegionData.year == 1951)
+        .values(updated_at=datetime.utcnow() - timedelta(seconds=settings.cache_ttl + 1))
+    )
+    await db_session.commit()
+    expired = await prewarm(
+        range(1950, 1952),
+        concurrency=1,
+        session_factory=TestSessionLocal,
+        checkpoint=checkpoint,
+        progress=lines.append,
+    )
+    assert (expired.computed, expired.skipped) == (2, 2)
+
+
+@pytest.mark.asyncio
+async def test_prewarm_force_resumes_from_checkpoint(db_session, mock_geojson, tmp_path):
+    """Test that an interrupted forced run skips the cells it already did."""
+    await prewarm(range(1950, 1951), session_factory=TestSessionLocal, progress=lambda line: None)
+    checkpoint = tmp_path / "checkpoint.json"
+    checkpoint.write_text(json.dumps({"1950": ["Московская область"]}), encoding="utf-8")
+
+    stats = await prewarm(
+        range(1950, 1951), force=True, checkpoint=checkpoint,
+        session_factory=TestSessionLocal, progress=lambda line: None,
+    )
+
+    assert (stats.computed, stats.skipped) == (1, 1)
+    assert not checkpoint.exists()
+
+
+@pytest.mark.asyncio
+async def test_prewarm_empty_results_not_checkpointed(db_session, mock_geojson, monkeypatch):
+    """Test that cells without diary entries are not counted as computed."""
+    written = []
+
+    async def fake_refresh(self, region_names, year, timeout=None):
+        return {name: {"emotions": {}, "diary_entries": []} for name in region_names}
+
+    monkeypatch.setattr(RegionRefreshService, "refresh_regions", fake_refresh)
+    monkeypatch.setattr(Checkpoint, "mark", lambda self, year, names: written.extend(names))
+
+    stats = await prewarm(
+        range(1950, 1951), session_factory=TestSessionLocal, progress=lambda line: None
+    )
+
+    assert (stats.computed, stats.empty, stats.failed) == (0, 2, 0)
+    assert written == []
+
+
+@pytest.mark.asyncio
+async def test_prewarm_force_recomputes(db_session, mock_geojson):
+    """Test that force recomputes cells that are already fresh."""
+    await prewarm(
+        range(1950, 1951), ["Московская область"],
+        session_factory=TestSessionLocal, progress=lambda line: None,
+    )
+
+    stats = await prewarm(
+        range(1950, 1951), ["Московская область"], force=True,
+        session_factory=TestSessionLocal, progress=lambda line: None,
+    )
+
+    assert (stats.computed, stats.skipped) == (1, 0)
+
+
+def test_parse_args_rejects_bad_years():
+    """Test that the year range is validated."""
+    assert _parse_args(["--from", "1941", "--to", "1945"]).to_year == 1945
+    with pytest.raises(SystemExit):
+        _parse_args(["--from", "1950", "--to", "1940"])
+    with pytest.raises(SystemExit):
+        _parse_args(["--from", "1900"])
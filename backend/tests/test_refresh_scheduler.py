@@ -0,0 +1,122 @@
+"""Tests for the background refresh scheduler."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.config import settings
+from app.models import RegionData
+from app.services.refresh_scheduler import RefreshScheduler
+from app.services.region_refresh import RegionRefreshService
+from app.utils import NEUTRAL_SCORES
+from tests.conftest import TestSessionLocal
+
+
+async def _store(service: RegionRefreshService, year: int, *names: str) -> None:
+    await service.store_results(year, {
+        name: {"emotions": dict(NEUTRAL_SCORES), "diary_entries": [{"text": "день"}]}
+        for name in names
+    })
+
+
+async def _backdate(db_session, year: int, seconds: int) -> None:
+    await db_session.execute(
+        update(RegionData)
+        .where(RegionData.year == year)
+        .values(updated_at=datetime.utcnow() - timedelta(seconds=seconds))
+    )
+    await db_session.commit()
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setattr(settings, "scheduler_rate", 0)
+    return RefreshScheduler(
+        RegionRefreshService(session_factory=TestSessionLocal),
+        session_factory=TestSessionLocal,
+    )
+
+
+@pytest.mark.asyncio
+async def test_due_cells_prioritize_popular_years(db_session, scheduler):
+    """Test that rows near expiry are due, most requested years first."""
+    service = scheduler.refresh_service
+    await _store(service, 1950, "Москва")
+    await _store(service, 1960, "Москва", "Ленинград")
+    await _store(service, 1970, "Москва")
+    almost_stale = settings.cache_ttl - settings.scheduler_refresh_ahead // 2
+    await _backdate(db_session, 1950, almost_stale + 60)
+    await _backdate(db_session, 1960, almost_stale)
+
+    scheduler.record_access(1950)
+    scheduler.record_access(1960, 1960, 1970)
+
+    due = await scheduler.due_cells()
+
+    assert due[2:] == [(1950, "Москва")]
+    assert set(due[:2]) == {(1960, "Москва"), (1960, "Ленинград")}
+
+
+@pytest.mark.asyncio
+async def test_refresh_due_renews_rows_in_batches(db_session, scheduler, monkeypatch):
+    """Test that a scan renews at most a batch of due rows."""
+    monkeypatch.setattr(settings, "scheduler_batch_size", 2)
+    service = scheduler.refresh_service
+    await _store(service, 1950, "Москва")
+    await _store(service, 1960, "Москва", "Ленинград")
+    await _backdate(db_session, 1950, settings.cache_ttl + 60)
+    await _backdate(db_session, 1960, settings.cache_ttl + 60)
+    scheduler.record_access(1960)
+
+    assert await scheduler.refresh_due() == 2
+    assert [cell[0] for cell in await scheduler.due_cells()] == [1950]
+
+    assert await scheduler.refresh_due() == 1
+    assert await scheduler.due_cells() == []
+    assert scheduler.stats()["refreshed"] == 3
+
+
+@pytest.mark.asyncio
+async def test_start_and_stop(db_session, scheduler):
+    """Test that the loop runs a scan and stops cleanly."""
+    task = scheduler.start()
+    assert scheduler.start() is task
+
+    while scheduler.scans == 0:
+        await asyncio.sleep(0.01)
+    await scheduler.stop()
+
+    assert task.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_failing_cells_back_off(db_session, scheduler, monkeypatch):
+    """Test that cells that fail to renew do not take the next batches."""
+    monkeypatch.setattr(settings, "scheduler_batch_size", 1)
+    service = scheduler.refresh_service
+    await _store(service, 1950, "Москва")
+    await _store(service, 1960, "Москва")
+    await _backdate(db_session, 1950, settings.cache_ttl + 120)
+    await _backdate(db_session, 1960, settings.cache_ttl + 60)
+
+    async def empty_for_1950(region_names, year, timeout=None):
+        entries = [] if year == 1950 else [{"text": "день"}]
+        return {
+            name: {"emotions": dict(NEUTRAL_SCORES), "diary_entries": entries}
+            for name in region_names
+        }
+
+    monkeypatch.setattr(service, "refresh_regions", empty_for_1950)
+
+    # The oldest row comes back empty: not counted, and retried later
+    assert await scheduler.refresh_due() == 0
+    assert scheduler.stats()["backing_off"] == 1
+    assert await scheduler.due_cells() == [(1960, "Москва")]
+
+    assert await scheduler.refresh_due() == 1
+    assert scheduler.stats()["refreshed"] == 1
+
+    later = datetime.utcnow() + timedelta(seconds=settings.scheduler_interval * 2 + 1)
+    assert await scheduler.due_cells(later) == [(1950, "Москва")]
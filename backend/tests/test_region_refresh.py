@@ -0,0 +1,237 @@
+"""Tests for region refresh service."""
+
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services.region_refresh import RegionRefreshService
+
+
+@pytest.mark.asyncio
+async def test_compute_region_structure():
+    """Test that a computed region has emotions and entries."""
+    result = await RegionRefreshService().compute_region("Москва", 1941)
+
+    assert set(result) == {"emotions", "diary_entries", "diary_count"}
+    assert result["diary_count"] == len(result["diary_entries"])
+    assert abs(sum(result["emotions"].values()) - 1.0) < 0.01
+
+
+@pytest.mark.asyncio
+async def test_refresh_regions_bounded_concurrency(monkeypatch):
+    """Test that no more than refresh_concurrency regions run at once."""
+    service = RegionRefreshService()
+    in_flight = 0
+    peak = 0
+
+    async def fake_compute(region_name, year, timeout=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {"emotions": {}, "diary_entries": []}
+
+    monkeypatch.setattr(service, "compute_region", fake_compute)
+    monkeypatch.setattr(settings, "refresh_concurrency", 3)
+
+    names = [f"region-{i}" for i in range(10)]
+    results = await service.refresh_regions(names, 1941)
+
+    assert set(results) == set(names)
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_refresh_regions_partial_results(monkeypatch):
+    """Test that failed regions are dropped from results."""
+    service = RegionRefreshService()
+
+    async def fake_compute(region_name, year, timeout=None):
+        if region_name == "broken":
+            raise RuntimeError("scraper down")
+        return {"emotions": {}, "diary_entries": []}
+
+    monkeypatch.setattr(service, "compute_region", fake_compute)
+
+    results = await service.refresh_regions(["ok", "broken"], 1941)
+
+    assert list(results) == ["ok"]
+
+
+@pytest.mark.asyncio
+async def test_refresh_timeout_keeps_analyzed_pages(monkeypatch):
+    """Test that a timed out region keeps the pages it analyzed, unless there were none."""
+    from app.services import scraper_service
+    from tests.test_scraper import _paged_handler
+
+    monkeypatch.setattr(settings, "scraper_page_size", 50)
+    monkeypatch.setattr(settings, "scraper_page_concurrency", 1)
+    monkeypatch.setattr(scraper_service, "transport", _paged_handler(150, per_page_delay=0.1))
+    service = RegionRefreshService()
+
+    results = await service.refresh_regions(["Москва"], 1943, timeout=0.15)
+    assert results["Москва"]["diary_count"] == 50
+
+    assert await service.refresh_regions(["Москва"], 1944, timeout=0.05) == {}
+
+
+@pytest.mark.asyncio
+async def test_joined_refresh_keeps_its_own_timeout(monkeypatch):
+    """Test that a caller joining a slower computation still returns by its own deadline."""
+    from app.services import scraper_service
+    from tests.test_scraper import _paged_handler
+
+    monkeypatch.setattr(settings, "scraper_page_size", 50)
+    monkeypatch.setattr(settings, "scraper_page_concurrency", 1)
+    monkeypatch.setattr(scraper_service, "transport", _paged_handler(150, per_page_delay=0.2))
+    service = RegionRefreshService()
+    loop = asyncio.get_running_loop()
+
+    background = asyncio.create_task(service.compute_region("Москва", 1943, timeout=10))
+    await asyncio.sleep(0)
+
+    # Nothing analyzed yet: left out, so the caller falls back to its cached row
+    assert await service.refresh_regions(["Москва"], 1943, timeout=0.05) == {}
+
+    started = loop.time()
+    result = await service.compute_region("Москва", 1943, timeout=0.3)
+    assert loop.time() - started < 0.4
+    assert result["diary_count"] == 50
+
+    assert (await background)["diary_count"] == 150
+    assert service.stats()["executions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_append_entries_merges_only_new_texts(db_session):
+    """Test that appended entries update the stored aggregate incrementally."""
+    from app.repository import get_diary_entries
+    from app.services.ml_service import ml_service
+    from tests.conftest import TestSessionLocal
+
+    service = RegionRefreshService(session_factory=TestSessionLocal)
+    old = [{"text": "Я рад"}, {"text": "Победа!"}]
+    new = [{"text": "Мне страх"}]
+    await service.store_results(1950, {
+        "Москва": {
+            "emotions": ml_service.aggregate_batch([e["text"] for e in old]),
+            "diary_entries": old,
+        }
+    })
+
+    computed = ml_service.stats()["computed"]
+    row = await service.append_entries(1950, "Москва", new)
+
+    expected = ml_service.aggregate_batch([e["text"] for e in old + new])
+    assert row.diary_count == 3
+    entries = await get_diary_entries(db_session, row.id)
+    assert [entry["text"] for entry in entries] == ["Я рад", "Победа!", "Мне страх"]
+    assert row.to_dict()["emotions"] == pytest.approx(expected)
+    assert ml_service.stats()["computed"] == computed + 1
+
+    assert await service.append_entries(1950, "Ленинград", new) is None
+
+
+@pytest.mark.asyncio
+async def test_append_entries_waits_for_write_lock(db_session):
+    """Test that appends are serialized with other cache writes."""
+    from app.utils import NEUTRAL_SCORES
+    from tests.conftest import TestSessionLocal
+
+    service = RegionRefreshService(session_factory=TestSessionLocal)
+    await service.store_results(1950, {
+        "Москва": {"emotions": dict(NEUTRAL_SCORES), "diary_entries": [{"text": "день"}]}
+    })
+
+    async with service._write_lock:
+        task = asyncio.create_task(service.append_entries(1950, "Москва", [{"text": "Я рад"}]))
+        await asyncio.sleep(0.05)
+        assert not task.done()
+
+    row = await task
+    assert row.diary_count == 2
+
+
+@pytest.mark.asyncio
+async def test_compute_region_streams_all_pages(monkeypatch):
+    """Test that every page is analyzed while only a sample is kept."""
+    from app.services import scraper_service
+    from tests.test_scraper import _paged_handler
+
+    monkeypatch.setattr(settings, "diary_sample_size", 5)
+    monkeypatch.setattr(settings, "scraper_page_size", 50)
+    monkeypatch.setattr(scraper_service, "transport", _paged_handler(120))
+
+    result = await RegionRefreshService().compute_region("Москва", 1943)
+
+    assert result["diary_count"] == 120
+    assert len(result["diary_entries"]) == 5
+
+
+@pytest.mark.asyncio
+async def test_store_results_keeps_entries_out_of_region_rows(db_session):
+    """Test that refreshes replace the stored entries of a region."""
+    from app.repository import count_diary_entries, get_region_rows_for_year
+    from tests.conftest import TestSessionLocal
+
+    service = RegionRefreshService(session_factory=TestSessionLocal)
+    for texts in (["a", "b", "c"], ["d", "e"]):
+        await service.store_results(1950, {
+            "Москва": {
+                "emotions": {"fear": 0.0, "joy": 0.0, "neutral": 1.0, "sadness": 0.0},
+                "diary_entries": [{"text": text} for text in texts],
+            }
+        })
+
+    async with TestSessionLocal() as db:
+        row = (await get_region_rows_for_year(db, 1950))["Москва"]
+        assert await count_diary_entries(db, row.id) == 2
+
+
+@pytest.mark.asyncio
+async def test_upsert_region_results_inserts_and_updates(db_session):
+    """Test that one upsert writes many years and updates rows in place."""
+    from app.repository import (
+        commit_region_results,
+        get_diary_entries,
+        get_region_rows_for_years,
+        upsert_region_results,
+    )
+    from app.utils import emotion_cube
+    from tests.conftest import TestSessionLocal
+
+    def result(fear: float, texts: list[str]) -> dict:
+        return {
+            "emotions": {"fear": fear, "joy": 0.0, "neutral": 1.0 - fear, "sadness": 0.0},
+            "diary_entries": [{"text": text} for text in texts],
+        }
+
+    emotion_cube.clear()
+    async with TestSessionLocal() as db:
+        await upsert_region_results(
+            db,
+            {(1950, "Москва"): result(0.1, ["a", "b"]), (1951, "Москва"): result(0.2, ["c"])},
+            {"Москва": "ru-mos"},
+        )
+        assert await commit_region_results(db)
+
+    async with TestSessionLocal() as db:
+        # No geo_id keeps the stored one
+        await upsert_region_results(db, {(1950, "Москва"): result(0.3, ["d"])})
+        assert await commit_region_results(db)
+
+    async with TestSessionLocal() as db:
+        rows = await get_region_rows_for_years(db, 1950, 1951)
+        updated, other = rows[1950]["Москва"], rows[1951]["Москва"]
+        assert (updated.fear, updated.geo_id, updated.diary_count) == (0.3, "ru-mos", 1)
+        assert other.fear == 0.2
+        entries = await get_diary_entries(db, updated.id)
+        assert [entry["text"] for entry in entries] == ["d"]
+
+    cell = emotion_cube.rows_for_year(1950)["Москва"]
+    assert (cell.fear, cell.geo_id) == (0.3, "ru-mos")
+    assert cell.updated_at == updated.updated_at
+    emotion_cube.clear()
+
@@ -36,19 +36,6 @@ async def test_fetch_diaries_returns_structure():
         assert len(entry["text"]) > 0
 
 
-@pytest.mark.asyncio
-async def test_get_population_stats():
-    """Test getting population statistics."""
-    stats = await scraper_service.get_population_stats("Москва", 1941)
-
-    assert "population" in stats
-    assert "change_percent" in stats
-    assert "year" in stats
-
-    assert stats["year"] == 1941
-    assert stats["population"] > 0
-
-
 @pytest.mark.asyncio
 async def test_different_years_different_data():
     """Test that different years may return different data."""
@@ -58,3 +45,261 @@ async def test_different_years_different_data():
     # Should both return data
     assert len(entries_1941) > 0
     assert len(entries_1945) > 0
+
+
+def _scraper(handler, monkeypatch, cache=None, **overrides):
+    """A scraper on a local mock transport without delays between requests."""
+    from pathlib import Path
+
+    import httpx
+
+    from app.config import settings
+    from app.services import ScraperService
+    from app.utils import HttpCache
+
+    monkeypatch.setattr(settings, "scraper_delay", 0)
+    monkeypatch.setattr(settings, "scraper_backoff", 0)
+    for name, value in overrides.items():
+        monkeypatch.setattr(settings, name, value)
+    scraper = ScraperService(transport=httpx.MockTransport(handler))
+    # Response caching is off unless a test passes its own cache
+    scraper.cache = cache or HttpCache(Path("unused"), max_bytes=0)
+    return scraper
+
+
+@pytest.mark.asyncio
+async def test_request_retries_server_errors(monkeypatch):
+    """Test that 429/5xx responses are retried until a success."""
+    import httpx
+
+    statuses = iter([503, 429, 200])
+    scraper = _scraper(lambda request: httpx.Response(next(statuses)), monkeypatch)
+
+    response = await scraper.request("GET", "https://prozhito.org/api/notes")
+
+    assert response.status_code == 200
+    assert scraper.retries == 2
+    await scraper.close()
+
+
+@pytest.mark.asyncio
+async def test_request_gives_up_after_max_retries(monkeypatch):
+    """Test that the last error response is returned once retries run out."""
+    import httpx
+
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500)
+
+    scraper = _scraper(handler, monkeypatch, scraper_max_retries=2)
+    response = await scraper.request("GET", "https://prozhito.org/api/notes")
+
+    assert response.status_code == 500
+    assert len(calls) == 3
+    await scraper.close()
+
+
+@pytest.mark.asyncio
+async def test_request_retries_transport_errors(monkeypatch):
+    """Test that connection errors are retried and finally raised."""
+    import httpx
+
+    def handler(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    scraper = _scraper(handler, monkeypatch, scraper_max_retries=1)
+    with pytest.raises(httpx.ConnectError):
+        await scraper.request("GET", "https://prozhito.org/api/notes")
+    assert scraper.retries == 1
+    await scraper.close()
+
+
+@pytest.mark.asyncio
+async def test_request_per_host_concurrency_cap(monkeypatch):
+    """Test that at most scraper_per_host_concurrency requests run per host."""
+    import asyncio
+
+    import httpx
+
+    in_flight = 0
+    peak = 0
+
+    class SlowTransport(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200)
+
+    scraper = _scraper(None, monkeypatch, scraper_per_host_concurrency=2)
+    scraper.transport = SlowTransport()
+
+    await asyncio.gather(*(
+        scraper.request("GET", "https://prozhito.org/api/notes") for _ in range(6)
+    ))
+
+    assert peak == 2
+    await scraper.close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_diaries_from_api(monkeypatch):
+    """Test parsing of prozhito.org notes served by a local transport."""
+    import httpx
+
+    def handler(request):
+        assert request.url.params["year"] == "1941"
+        return httpx.Response(200, json={"results": [
+            {"id": 7, "text": "Война!", "author": {"name": "Иванов"}, "date": "22.06.1941"},
+        ]})
+
+    scraper = _scraper(handler, monkeypatch)
+    entries = await scraper.fetch_diaries_for_region_year("Москва", 1941)
+
+    assert entries == [{
+        "text": "Война!",
+        "author": "Иванов",
+        "date": "22.06.1941",
+        "url": "https://prozhito.org/n/7",
+    }]
+    await scraper.close()
+
+
+def test_token_bucket_spaces_requests():
+    """Test that requests beyond the burst wait for new tokens."""
+    from app.utils import TokenBucket
+
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+@pytest.mark.asyncio
+async def test_fetch_diaries_conditional_request(monkeypatch, tmp_path):
+    """Test that unchanged pages are revalidated and served from the cache."""
+    import httpx
+
+    from app.utils import HttpCache
+
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(
+            200,
+            headers={"ETag": '"v1"'},
+            json={"results": [{"id": 1, "text": "Победа!", "author": {"name": "А"}}]},
+        )
+
+    scraper = _scraper(handler, monkeypatch, cache=HttpCache(tmp_path, 1024 * 1024))
+    first = await scraper.fetch_diaries_for_region_year("Москва", 1945)
+    second = await scraper.fetch_diaries_for_region_year("Москва", 1945)
+
+    assert second == first
+    assert seen == [None, '"v1"']
+    assert scraper.revalidated == 1
+
+    # A restarted service revalidates from the disk store
+    restarted = _scraper(handler, monkeypatch, cache=HttpCache(tmp_path, 1024 * 1024))
+    assert await restarted.fetch_diaries_for_region_year("Москва", 1945) == first
+    assert restarted.stats()["revalidated"] == 1
+    await scraper.close()
+    await restarted.close()
+
+
+def _paged_handler(total, per_page_delay=0.0, with_count=True, tracker=None, place="Москва"):
+    """Serve ``total`` notes over pages, optionally without a total count."""
+    import asyncio
+
+    import httpx
+
+    class PagedTransport(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request):
+            page = int(request.url.params["page"])
+            size = int(request.url.params["page_size"])
+            if tracker is not None:
+                tracker["in_flight"] += 1
+                tracker["peak"] = max(tracker["peak"], tracker["in_flight"])
+            await asyncio.sleep(per_page_delay)
+            if tracker is not None:
+                tracker["in_flight"] -= 1
+
+            ids = range((page - 1) * size, min(page * size, total))
+            body = {
+                "results": [{"id": i, "text": f"Запись {i}", "place": place} for i in ids],
+                "next": f"?page={page + 1}" if page * size < total else None,
+            }
+            if with_count:
+                body["count"] = total
+            return httpx.Response(200, json=body)
+
+    return PagedTransport()
+
+
+@pytest.mark.asyncio
+async def test_iter_diaries_walks_all_pages(monkeypatch):
+    """Test that every page is fetched, with bounded page concurrency."""
+    tracker = {"in_flight": 0, "peak": 0}
+    scraper = _scraper(None, monkeypatch, scraper_page_concurrency=2)
+    scraper.transport = _paged_handler(230, per_page_delay=0.01, tracker=tracker)
+
+    batches = [batch async for batch in scraper.iter_diaries("Москва", 1942, page_size=50)]
+
+    assert len(batches) == 5
+    assert sorted(int(e["url"].rsplit("/", 1)[1]) for b in batches for e in b) == list(range(230))
+    # The first page alone, then at most two at a time
+    assert tracker["peak"] == 2
+    await scraper.close()
+
+
+@pytest.mark.asyncio
+async def test_iter_diaries_follows_next_without_count(monkeypatch):
+    """Test paging by "next" links when no total count is reported."""
+    scraper = _scraper(None, monkeypatch)
+    scraper.transport = _paged_handler(120, with_count=False)
+
+    batches = [batch async for batch in scraper.iter_diaries("Москва", 1942, page_size=50)]
+
+    assert [len(batch) for batch in batches] == [50, 50, 20]
+    await scraper.close()
+
+
+@pytest.mark.asyncio
+async def test_iter_diaries_filters_region(monkeypatch):
+    """Test that notes placed in another region are skipped."""
+    import httpx
+
+    def handler(request):
+        return httpx.Response(200, json={"count": 3, "results": [
+            {"id": 1, "text": "a", "place": "Москва"},
+            {"id": 2, "text": "b", "place": {"name": "Ленинград"}},
+            {"id": 3, "text": "c"},
+        ]})
+
+    scraper = _scraper(handler, monkeypatch)
+    batches = [batch async for batch in scraper.iter_diaries("Москва", 1942)]
+
+    assert [entry["text"] for entry in batches[0]] == ["a", "c"]
+    await scraper.close()
+
+
+@pytest.mark.asyncio
+async def test_iter_diaries_falls_back_to_mock(monkeypatch):
+    """Test that mock entries are yielded when the source has nothing."""
+    import httpx
+
+    scraper = _scraper(lambda request: httpx.Response(503), monkeypatch, scraper_max_retries=0)
+    batches = [batch async for batch in scraper.iter_diaries("Москва", 1945)]
+
+    assert len(batches) == 1
+    assert batches[0]
+    await scraper.close()
@@ -0,0 +1,144 @@
+"""Tests for the transformer sentiment engine and micro-batching."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.services.ml_service import EMOTIONS, ml_service
+from app.services.sentiment_model import MicroBatcher, TransformerEngine
+
+
+class FakeEngine:
+    """Scores every text as pure joy and records batch sizes."""
+
+    model_name = "fake-model"
+    runtime = "torch"
+
+    def __init__(self):
+        self.batches: list[int] = []
+
+    def score(self, texts: list[str]) -> np.ndarray:
+        self.batches.append(len(texts))
+        scores = np.zeros((len(texts), len(EMOTIONS)))
+        scores[:, EMOTIONS.index("joy")] = 1.0
+        return scores
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_coalesces_concurrent_callers():
+    """Test that concurrent submissions share one batch."""
+    engine = FakeEngine()
+    batcher = MicroBatcher(engine.score, batch_size=8, max_wait=0.05)
+
+    results = await asyncio.gather(
+        batcher.submit(["a", "b"]),
+        batcher.submit(["c"]),
+        batcher.submit(["d", "e", "f"]),
+    )
+
+    assert engine.batches == [6]
+    assert [len(r) for r in results] == [2, 1, 3]
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_flushes_full_batches_in_chunks():
+    """Test that batches are capped at batch_size texts."""
+    engine = FakeEngine()
+    batcher = MicroBatcher(engine.score, batch_size=4, max_wait=10)
+
+    result = await asyncio.wait_for(batcher.submit(list("abcdefghij")), timeout=1)
+
+    assert engine.batches == [4, 4, 2]
+    assert result.shape == (10, len(EMOTIONS))
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_propagates_errors():
+    """Test that a scoring error reaches every caller of the batch."""
+    def fail(texts):
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(fail, batch_size=8, max_wait=0.01)
+    outcomes = await asyncio.gather(
+        batcher.submit(["a"]), batcher.submit(["b"]), return_exceptions=True
+    )
+
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+
+
+@pytest.mark.asyncio
+async def test_ml_service_uses_transformer_engine(monkeypatch):
+    """Test that the async API goes through the configured engine."""
+    engine = FakeEngine()
+    monkeypatch.setattr(settings, "ml_engine", "transformer")
+    monkeypatch.setattr(ml_service, "_engine", engine)
+    monkeypatch.setattr(ml_service, "_engine_failed", False)
+
+    result = await ml_service.aggregate_batch_async(["Мне страх", "Обычный день"])
+
+    assert result["joy"] == pytest.approx(1.0)
+    assert engine.batches == [2]
+
+
+@pytest.mark.asyncio
+async def test_ml_service_falls_back_to_rules(monkeypatch, tmp_path):
+    """Test the rule engine fallback when the model cannot be loaded."""
+    monkeypatch.setattr(settings, "ml_engine", "transformer")
+    monkeypatch.setattr(settings, "ml_model_name", str(tmp_path / "missing-model"))
+    monkeypatch.setattr(ml_service, "_engine", None)
+    monkeypatch.setattr(ml_service, "_engine_failed", False)
+
+    texts = ["Мне страх", "Я рад"]
+    result = await ml_service.analyze_batch_async(texts)
+
+    assert result == ml_service.analyze_batch(texts)
+    assert ml_service._engine_failed
+
+
+def test_fear_share():
+    """Test the split of negative predictions between fear and sadness."""
+    share = ml_service.fear_share(["страх", "печаль", "страх и печаль", "день"])
+
+    assert share.tolist() == [1.0, 0.0, 0.5, 0.5]
+
+
+@pytest.fixture
+def tiny_model_dir(tmp_path):
+    """A tiny randomly initialised BERT classifier saved locally (no download)."""
+    pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "мне", "страх", "я", "рад"]
+    (tmp_path / "vocab.txt").write_text("\n".join(vocab), encoding="utf-8")
+    tokenizer = transformers.BertTokenizerFast(vocab_file=str(tmp_path / "vocab.txt"))
+
+    config = transformers.BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=16,
+        num_hidden_layers=1,
+        num_attention_heads=2,
+        intermediate_size=32,
+        id2label={0: "neutral", 1: "positive", 2: "negative"},
+        label2id={"neutral": 0, "positive": 1, "negative": 2},
+    )
+    transformers.BertForSequenceClassification(config).save_pretrained(tmp_path)
+    tokenizer.save_pretrained(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.parametrize("runtime", ["torch", "quantized"])
+def test_transformer_engine_with_local_model(tiny_model_dir, runtime):
+    """Test scoring with a tiny local model."""
+    engine = TransformerEngine(
+        str(tiny_model_dir), runtime=runtime, negative_split=ml_service.fear_share
+    )
+
+    scores = engine.score(["мне страх", "я рад", ""])
+
+    assert engine.loaded
+    assert scores.shape == (3, len(EMOTIONS))
+    assert np.allclose(scores.sum(axis=1), 1.0)
+    # "мне страх" has no sadness keywords, so its negative share is all fear
+    assert scores[0, EMOTIONS.index("sadness")] == pytest.approx(0.0)
@@ -0,0 +1,78 @@
+"""Tests for single-flight request coalescing."""
+
+import asyncio
+
+import pytest
+
+from app.utils import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_are_coalesced():
+    """Test that concurrent calls for one key run the work once."""
+    flight = SingleFlight()
+    runs = 0
+
+    async def work():
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    results = await asyncio.gather(*(flight.do("key", work) for _ in range(50)))
+
+    assert results == ["result"] * 50
+    assert runs == 1
+    assert flight.stats() == {"calls": 50, "executions": 1, "coalesced": 49, "in_flight": 0}
+
+
+@pytest.mark.asyncio
+async def test_different_keys_run_separately():
+    """Test that distinct keys are not coalesced."""
+    flight = SingleFlight()
+
+    async def work(value):
+        await asyncio.sleep(0)
+        return value
+
+    results = await asyncio.gather(flight.do(1, lambda: work(1)), flight.do(2, lambda: work(2)))
+
+    assert results == [1, 2]
+    assert flight.executions == 2
+
+
+@pytest.mark.asyncio
+async def test_exception_is_shared_and_key_released():
+    """Test that waiters share a failure and the key can be retried."""
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        flight.do("key", fail), flight.do("key", fail), return_exceptions=True
+    )
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.in_flight == 0
+
+    async def ok():
+        return "ok"
+
+    assert await flight.do("key", ok) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_work():
+    """Test that a caller timing out leaves the shared work running."""
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    waiter = asyncio.create_task(flight.do("key", work))
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(flight.do("key", work), timeout=0.01)
+
+    assert await waiter == "done"
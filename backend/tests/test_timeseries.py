@@ -0,0 +1,36 @@
+"""Tests for per-year series helpers."""
+
+import numpy as np
+import pytest
+
+from app.utils import rolling_mean, year_deltas
+
+
+def test_rolling_mean_skips_missing_years():
+    """Test the centered mean over present values only."""
+    values = np.array([1.0, 3.0, np.nan, 5.0, 7.0])
+
+    smoothed = rolling_mean(values, 3)
+
+    assert smoothed[[0, 1, 3, 4]] == pytest.approx([2.0, 2.0, 6.0, 6.0])
+    assert np.isnan(smoothed[2])
+    assert rolling_mean(values, 1) is not values
+    assert np.array_equal(rolling_mean(values, 1), values, equal_nan=True)
+
+
+def test_rolling_mean_by_column():
+    """Test that 2D series are smoothed column by column."""
+    values = np.array([[0.0, 1.0], [1.0, 1.0], [2.0, 1.0], [3.0, 1.0]])
+
+    smoothed = rolling_mean(values, 2)
+
+    assert smoothed[:, 0] == pytest.approx([0.0, 0.5, 1.5, 2.5])
+    assert smoothed[:, 1] == pytest.approx([1.0] * 4)
+
+
+def test_year_deltas():
+    """Test changes from the previous year."""
+    deltas = year_deltas(np.array([1.0, 1.5, np.nan, 2.0]))
+
+    assert np.isnan(deltas[[0, 2, 3]]).all()
+    assert deltas[1] == pytest.approx(0.5)
@@ -0,0 +1,86 @@
+"""Tests for Mapbox Vector Tile encoding and the tile disk cache."""
+
+from app.utils.vector_tiles import TileCache, render_tile, tile_bounds, tiles_covering
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return result, pos
+
+
+def _fields(data: bytes) -> list[tuple[int, object]]:
+    """Decode one level of protobuf fields (varint and length-delimited only)."""
+    fields = []
+    pos = 0
+    while pos < len(data):
+        key, pos = _read_varint(data, pos)
+        if key & 7 == 0:
+            value, pos = _read_varint(data, pos)
+        else:
+            length, pos = _read_varint(data, pos)
+            value = data[pos:pos + length]
+            pos += length
+        fields.append((key >> 3, value))
+    return fields
+
+
+SQUARE = {
+    "id": "ru-mos",
+    "properties": {"name": "Московская область"},
+    "geometry": {
+        "type": "Polygon",
+        "coordinates": [[[37, 55], [38, 55], [38, 56], [37, 56], [37, 55]]],
+    },
+}
+
+
+def test_render_tile_layer():
+    """Test that a tile holds a 'regions' layer with the feature and its name."""
+    (z, x, y), = tiles_covering((37.5, 55.5, 37.5, 55.5), 4)
+    tile = render_tile([SQUARE], z, x, y)
+
+    (field, layer), = _fields(tile)
+    assert field == 3
+    layer_fields = dict(_fields(layer))
+    assert layer_fields[1] == b"regions"
+    assert layer_fields[5] == 4096
+    assert layer_fields[15] == 2
+    assert "Московская область".encode() in layer_fields[4]
+
+    feature = dict(_fields(layer_fields[2]))
+    assert feature[3] == 3  # POLYGON
+
+
+def test_render_tile_empty_outside_regions():
+    """Test that tiles far from every region are empty."""
+    assert render_tile([SQUARE], 4, 0, 0) == b""
+
+
+def test_tile_bounds_and_covering():
+    """Test tile math for the whole world and a region."""
+    west, south, east, north = tile_bounds(0, 0, 0)
+    assert (west, east) == (-180, 180)
+    assert round(north, 4) == 85.0511
+
+    assert tiles_covering((37, 55, 38, 56), 0) == [(0, 0, 0)]
+
+
+def test_tile_cache_renders_once(tmp_path):
+    """Test that rendered tiles are persisted and reused."""
+    cache = TileCache(tmp_path)
+    calls = []
+
+    def render():
+        calls.append(1)
+        return b"tile"
+
+    assert cache.get_or_render("v1", 4, 9, 5, render) == b"tile"
+    assert cache.get_or_render("v1", 4, 9, 5, render) == b"tile"
+    assert len(calls) == 1
+    assert (tmp_path / "v1" / "4" / "9" / "5.mvt").read_bytes() == b"tile"
@@ -1,30 +1,43 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import MapView from './components/MapView';
 import YearSlider from './components/YearSlider';
 import EmotionLegend from './components/EmotionLegend';
 import RegionModal from './components/RegionModal';
 import LoadingSpinner from './components/LoadingSpinner';
-import { fetchMapData, fetchRegionDetail } from './services/api';
+import { fetchMapData, fetchMapRange, fetchRegionDetail, fetchRegionTimeline } from './services/api';
 import './App.css';
 
 const MIN_YEAR = 1920;
 const MAX_YEAR = 1991;
+// Same as the server's max-age for map responses; older entries are refetched
+const MAP_CACHE_TTL_MS = 60 * 1000;
 
 function App() {
   const [year, setYear] = useState(1941);
   const [mapData, setMapData] = useState(null);
   const [selectedRegion, setSelectedRegion] = useState(null);
   const [regionDetail, setRegionDetail] = useState(null);
+  const [regionTimeline, setRegionTimeline] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
+  // Map data by year and decades requested via fetchMapRange, with expiry times
+  const mapCache = useRef({});
+  const prefetchedDecades = useRef(new Map());
 
   // Fetch map data when year changes
   useEffect(() => {
     const loadMapData = async () => {
+      const cached = mapCache.current[year];
+      if (cached && cached.expiresAt > Date.now()) {
+        setMapData(cached.data);
+        return;
+      }
+
       setLoading(true);
       setError(null);
       try {
         const data = await fetchMapData(year);
+        mapCache.current[year] = { data, expiresAt: Date.now() + MAP_CACHE_TTL_MS };
         setMapData(data);
       } catch (err) {
         setError(err.message);
@@ -34,7 +47,26 @@ function App() {
       }
     };
 
-    loadMapData();
+    // Prefetch the whole decade around the selected year in one request
+    const prefetchDecade = async () => {
+      const decadeStart = Math.max(MIN_YEAR, Math.floor(year / 10) * 10);
+      if (prefetchedDecades.current.get(decadeStart) > Date.now()) return;
+      prefetchedDecades.current.set(decadeStart, Date.now() + MAP_CACHE_TTL_MS);
+
+      try {
+        const range = await fetchMapRange(decadeStart, Math.min(MAX_YEAR, decadeStart + 9));
+        const expiresAt = Date.now() + MAP_CACHE_TTL_MS;
+        Object.entries(range).forEach(([rangeYear, data]) => {
+          mapCache.current[rangeYear] = { data, expiresAt };
+        });
+      } catch (err) {
+        prefetchedDecades.current.delete(decadeStart);
+        console.error('Error prefetching map data:', err);
+      }
+    };
+
+    // The prefetch waits so it does not compete with the selected year
+    loadMapData().then(prefetchDecade);
   }, [year]);
 
   // Handle region click
@@ -42,8 +74,13 @@ function App() {
     setSelectedRegion(region);
     setLoading(true);
     try {
-      const detail = await fetchRegionDetail(year, region.name);
+      // The timeline is optional: the modal falls back to the detail stats
+      const [detail, timeline] = await Promise.all([
+        fetchRegionDetail(year, region.name),
+        fetchRegionTimeline(region.name, { window: 3 }).catch(() => null),
+      ]);
       setRegionDetail(detail);
+      setRegionTimeline(timeline);
     } catch (err) {
       console.error('Error loading region detail:', err);
       setError(err.message);
@@ -56,6 +93,7 @@ function App() {
   const handleCloseModal = useCallback(() => {
     setSelectedRegion(null);
     setRegionDetail(null);
+    setRegionTimeline(null);
   }, []);
 
   // Calculate emotion statistics
@@ -143,6 +181,7 @@ function App() {
         <RegionModal
           region={selectedRegion}
           detail={regionDetail}
+          timeline={regionTimeline}
           onClose={handleCloseModal}
         />
       )}
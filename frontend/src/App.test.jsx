@@ -1,6 +1,7 @@
 import { describe, it, expect, vi, beforeEach } from 'vitest';
-import { render, screen } from '@testing-library/react';
+import { render, screen, waitFor } from '@testing-library/react';
 import App from './App';
+import { fetchMapData, fetchMapRange } from './services/api';
 
 // Mock the API module
 vi.mock('./services/api', () => ({
@@ -8,6 +9,7 @@ vi.mock('./services/api', () => ({
     year: 1941,
     regions: [],
   })),
+  fetchMapRange: vi.fn(() => Promise.resolve({})),
   fetchRegionDetail: vi.fn(() => Promise.resolve({
     name: 'Test Region',
     year: 1941,
@@ -15,6 +17,8 @@ vi.mock('./services/api', () => ({
     diary_entries: [],
     stats: { population: 1000000, change_percent: 0, year: 1941 },
   })),
+  fetchRegionTimeline: vi.fn(() => Promise.resolve(null)),
+  fetchRegionGeometry: vi.fn(() => Promise.resolve({ type: 'FeatureCollection', features: [] })),
   checkHealth: vi.fn(() => Promise.resolve({ status: 'ok', version: '0.1.0' })),
 }));
 
@@ -59,4 +63,18 @@ describe('App', () => {
 
     expect(screen.getByText(/Кликните на регион/i)).toBeInTheDocument();
   });
+
+  it('prefetches the decade after the selected year has loaded', async () => {
+    let resolveYear;
+    fetchMapData.mockImplementationOnce(
+      () => new Promise((resolve) => { resolveYear = resolve; })
+    );
+    render(<App />);
+
+    expect(fetchMapData).toHaveBeenCalledWith(1941);
+    expect(fetchMapRange).not.toHaveBeenCalled();
+
+    resolveYear({ year: 1941, regions: [] });
+    await waitFor(() => expect(fetchMapRange).toHaveBeenCalledWith(1940, 1949));
+  });
 });
@@ -2,6 +2,7 @@ import { useState, useCallback, useEffect } from 'react';
 import { MapContainer, TileLayer, GeoJSON, useMap } from 'react-leaflet';
 import L from 'leaflet';
 import 'leaflet/dist/leaflet.css';
+import { fetchRegionGeometry } from '../services/api';
 
 // Fix for default marker icons
 delete L.Icon.Default.prototype._getIconUrl;
@@ -11,6 +12,8 @@ L.Icon.Default.mergeOptions({
   shadowUrl: new URL('leaflet/dist/images/marker-shadow.png', import.meta.url).href,
 });
 
+const INITIAL_ZOOM = 3;
+
 // Emotion color mapping
 const getEmotionColor = (emotions) => {
   if (!emotions) return '#e5e7eb';
@@ -43,13 +46,8 @@ const MapView = ({ year, regions, onRegionClick }) => {
   useEffect(() => {
     const loadGeoJson = async () => {
       try {
-        // In development, use the local file
-        // In production, this could be served from the backend
-        const response = await fetch('/urss.geojson');
-        if (!response.ok) {
-          throw new Error('Failed to load GeoJSON');
-        }
-        const data = await response.json();
+        // Simplified geometry for the initial zoom, served by the backend
+        const data = await fetchRegionGeometry(INITIAL_ZOOM);
 
         // Add emotion data to each feature
         const featuresWithEmotions = data.features.map((feature) => {
@@ -180,7 +178,7 @@ const MapView = ({ year, regions, onRegionClick }) => {
     <div className="relative w-full" onMouseMove={handleMouseMove}>
       <MapContainer
         center={center}
-        zoom={3}
+        zoom={INITIAL_ZOOM}
         minZoom={2}
         maxZoom={6}
         className="w-full h-[500px] sm:h-[600px] rounded-lg shadow-lg"
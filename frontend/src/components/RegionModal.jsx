@@ -14,7 +14,7 @@ import {
   Legend,
 } from 'recharts';
 
-const RegionModal = memo(({ region, detail, onClose }) => {
+const RegionModal = memo(({ region, detail, timeline, onClose }) => {
   const emotions = detail.emotions || {};
 
   // Prepare pie chart data
@@ -25,8 +25,20 @@ const RegionModal = memo(({ region, detail, onClose }) => {
     { name: 'Грусть', value: emotions.sadness || 0, color: '#3b82f6' },
   ].filter((item) => item.value > 0);
 
-  // Prepare population trend data (mock)
-  const populationData = [
+  // Prepare trend data from the region timeline (one request for all years)
+  const timelineData = timeline
+    ? timeline.years.map((year, index) => ({
+        year,
+        population: timeline.population[index],
+        fear: timeline.emotions.fear[index],
+        joy: timeline.emotions.joy[index],
+        sadness: timeline.emotions.sadness[index],
+      }))
+    : [];
+  const emotionTrend = timelineData.filter((item) => item.fear !== null);
+
+  // Without a timeline, estimate the population trend around the selected year
+  const populationData = timelineData.length > 1 ? timelineData : [
     { year: detail.year - 2, population: (detail.stats?.population || 1000000) * 0.95 },
     { year: detail.year - 1, population: (detail.stats?.population || 1000000) * 0.98 },
     { year: detail.year, population: detail.stats?.population || 1000000 },
@@ -80,6 +92,25 @@ const RegionModal = memo(({ region, detail, onClose }) => {
             </ResponsiveContainer>
           </div>
 
+          {/* Emotion Trend */}
+          {emotionTrend.length > 1 && (
+            <div>
+              <h3 className="text-lg font-semibold mb-4">Динамика эмоций</h3>
+              <ResponsiveContainer width="100%" height={200}>
+                <LineChart data={emotionTrend}>
+                  <CartesianGrid strokeDasharray="3 3" />
+                  <XAxis dataKey="year" />
+                  <YAxis domain={[0, 1]} />
+                  <Tooltip formatter={(value) => `${(value * 100).toFixed(0)}%`} />
+                  <Legend />
+                  <Line type="monotone" dataKey="fear" name="Страх" stroke="#ef4444" dot={false} />
+                  <Line type="monotone" dataKey="joy" name="Радость" stroke="#22c55e" dot={false} />
+                  <Line type="monotone" dataKey="sadness" name="Грусть" stroke="#3b82f6" dot={false} />
+                </LineChart>
+              </ResponsiveContainer>
+            </div>
+          )}
+
           {/* Diary Entries */}
           <div>
             <h3 className="text-lg font-semibold mb-4">
@@ -15,6 +15,43 @@ export async function fetchMapData(year) {
   return response.json();
 }
 
+/**
+ * Fetch map data for a range of years in a single request
+ * @param {number} fromYear - First year of the range (inclusive)
+ * @param {number} toYear - Last year of the range (inclusive)
+ * @returns {Promise<Object>} Map data keyed by year, each in the fetchMapData format
+ */
+export async function fetchMapRange(fromYear, toYear) {
+  const response = await fetch(`${API_URL}/api/map?from=${fromYear}&to=${toYear}`);
+
+  if (!response.ok) {
+    throw new Error(`Failed to fetch map range: ${response.statusText}`);
+  }
+
+  // Newline-delimited JSON: a header with regions, then one line per year
+  const [header, ...years] = (await response.text())
+    .split('\n')
+    .filter(Boolean)
+    .map((line) => JSON.parse(line));
+
+  const result = {};
+  years.forEach(({ year, values }) => {
+    result[year] = {
+      year,
+      regions: header.regions.map((region, index) => {
+        const [fear, joy, neutral, sadness, diaryCount] = values[index];
+        return {
+          ...region,
+          emotions: { fear, joy, neutral, sadness },
+          diary_count: diaryCount,
+        };
+      }),
+    };
+  });
+
+  return result;
+}
+
 /**
  * Fetch detailed data for a specific region and year
  * @param {number} year - Year to fetch data for
@@ -32,6 +69,55 @@ export async function fetchRegionDetail(year, regionName) {
   return response.json();
 }
 
+/**
+ * Fetch the per-year series of a region in a single request
+ * @param {string} regionName - Name of the region
+ * @param {Object} [options]
+ * @param {number} [options.window=1] - Centered rolling mean window in years
+ * @param {boolean} [options.deltas=false] - Include year-over-year changes
+ * @returns {Promise<Object>} Years with emotion series, diary counts and population
+ */
+export async function fetchRegionTimeline(regionName, { window = 1, deltas = false } = {}) {
+  const encodedRegion = encodeURIComponent(regionName);
+  const response = await fetch(
+    `${API_URL}/api/region/${encodedRegion}/timeline?window=${window}&deltas=${deltas}`
+  );
+
+  if (!response.ok) {
+    throw new Error(`Failed to fetch region timeline: ${response.statusText}`);
+  }
+
+  return response.json();
+}
+
+/**
+ * Fetch simplified region geometries suitable for a map zoom level
+ * @param {number} zoom - Map zoom the geometries will be displayed at
+ * @returns {Promise<Object>} GeoJSON FeatureCollection of regions
+ */
+export async function fetchRegionGeometry(zoom) {
+  const manifestResponse = await fetch(`${API_URL}/api/geo/manifest`);
+
+  if (!manifestResponse.ok) {
+    throw new Error(`Failed to fetch geometry manifest: ${manifestResponse.statusText}`);
+  }
+
+  // Levels are ordered from coarsest to finest; their URLs are versioned
+  // so the browser can cache them forever
+  const manifest = await manifestResponse.json();
+  const level =
+    Object.values(manifest.levels).find((item) => zoom <= item.max_zoom) ||
+    manifest.levels[manifest.default_level];
+
+  const response = await fetch(`${API_URL}${level.url}`);
+
+  if (!response.ok) {
+    throw new Error(`Failed to fetch region geometry: ${response.statusText}`);
+  }
+
+  return response.json();
+}
+
 /**
  * Check API health
  * @returns {Promise<Object>} Health status
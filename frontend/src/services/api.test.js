@@ -1,5 +1,12 @@
 import { describe, it, expect, beforeEach, vi } from 'vitest';
-import { fetchMapData, fetchRegionDetail, checkHealth } from './api';
+import {
+  fetchMapData,
+  fetchMapRange,
+  fetchRegionDetail,
+  fetchRegionTimeline,
+  fetchRegionGeometry,
+  checkHealth,
+} from './api';
 
 // Mock global fetch
 global.fetch = vi.fn();
@@ -47,6 +54,47 @@ describe('API Service', () => {
     });
   });
 
+  describe('fetchMapRange', () => {
+    it('fetches and expands a range of years', async () => {
+      const body = [
+        JSON.stringify({
+          from: 1941,
+          to: 1942,
+          regions: [{ name: 'Московская область', geo_id: 'ru-mos' }],
+          fields: ['fear', 'joy', 'neutral', 'sadness', 'diary_count'],
+        }),
+        JSON.stringify({ year: 1942, values: [[0.5, 0.1, 0.2, 0.2, 3]] }),
+        JSON.stringify({ year: 1941, values: [[0.6, 0.1, 0.2, 0.1, 14]] }),
+        '',
+      ].join('\n');
+
+      global.fetch.mockResolvedValue({
+        ok: true,
+        text: async () => body,
+      });
+
+      const result = await fetchMapRange(1941, 1942);
+
+      expect(global.fetch).toHaveBeenCalledWith(`${API_URL}/api/map?from=1941&to=1942`);
+      expect(Object.keys(result)).toEqual(['1941', '1942']);
+      expect(result[1941].regions[0]).toEqual({
+        name: 'Московская область',
+        geo_id: 'ru-mos',
+        emotions: { fear: 0.6, joy: 0.1, neutral: 0.2, sadness: 0.1 },
+        diary_count: 14,
+      });
+    });
+
+    it('throws error when response is not ok', async () => {
+      global.fetch.mockResolvedValue({
+        ok: false,
+        statusText: 'Bad Request',
+      });
+
+      await expect(fetchMapRange(1941, 1942)).rejects.toThrow('Failed to fetch map range');
+    });
+  });
+
   describe('fetchRegionDetail', () => {
     it('fetches region detail for a given year and region', async () => {
       const mockDetail = {
@@ -82,6 +130,79 @@ describe('API Service', () => {
     });
   });
 
+  describe('fetchRegionTimeline', () => {
+    it('fetches the series of a region with smoothing options', async () => {
+      const mockTimeline = {
+        name: 'Москва',
+        years: [1941, 1942],
+        window: 3,
+        emotions: { fear: [0.6, null], joy: [0.1, null], neutral: [0.2, null], sadness: [0.1, null] },
+        diary_count: [12, 0],
+        population: [5000000, null],
+        deltas: null,
+      };
+
+      global.fetch.mockResolvedValue({
+        ok: true,
+        json: async () => mockTimeline,
+      });
+
+      const result = await fetchRegionTimeline('Москва', { window: 3 });
+
+      expect(global.fetch).toHaveBeenCalledWith(
+        `${API_URL}/api/region/%D0%9C%D0%BE%D1%81%D0%BA%D0%B2%D0%B0/timeline?window=3&deltas=false`
+      );
+      expect(result).toEqual(mockTimeline);
+    });
+
+    it('throws error when response is not ok', async () => {
+      global.fetch.mockResolvedValue({
+        ok: false,
+        statusText: 'Not Found',
+      });
+
+      await expect(fetchRegionTimeline('Unknown')).rejects.toThrow(
+        'Failed to fetch region timeline'
+      );
+    });
+  });
+
+  describe('fetchRegionGeometry', () => {
+    it('fetches the geometry level matching the zoom', async () => {
+      const manifest = {
+        default_level: 'medium',
+        levels: {
+          low: { max_zoom: 2, url: '/api/geo/regions?level=low&v=a' },
+          medium: { max_zoom: 4, url: '/api/geo/regions?level=medium&v=b' },
+          high: { max_zoom: 99, url: '/api/geo/regions?level=high&v=c' },
+        },
+      };
+      const geometry = { type: 'FeatureCollection', features: [] };
+
+      global.fetch
+        .mockResolvedValueOnce({ ok: true, json: async () => manifest })
+        .mockResolvedValueOnce({ ok: true, json: async () => geometry });
+
+      const result = await fetchRegionGeometry(3);
+
+      expect(global.fetch).toHaveBeenNthCalledWith(1, `${API_URL}/api/geo/manifest`);
+      expect(global.fetch).toHaveBeenNthCalledWith(
+        2,
+        `${API_URL}/api/geo/regions?level=medium&v=b`
+      );
+      expect(result).toEqual(geometry);
+    });
+
+    it('throws error when manifest request fails', async () => {
+      global.fetch.mockResolvedValue({
+        ok: false,
+        statusText: 'Server Error',
+      });
+
+      await expect(fetchRegionGeometry(3)).rejects.toThrow('Failed to fetch geometry manifest');
+    });
+  });
+
   describe('checkHealth', () => {
     it('checks API health status', async () => {
       const mockHealth = { status: 'ok', version: '0.1.0' };